@@ -0,0 +1,161 @@
+"""Micro-benchmark of member extraction on large synthetic files.
+
+Compares the compiled tree-sitter query of ``extract_members`` with the
+previous recursive Python walk of the syntax tree. Parsing is timed apart:
+both extract from the same tree, parsed once.
+
+The query is there for coverage (records, annotation types, constructors,
+fields) and to extract without recursion, not for speed: the two run on par.
+The query cursor visits every node in C, method bodies included, which
+costs about what the walk spends in Python on the declarations alone, and
+both are well below the parse itself.
+
+Usage:
+    python -m benchmarks.bench_extractor [--classes 200] [--methods 50] [--repeat 5]
+"""
+import argparse
+import random
+import time
+from typing import List, Optional
+
+from tree_sitter import Parser
+
+from benchmarks.synthetic_repo import generate_class
+from src.members import Member, extract_members, has_javadoc_above, java_language
+
+# Member declarations the previous walk handled and the node excluded from their signature
+LEGACY_BODIES = {
+    'method_declaration': ('method', 'block'),
+    'constructor_declaration': ('constructor', 'constructor_body'),
+    'enum_constant': ('enum_constant', 'class_body'),
+}
+
+# Ratios of the query time to the walk time reported as parity, run-to-run noise is about as large
+PARITY = (0.75, 1.33)
+
+def generate_file(classes: int, methods: int, seed: int = 0) -> str:
+    """
+    Generate a file with the given number of top-level classes.
+
+    Each class has initialized fields, a lookup table and a nested class besides
+    its methods, as generated and entity code often has.
+    """
+    rng = random.Random(seed)
+    bodies = []
+    for index in range(classes):
+        body = generate_class(f"Generated{index}", methods, rng, index == 0)
+        table = ", ".join(str(rng.randint(0, 255)) for _ in range(64))
+        fields = [
+            f"    private static final int[] TABLE = {{{table}}};",
+            "    private final Map<String, List<Integer>> cache = new HashMap<>();",
+            "    @Deprecated",
+            f"    protected String label = \"Generated{index}\" + \".\" + TABLE.length;",
+        ]
+        nested = generate_class("Nested", methods // 5, rng, False).replace("\n", "\n    ")
+        head, tail = body.split("\n", 1)
+        bodies.append(head + "\n" + "\n".join(fields) + "\n" + tail[:-1] + "    static " + nested + "\n}")
+    imports = "".join(f"import bench.dependency{index}.Type{index};\n" for index in range(30))
+    return "package bench;\n\nimport java.util.*;\n" + imports + "\n" + "\n\n".join(bodies) + "\n"
+
+def legacy_extract_members(parser: Parser, java_code: str) -> List[Member]:
+    """The previous extractor: a recursive walk over the children of every node."""
+    source = java_code.encode("utf-8", "surrogateescape")
+    tree = parser.parse(source)
+    members: List[Member] = []
+
+    def text(start: int, end: int) -> str:
+        return source[start:end].decode("utf8", errors="replace")
+
+    def identifier(node) -> Optional[str]:
+        for child in node.children:
+            if child.type == 'identifier':
+                return text(child.start_byte, child.end_byte)
+        return None
+
+    def signature_end(node, *body_types: str) -> int:
+        for child in node.children:
+            if child.type in body_types:
+                return child.start_byte
+        return node.end_byte
+
+    def walk(node, class_signature: Optional[str] = None):
+        if node.type in ('class_declaration', 'interface_declaration', 'enum_declaration'):
+            signature = text(node.start_byte, signature_end(node, 'class_body', 'interface_body', 'enum_body')).strip()
+            members.append(Member(
+                'class', identifier(node), signature, node.start_byte, node.end_byte,
+                node.start_point[0], has_javadoc_above(node, source), signature
+            ))
+            for child in node.children:
+                if child.type == 'class_body':
+                    for class_body_child in child.children:
+                        walk(class_body_child, signature)
+                elif child.type == 'enum_body':
+                    for enum_body_child in child.children:
+                        if enum_body_child.type == 'enum_body_declarations':
+                            for declaration in enum_body_child.children:
+                                walk(declaration, signature)
+                        else:
+                            walk(enum_body_child, signature)
+        elif node.type in LEGACY_BODIES and class_signature is not None:
+            kind, body_type = LEGACY_BODIES[node.type]
+            signature = text(node.start_byte, signature_end(node, body_type)).strip()
+            members.append(Member(
+                kind, identifier(node), signature, node.start_byte, node.end_byte,
+                node.start_point[0], has_javadoc_above(node, source), class_signature
+            ))
+        else:
+            for child in node.children:
+                walk(child, class_signature)
+
+    walk(tree.root_node)
+    return members
+
+class ParsedTree:
+    """Stands in for the parser with a tree parsed beforehand, so only extraction is timed."""
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def parse(self, source: bytes):
+        return self.tree
+
+def measure(function, parser, code: str, repeat: int) -> float:
+    """Return the best wall-clock time of several runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(parser, code)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=200)
+    parser.add_argument("--methods", type=int, default=50, help="Methods per top-level class")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    java_parser = Parser()
+    java_parser.set_language(java_language())
+    code = generate_file(args.classes, args.methods)
+
+    # Same members apart from the kinds the walk skipped
+    legacy_members = legacy_extract_members(java_parser, code)
+    members = [m for m in extract_members(java_parser, code) if m.kind != 'field']
+    fields = sum(m.kind == 'field' for m in extract_members(java_parser, code))
+    assert [(m.kind, m.signature) for m in members] == [(m.kind, m.signature) for m in legacy_members]
+
+    parse = measure(lambda p, c: p.parse(c.encode("utf-8")), java_parser, code, args.repeat)
+    parsed = ParsedTree(java_parser.parse(code.encode("utf-8")))
+    legacy = measure(legacy_extract_members, parsed, code, args.repeat)
+    query = measure(extract_members, parsed, code, args.repeat)
+    print(f"File: {len(code.encode('utf-8')) / 1024:.0f} KiB, {len(legacy_members)} members found by the walk, "
+          f"{len(members) + fields} by the query ({fields} fields)")
+    print(f"parse:  {parse * 1000:8.1f} ms")
+    print(f"walk:   {legacy * 1000:8.1f} ms")
+    ratio = query / legacy
+    verdict = "on par with" if PARITY[0] <= ratio <= PARITY[1] else "faster than" if ratio < 1 else "slower than"
+    print(f"query:  {query * 1000:8.1f} ms  ({ratio:.2f}x the walk, {verdict} it)")
+
+if __name__ == "__main__":
+    main()
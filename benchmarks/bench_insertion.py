@@ -0,0 +1,69 @@
+"""Micro-benchmark of Javadoc insertion on a synthetic file with many methods.
+
+Compares the single-pass byte splice writer with the previous approach of
+``list.insert`` calls on ``splitlines()``.
+
+Usage:
+    python -m benchmarks.bench_insertion [--methods 10000] [--repeat 3]
+"""
+import argparse
+import time
+from typing import List, Tuple
+
+from src.members import Member
+from src.source import encode_source, splice_javadocs
+
+COMMENT = "/**\n * Returns the value.\n *\n * @return the value\n */"
+
+def generate_file(methods: int) -> Tuple[str, List[Tuple[Member, str]]]:
+    """Generate a class with the given number of methods and one insertion per method."""
+    lines = ["package bench;", "", "public class Generated {"]
+    for index in range(methods):
+        lines.append(f"    public int method{index}(int value) {{")
+        lines.append(f"        return value + {index};")
+        lines.append("    }")
+        lines.append("")
+    lines.append("}")
+    code = "\n".join(lines) + "\n"
+
+    source = encode_source(code)
+    insertions = []
+    start = 0
+    for index in range(methods):
+        start = source.index(b"public int method", start)
+        line = 3 + index * 4
+        insertions.append((Member("method", f"method{index}", "", start, start, line, False, ""), COMMENT))
+        start += 1
+    return code, insertions
+
+def legacy_insert(java_code: str, insertions: List[Tuple[Member, str]]) -> str:
+    """The previous insertion algorithm: one list.insert per comment."""
+    updated_code = java_code.splitlines()
+    for member, comment in sorted(insertions, key=lambda x: x[0].start_line, reverse=True):
+        updated_code.insert(member.start_line, comment)
+    return "\n".join(updated_code)
+
+def measure(function, code: str, insertions, repeat: int) -> float:
+    """Return the best wall-clock time of several runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(code, insertions)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--methods", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    code, insertions = generate_file(args.methods)
+    legacy = measure(legacy_insert, code, insertions, args.repeat)
+    splice = measure(splice_javadocs, code, insertions, args.repeat)
+    print(f"File: {args.methods} methods, {len(code.encode('utf-8')) / 1024:.0f} KiB")
+    print(f"list.insert: {legacy * 1000:8.1f} ms")
+    print(f"splice:      {splice * 1000:8.1f} ms  ({legacy / splice:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Local stand-in for the Ollama HTTP API, used to benchmark without a model.
+
+Answers ``/api/chat`` with a Javadoc comment after a configurable latency plus
+generation time at a configurable token rate, optionally followed by an
+explanation like chatty models add. Batched (``format: json``) prompts get one
+comment per numbered member. ``/api/tags`` lists one model.
+
+Usage:
+    python -m benchmarks.mock_ollama [--port 11434] [--latency 0.2] [--tokens-per-second 50] [--chatter-tokens 0]
+"""
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+COMMENT = "/**\n * Performs the operation.\n *\n * @return the result\n */"
+COMMENT_TOKENS = 16
+CHATTER = "This comment describes what the method does, its parameters and its result."
+MEMBER_ID = re.compile(r"^(\d+): ", re.MULTILINE)
+
+class MockOllamaServer:
+    """Threaded HTTP server emulating the chat and model list endpoints of Ollama."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        tokens_per_second: float = 0.0,
+        model: str = "mock",
+        chatter_tokens: int = 0
+    ):
+        """
+        Args:
+            host (str): Interface to listen on.
+            port (int): Port to listen on, 0 picks a free one.
+            latency (float): Seconds before the first token (prompt evaluation).
+            tokens_per_second (float): Generation rate, 0 answers instantly.
+            model (str): Name reported by /api/tags.
+            chatter_tokens (int): Tokens of explanation generated after the comment of single prompts.
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.model = model
+        self.chatter_tokens = chatter_tokens
+        self.requests = 0
+        # Streams the client closed before their end
+        self.streams_closed = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="mock-ollama", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self) -> "MockOllamaServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def answer(self, request: Dict) -> Tuple[str, int, int]:
+        """Return the content of a chat answer, its generated token count and its prompt token count."""
+        prompt = request["messages"][-1]["content"]
+        prompt_tokens = sum(len(message["content"]) for message in request["messages"]) // 4
+        if request.get("format") == "json":
+            ids = MEMBER_ID.findall(prompt) or ["1"]
+            return json.dumps({member_id: COMMENT for member_id in ids}), COMMENT_TOKENS * len(ids), prompt_tokens
+        # Generation stops at num_predict, as in Ollama
+        chatter_tokens = self.chatter_tokens
+        num_predict = (request.get("options") or {}).get("num_predict")
+        if num_predict:
+            chatter_tokens = min(chatter_tokens, max(num_predict - COMMENT_TOKENS, 0))
+        if not chatter_tokens:
+            return COMMENT, COMMENT_TOKENS, prompt_tokens
+        # One token per word
+        words = (CHATTER.split() * (chatter_tokens // len(CHATTER.split()) + 1))[:chatter_tokens]
+        lines = [" ".join(words[index:index + 13]) for index in range(0, len(words), 13)]
+        return COMMENT + "\n\n" + "\n".join(lines), COMMENT_TOKENS + chatter_tokens, prompt_tokens
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, Nagle would delay the body
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:
+                    # A client that closed a stream early drops its kept-alive connection
+                    pass
+
+            def send_json(self, body: Dict, status: int = 200):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self.send_json({"models": [{"name": server.model, "model": server.model}]})
+                elif self.path == "/":
+                    self.send_json({"status": "Ollama is running"})
+                else:
+                    self.send_json({"error": "not found"}, 404)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self.send_json({"error": "invalid JSON"}, 400)
+                    return
+                if self.path != "/api/chat":
+                    self.send_json({"error": "not found"}, 404)
+                    return
+                with server.lock:
+                    server.requests += 1
+
+                start = time.perf_counter()
+                content, eval_count, prompt_eval_count = server.answer(request)
+                generation = eval_count / server.tokens_per_second if server.tokens_per_second else 0.0
+                time.sleep(server.latency)
+                if not request.get("stream"):
+                    time.sleep(generation)
+                message = {"role": "assistant", "content": content}
+                final = {
+                    "model": request.get("model", server.model),
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "done": True,
+                    "total_duration": int((time.perf_counter() - start) * 1e9),
+                    "prompt_eval_count": prompt_eval_count,
+                    "prompt_eval_duration": int(server.latency * 1e9),
+                    "eval_count": eval_count,
+                    "eval_duration": int(generation * 1e9),
+                }
+                if request.get("stream"):
+                    self.send_stream(content, final, generation)
+                else:
+                    self.send_json({**final, "message": message})
+
+            def send_stream(self, content: str, final: Dict, generation: float):
+                """Send the answer line by line as newline-delimited JSON chunks, paced at the token rate."""
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                chunks = [
+                    {"model": final["model"], "created_at": final["created_at"], "done": False,
+                     "message": {"role": "assistant", "content": piece}}
+                    for piece in content.splitlines(keepends=True)
+                ]
+                chunks.append({**final, "message": {"role": "assistant", "content": ""}})
+                try:
+                    for chunk in chunks:
+                        # Longer lines take longer to generate
+                        time.sleep(generation * len(chunk["message"]["content"]) / max(len(content), 1))
+                        data = json.dumps(chunk).encode("utf-8") + b"\n"
+                        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except OSError:
+                    # The client stopped reading early, possibly right before the terminator
+                    self.close_connection = True
+                    with server.lock:
+                        server.streams_closed += 1
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Generation rate, 0 for instant")
+    parser.add_argument("--chatter-tokens", type=int, default=0, help="Explanation tokens after each comment")
+    args = parser.parse_args()
+
+    server = MockOllamaServer(
+        args.host, args.port, args.latency, args.tokens_per_second, chatter_tokens=args.chatter_tokens
+    )
+    print(f"Mock Ollama listening on http://{args.host}:{server.port}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""End-to-end throughput benchmark of JavaDocAI against the mock Ollama server.
+
+Generates a synthetic repository, documents it through the configured engine
+and reports files/sec, signatures/sec, request latency percentiles, peak RSS
+and the time spent parsing, waiting on the LLM and writing. Results are
+written to a JSON file to track regressions.
+
+Usage:
+    python -m benchmarks.run_benchmark [--files 200] [--methods 10] [--latency 0.05]
+        [--engine threads] [--prompt-mode single] [--endpoints 1] [--weight 4] [--workers 4]
+        [--chatter-tokens 0] [--no-stream] [--output benchmark-results.json]
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.mock_ollama import MockOllamaServer
+from benchmarks.synthetic_repo import generate_repository
+from src.config import CONFIG_PATH, config
+from src.logger import log
+from src.metrics import metrics
+from src.utils import load_messages
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def peak_rss_mb() -> Optional[float]:
+    """Return the peak resident set size of the process in MiB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_benchmark(
+    repo_dir: Path,
+    servers: List[MockOllamaServer],
+    engine: str = "threads",
+    prompt_mode: str = "single",
+    use_cache: bool = False,
+    weight: int = 4,
+    workers: Optional[int] = None,
+    stream: bool = True
+) -> Dict:
+    """
+    Document a repository with JavaDocAI against running mock servers.
+
+    Args:
+        repo_dir (Path): Repository to document (modified in place).
+        servers (List[MockOllamaServer]): Running mock Ollama servers, used as ``ollama.endpoints``.
+        engine (str): "threads" or "async".
+        prompt_mode (str): "single" or "batched".
+        use_cache (bool): Keep the persistent Javadoc cache enabled.
+        weight (int): Concurrent requests per endpoint.
+        workers (Optional[int]): Worker threads (threads engine) or in-flight requests (async engine),
+            defaults to the configured values.
+        stream (bool): Stream answers and stop them once their Javadoc is complete.
+
+    Returns:
+        Dict: Raw measurements of the run, with the metrics collected during it.
+    """
+    from src.java_doc_ai import JavaDocAI
+    from src.async_pipeline import AsyncPipeline
+
+    config["ollama"]["endpoints"] = [
+        {"host": f"http://127.0.0.1:{server.port}", "weight": weight} for server in servers
+    ]
+    config["ollama"]["stream"] = stream
+    config["processing"]["engine"] = engine
+    if workers:
+        config["processing"]["max_concurrent_tasks"] = workers
+        config["processing"]["max_inflight_requests"] = workers
+    config["processing"]["prompt_mode"] = prompt_mode
+    config.setdefault("cache", {})["enabled"] = use_cache
+    config.setdefault("incremental", {})["enabled"] = False
+
+    ai = JavaDocAI(repo_dir, messages=load_messages("en", CONFIG_PATH))
+    metrics.reset()
+
+    start = time.perf_counter()
+    if engine == "async":
+        AsyncPipeline(ai).run()
+    else:
+        ai.process_files()
+    elapsed = time.perf_counter() - start
+
+    return {"elapsed": elapsed, "metrics": metrics.to_json()}
+
+def report(
+    measurements: Dict, files: int, signatures: int, servers: List[MockOllamaServer], settings: Dict
+) -> Dict:
+    """Turn raw measurements into the JSON report."""
+    elapsed = measurements["elapsed"]
+    counters = measurements["metrics"]["counters"]
+    histograms = measurements["metrics"]["histograms"]
+    stage = lambda name: histograms.get(name, {"count": 0, "sum": 0.0})
+    return {
+        "settings": settings,
+        "files": files,
+        "signatures": signatures,
+        "requests": sum(server.requests for server in servers),
+        "requests_per_endpoint": [server.requests for server in servers],
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_second": round(files / elapsed, 2),
+        "signatures_per_second": round(signatures / elapsed, 2),
+        # Estimated from the histogram buckets
+        "latency_seconds": {
+            name: round(value, 4) if value is not None else None
+            for name, value in ((q, stage("request_seconds").get(q)) for q in ("p50", "p95", "p99"))
+        },
+        # Summed over all workers, so stages running in parallel can exceed the elapsed time
+        "stage_seconds": {
+            "parse": round(stage("parse_seconds")["sum"], 3),
+            "llm": round(stage("request_seconds")["sum"], 3),
+            "write": round(stage("write_seconds")["sum"], 3),
+        },
+        "tokens": {
+            "prompt": counters.get("prompt_tokens_total", 0),
+            "generated": counters.get("generated_tokens_total", 0),
+        },
+        "streams_stopped": counters.get("streams_stopped_total", 0),
+        # Streams the mock server saw closed before their end (fast answers may be sent whole first)
+        "streams_closed": sum(server.streams_closed for server in servers),
+        "peak_rss_mb": round(peak_rss_mb(), 1) if resource is not None else None,
+        "metrics": measurements["metrics"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--classes", type=int, default=2, help="Top-level classes per file")
+    parser.add_argument("--methods", type=int, default=10, help="Methods per class")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Mock generation rate, 0 for instant")
+    parser.add_argument("--chatter-tokens", type=int, default=0, help="Mock explanation tokens after each comment")
+    parser.add_argument("--no-stream", dest="stream", action="store_false", help="Wait for whole answers")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads")
+    parser.add_argument("--prompt-mode", choices=["single", "batched"], default="single")
+    parser.add_argument("--endpoints", type=int, default=1, help="Mock servers to balance requests over")
+    parser.add_argument("--weight", type=int, default=4, help="Concurrent requests per endpoint")
+    parser.add_argument("--workers", type=int, help="Worker threads or in-flight requests (default: config)")
+    parser.add_argument("--cache", action="store_true", help="Keep the Javadoc cache enabled")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    args = parser.parse_args()
+
+    log.remove()
+    log.add(sys.stderr, level=args.log_level)
+
+    servers = [
+        MockOllamaServer(
+            latency=args.latency, tokens_per_second=args.tokens_per_second, chatter_tokens=args.chatter_tokens
+        ).start()
+        for _ in range(args.endpoints)
+    ]
+    try:
+        with tempfile.TemporaryDirectory(prefix="javadocai-bench-") as directory:
+            repo_dir = Path(directory)
+            signatures = generate_repository(repo_dir, args.files, args.classes, args.methods)
+            measurements = run_benchmark(
+                repo_dir, servers, args.engine, args.prompt_mode, args.cache, args.weight, args.workers, args.stream
+            )
+            results = report(measurements, args.files, signatures, servers, {
+                key: value for key, value in vars(args).items() if key != "output"
+            })
+    finally:
+        for server in servers:
+            server.stop()
+
+    args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
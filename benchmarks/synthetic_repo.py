@@ -0,0 +1,73 @@
+"""Generator of synthetic Java repositories for benchmarks.
+
+Usage:
+    python -m benchmarks.synthetic_repo OUTPUT_DIR [--files 100] [--classes 2] [--methods 10]
+"""
+import random
+import argparse
+from pathlib import Path
+
+TYPES = ["int", "long", "String", "boolean", "double", "List<String>"]
+
+def generate_class(name: str, methods: int, rng: random.Random, public: bool) -> str:
+    """Generate the source of an undocumented class with the given number of methods."""
+    lines = [f"{'public ' if public else ''}class {name} {{", "", "    private int state;", ""]
+    for index in range(methods):
+        return_type = rng.choice(TYPES)
+        parameters = ", ".join(f"{rng.choice(TYPES)} arg{p}" for p in range(rng.randint(0, 3)))
+        lines.append(f"    public {return_type} method{index}({parameters}) {{")
+        if return_type in ("int", "long", "double"):
+            lines.append(f"        return state + {index};")
+        elif return_type == "boolean":
+            lines.append(f"        return state > {index};")
+        elif return_type == "String":
+            lines.append(f"        return \"{name}.method{index}\";")
+        else:
+            lines.append("        return new ArrayList<>();")
+        lines.append("    }")
+        lines.append("")
+    lines.append("}")
+    return "\n".join(lines)
+
+def generate_repository(root: Path, files: int, classes: int, methods: int, seed: int = 0) -> int:
+    """
+    Write a synthetic repository of undocumented Java files.
+
+    Args:
+        root (Path): Directory to create the repository in.
+        files (int): Number of Java files, spread over packages of 50 files.
+        classes (int): Top-level classes per file (the first one is public).
+        methods (int): Methods per class.
+        seed (int): Seed of the random signatures, so runs are comparable.
+
+    Returns:
+        int: Number of documentable signatures (classes and methods) generated.
+    """
+    rng = random.Random(seed)
+    for index in range(files):
+        package = f"bench.pkg{index // 50}"
+        directory = root / "src" / "main" / "java" / Path(*package.split("."))
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"Generated{index}"
+        bodies = [
+            generate_class(name if number == 0 else f"{name}Helper{number}", methods, rng, number == 0)
+            for number in range(classes)
+        ]
+        code = f"package {package};\n\nimport java.util.*;\n\n" + "\n\n".join(bodies) + "\n"
+        (directory / f"{name}.java").write_text(code, encoding="utf-8")
+    return files * classes * (methods + 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--classes", type=int, default=2)
+    parser.add_argument("--methods", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    signatures = generate_repository(args.output, args.files, args.classes, args.methods, args.seed)
+    print(f"Generated {args.files} files with {signatures} signatures in {args.output}")
+
+if __name__ == "__main__":
+    main()
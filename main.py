@@ -1,13 +1,59 @@
 import argparse
 from pathlib import Path
 
-from src.java_doc_ai import JavaDocAI
 from src.config import CONFIG_PATH, LANGUAGE
 from src.utils import load_messages, get_repository_directory
-from src.logger import log
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(description="Add AI generated Javadoc comments to a Java repository.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=None,
+        help="Only process files and members that are new or changed since the last run"
+    )
+    parser.add_argument(
+        "--git-range",
+        help="Only process files changed in this git revision range (e.g. HEAD~1 or main...feature)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Write the changes as a unified diff to output.patch_file instead of modifying files"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the files and reuse the Javadocs completed by an interrupted run"
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Only request the members whose Javadoc failed in the previous run"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="MINUTES",
+        help="Stop sending requests after this many minutes, continue later with --resume"
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        metavar="TOKENS",
+        help="Stop sending requests once this many tokens are spent, continue later with --resume"
+    )
+    return parser.parse_args()
 
 def main():
     """Main function to coordinate the Javadoc addition process."""
+    # Imported here: spawned parse workers import this module again, and only need the extractor
+    from src.java_doc_ai import JavaDocAI
+    from src.logger import log
+
+    args = parse_arguments()
+
     # Load language messages
     try:
         messages = load_messages(LANGUAGE, CONFIG_PATH)
@@ -23,7 +69,17 @@ def main():
     log.info(messages["logs"]["repo_dir_set"].format(repo_dir=repo_dir))
 
     # Initialize JavaDocAI and run
-    ai = JavaDocAI(repo_dir, messages=messages)
+    ai = JavaDocAI(
+        repo_dir,
+        messages=messages,
+        incremental=args.incremental,
+        git_range=args.git_range,
+        output_mode="patch" if args.dry_run else None,
+        resume=args.resume,
+        retry_failed=args.retry_failed,
+        deadline=args.deadline,
+        token_budget=args.token_budget
+    )
     ai.run()
 
 if __name__ == "__main__":
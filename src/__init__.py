@@ -1,2 +1,8 @@
-from .java_doc_ai import JavaDocAI
 from .utils import load_messages
+
+def __getattr__(name):
+    # Imported on first use, so processes that only need a submodule (parse workers) stay light
+    if name == "JavaDocAI":
+        from .java_doc_ai import JavaDocAI
+        return JavaDocAI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,358 @@
+import time
+import asyncio
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Mapping, Optional, Tuple
+
+from ollama import AsyncClient, ResponseError
+from tqdm import tqdm
+
+from src.config import config
+from src.logger import log, MEMBER_LEVEL
+from src.metrics import metrics
+from src.streaming import StreamedAnswer
+from src.members import Member
+from src.parse_pool import ParsePool, parse_file
+from src.scheduler import PlannedFile, request_passes
+
+if TYPE_CHECKING:
+    from src.java_doc_ai import JavaDocAI
+
+class AsyncPipeline:
+    """Asyncio engine that documents a repository on the Ollama async client.
+
+    Discovery, parsing, prompt dispatch and file writing run as separate stages
+    connected by bounded queues. The number of in-flight LLM requests and the
+    number of files open at once are bounded by two independent semaphores, and
+    the signatures of one file are sent concurrently.
+    """
+
+    def __init__(self, ai: "JavaDocAI"):
+        """Create the pipeline around a configured JavaDocAI instance."""
+        self.ai = ai
+        self.max_inflight_requests = config["processing"].get("max_inflight_requests", 8)
+        self.max_open_files = config["processing"].get("max_open_files", 16)
+        self.request_slots: Optional[asyncio.Semaphore] = None
+        self.file_slots: Optional[asyncio.Semaphore] = None
+        self.parse_pool: Optional[ParsePool] = None
+
+    @property
+    def client(self) -> AsyncClient:
+        """Async client of the default endpoint."""
+        return self.ai.endpoints.endpoints[0].async_client
+
+    @client.setter
+    def client(self, client: AsyncClient):
+        self.ai.endpoints.endpoints[0].async_client = client
+
+    def run(self):
+        """Run the pipeline to completion."""
+        asyncio.run(self.process_files())
+
+    async def process_files(self):
+        """Process all Java files through the discovery, parse, dispatch and write stages."""
+        self.request_slots = asyncio.Semaphore(self.max_inflight_requests)
+        self.file_slots = asyncio.Semaphore(self.max_open_files)
+        path_queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_open_files)
+        plan_queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_open_files)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_open_files)
+        progress = tqdm(desc="Files", unit="file")
+        if self.ai.parse_processes:
+            self.parse_pool = ParsePool(self.ai.parse_processes)
+        await asyncio.to_thread(self.ai.build_symbol_index)
+        self.ai.budget.start()
+
+        try:
+            planned: List[PlannedFile] = []
+            if self.ai.priority_order:
+                # Members are requested in tier passes once every file is planned
+                dispatchers = [asyncio.create_task(self.plan_stage(plan_queue, planned, progress))]
+            else:
+                dispatchers = [
+                    asyncio.create_task(self.dispatch_stage(plan_queue, write_queue))
+                    for _ in range(self.max_open_files)
+                ]
+            writer = asyncio.create_task(self.write_stage(write_queue, progress))
+            # One parse task per worker process, a single one parsing in threads otherwise
+            parsers = [
+                asyncio.create_task(self.parse_stage(path_queue, plan_queue, progress))
+                for _ in range(self.ai.parse_processes or 1)
+            ]
+
+            await self.discovery_stage(path_queue, progress)
+            for _ in parsers:
+                await path_queue.put(None)
+            await asyncio.gather(*parsers)
+            for _ in dispatchers:
+                await plan_queue.put(None)
+            await asyncio.gather(*dispatchers)
+            for requests in request_passes(planned):
+                await asyncio.gather(*(self.document_group(*request, progress) for request in requests))
+            await write_queue.put(None)
+            await writer
+
+            self.ai.log_run_summary()
+        except Exception as e:
+            log.error(f"Error in async file processing: {e}")
+            raise
+        finally:
+            progress.close()
+            if self.parse_pool:
+                self.parse_pool.close()
+            self.ai.finish_run()
+
+    async def discovery_stage(self, path_queue: asyncio.Queue, progress: tqdm):
+        """Stream the Java files of the repository to the parse stage as they are found."""
+        loop = asyncio.get_running_loop()
+
+        def walk() -> int:
+            count = 0
+            for file_path in self.ai.order_files(self.ai.discover_files()):
+                if self.ai.budget.exhausted():
+                    # Files not queued yet are left for the next run
+                    break
+                # Blocks the walking thread while the parse stage is behind
+                asyncio.run_coroutine_threadsafe(path_queue.put(file_path), loop).result()
+                count += 1
+            return count
+
+        file_count = await asyncio.to_thread(walk)
+        log.info(f"Found {file_count} Java files to process")
+        progress.total = file_count
+        progress.refresh()
+
+    async def parse_stage(self, path_queue: asyncio.Queue, plan_queue: asyncio.Queue, progress: tqdm):
+        """Read and parse files, passing the members that need a Javadoc to the dispatch stage."""
+        loop = asyncio.get_running_loop()
+        while (file_path := await path_queue.get()) is not None:
+            await self.file_slots.acquire()
+            try:
+                if self.parse_pool:
+                    original_code = None
+                    if not await asyncio.to_thread(self.ai.is_unchanged, file_path):
+                        _, original_code, members = await loop.run_in_executor(
+                            self.parse_pool.executor, parse_file, file_path
+                        )
+                    if original_code is not None and self.ai.is_unchanged(file_path, original_code):
+                        original_code = None
+                    pending = None if original_code is None else self.ai.plan_members(members, file_path)
+                else:
+                    original_code = await asyncio.to_thread(self.ai.read_java_file, file_path)
+                    pending = None
+                    if original_code is not None:
+                        pending = await asyncio.to_thread(self.ai.plan_file, original_code, file_path)
+            except Exception as e:
+                log.error(f"Error parsing file: {file_path} - {e}")
+                original_code = None
+
+            if original_code is None:
+                self.file_slots.release()
+                progress.update(1)
+                continue
+            await plan_queue.put((file_path, original_code, pending))
+
+    async def dispatch_stage(self, plan_queue: asyncio.Queue, write_queue: asyncio.Queue):
+        """Request the Javadocs of each planned file, all members of a file concurrently."""
+        while (item := await plan_queue.get()) is not None:
+            file_path, original_code, pending = item
+            updated_code = None
+            if pending is not None:
+                try:
+                    insertions = await self.collect_javadocs(original_code, pending, file_path)
+                    updated_code = self.ai.apply_javadocs(original_code, insertions)
+                except Exception as e:
+                    log.error(f"Error processing file: {file_path} - {e}")
+            await write_queue.put((file_path, original_code, updated_code))
+
+    async def plan_stage(self, plan_queue: asyncio.Queue, planned: List[PlannedFile], progress: tqdm):
+        """
+        Collect the planned files of the "priority" order. They wait for their request
+        passes outside the open file limit, files without members to request are written
+        right away.
+        """
+        while (item := await plan_queue.get()) is not None:
+            self.file_slots.release()
+            planned_file = PlannedFile(*item, self.ai.repo_dir)
+            if planned_file.remaining:
+                planned.append(planned_file)
+            else:
+                await self.finish_planned(planned_file, progress)
+
+    async def document_group(self, planned: PlannedFile, members: List[Member], progress: tqdm):
+        """Request the Javadocs of one group of members of a planned file, writing the file after its last group."""
+        try:
+            insertions = await self.collect_javadocs(planned.original_code, members, planned.file_path)
+        except Exception as e:
+            log.error(f"Error processing file: {planned.file_path} - {e}")
+            insertions = None
+        if planned.settle(insertions):
+            await self.finish_planned(planned, progress)
+
+    async def finish_planned(self, planned: PlannedFile, progress: tqdm):
+        """Merge the Javadocs of a planned file and write it."""
+        try:
+            updated_code = None if planned.failed else self.ai.apply_javadocs(planned.original_code, planned.insertions)
+            await asyncio.to_thread(self.ai.finish_file, planned.file_path, planned.original_code, updated_code)
+        except Exception as e:
+            log.error(f"Error writing file: {planned.file_path} - {e}")
+        finally:
+            progress.update(1)
+
+    async def write_stage(self, write_queue: asyncio.Queue, progress: tqdm):
+        """Write updated files from a single task so LLM requests never wait on disk I/O."""
+        while (item := await write_queue.get()) is not None:
+            file_path, original_code, updated_code = item
+            try:
+                await asyncio.to_thread(self.ai.finish_file, file_path, original_code, updated_code)
+            except Exception as e:
+                log.error(f"Error writing file: {file_path} - {e}")
+            finally:
+                self.file_slots.release()
+                progress.update(1)
+
+    async def collect_javadocs(
+        self, original_code: str, pending: List[Member], file_path: Path
+    ) -> List[Tuple[Member, str]]:
+        """Asynchronous counterpart of JavaDocAI.collect_javadocs."""
+        journaled, pending = self.ai.split_journaled(file_path, pending)
+        inherited, pending = self.ai.split_inherited(file_path, pending)
+        templated, pending = self.ai.split_templated(file_path, original_code, pending)
+        comments = await self.get_javadocs(pending, file_path)
+        return self.ai.settle_members(file_path, journaled + inherited + templated, pending, comments)
+
+    async def get_javadocs(self, pending: List[Member], file_path: Optional[Path] = None) -> List[Optional[str]]:
+        """Asynchronous counterpart of JavaDocAI.get_javadocs, all requests of a file run concurrently."""
+        if self.ai.prompt_mode != "batched":
+            return await asyncio.gather(
+                *(self.get_javadoc_for_signature(m.signature, m.kind, m.class_signature, file_path) for m in pending)
+            )
+
+        comments = [self.ai.get_cached_javadoc(m.signature, m.kind) for m in pending]
+        batches = self.ai.plan_batches(pending, [i for i, c in enumerate(comments) if c is None], file_path)
+        requests = (self.request_batch(pending, batch, file_path) for batch in batches)
+        for batch, results in zip(batches, await asyncio.gather(*requests)):
+            for index, comment in zip(batch, results):
+                comments[index] = comment
+        return comments
+
+    async def request_batch(
+        self, pending: List[Member], batch: List[int], file_path: Optional[Path] = None
+    ) -> List[Optional[str]]:
+        """Request the Javadocs of one batch, falling back to single requests for malformed members."""
+        members = [pending[i] for i in batch]
+        results = {}
+        if len(members) > 1 and not self.ai.budget.exhausted():
+            response = await self.get_ai_single_response(
+                self.ai.build_batch_prompt(members, file_path), json_format=True, max_tokens=self.ai.batch_max_tokens(members)
+            )
+            results = self.ai.parse_batch_response(response, members)
+        missing = [i for i in range(len(members)) if i not in results]
+        fallbacks = await asyncio.gather(
+            *(self.request_javadoc(members[i].signature, members[i].kind, members[i].class_signature, file_path)
+              for i in missing)
+        )
+        results.update(zip(missing, fallbacks))
+        return [results[i] for i in range(len(members))]
+
+    async def get_javadoc_for_signature(
+        self, signature: str, signature_type: str, class_signature: str = "", file_path: Optional[Path] = None
+    ) -> Optional[str]:
+        """Asynchronous counterpart of JavaDocAI.get_javadoc_for_signature."""
+        cached = self.ai.get_cached_javadoc(signature, signature_type)
+        if cached is not None:
+            log.log(MEMBER_LEVEL, "Cache hit for {}: {}", signature_type, signature)
+            return cached
+        return await self.request_javadoc(signature, signature_type, class_signature, file_path)
+
+    async def request_javadoc(
+        self, signature: str, signature_type: str, class_signature: str = "", file_path: Optional[Path] = None
+    ) -> Optional[str]:
+        """Asynchronous counterpart of JavaDocAI.request_javadoc."""
+        if self.ai.budget.exhausted():
+            self.ai.defer_member(signature, signature_type)
+            return None
+        prompt = self.ai.build_prompt(signature, signature_type, class_signature, file_path)
+        try:
+            for attempt in range(self.ai.max_retries + 1):
+                if attempt:
+                    await asyncio.sleep(self.ai.retry_backoff(attempt))
+                response = await self.get_ai_single_response(self.ai.retry_prompt(prompt, attempt))
+                if response is None:
+                    if self.ai.budget.exhausted():
+                        self.ai.defer_member(signature, signature_type)
+                    else:
+                        self.ai.record_failure(signature, signature_type, "request_failed")
+                    return None
+                javadoc = self.ai.validate_javadoc(response, signature, signature_type)
+                if javadoc:
+                    if self.ai.cache:
+                        self.ai.cache.put(self.ai.member_cache_key(signature, signature_type), javadoc)
+                    return javadoc
+            self.ai.record_failure(signature, signature_type, "malformed")
+            return None
+        except Exception as e:
+            log.error(f"Error getting Javadoc for signature: {e}")
+            self.ai.record_failure(signature, signature_type, "error")
+            return None
+
+    async def get_ai_single_response(
+        self, prompt: str, json_format: bool = False, max_tokens: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Send a prompt through the async client of the least-loaded endpoint, bounded by the
+        in-flight request limit.
+        """
+        log.log(MEMBER_LEVEL, "Sending prompt to LLM: {}", prompt)
+        endpoints = self.ai.endpoints
+        for _ in range(self.ai.max_retries + 1):
+            queued = time.perf_counter()
+            async with self.request_slots:
+                # Requests of a file start together, the budget may run out while they wait for a slot
+                if self.ai.budget.exhausted():
+                    return None
+                endpoint = endpoints.try_acquire() or await asyncio.to_thread(endpoints.acquire)
+                try:
+                    health = endpoint.health
+                    # Recovery blocks, so it only leaves the event loop once a request has failed
+                    if not health.healthy and not await asyncio.to_thread(health.acquire, endpoints.all_down()):
+                        if endpoints.all_down():
+                            log.error("Ollama server is not running")
+                            return None
+                        continue
+                    metrics.inc("prompts_total")
+                    start = time.perf_counter()
+                    metrics.observe("request_queue_seconds", start - queued)
+                    request = self.ai.build_chat_request(prompt, json_format, max_tokens)
+                    try:
+                        response = await endpoint.async_client.chat(**request)
+                        if request.get("stream"):
+                            response = await self.read_stream(response, self.ai.estimate_request_tokens(request))
+                    except ResponseError as e:
+                        health.record_success()
+                        metrics.inc("request_failures_total")
+                        log.error(f"Ollama API error: {e}")
+                        return None
+                    except Exception as e:
+                        health.record_failure(e)
+                        metrics.inc("request_failures_total")
+                        continue
+                finally:
+                    endpoints.release(endpoint)
+            health.record_success()
+            metrics.record_chat(response, time.perf_counter() - start)
+            self.ai.budget.charge(response)
+            return self.ai.parse_chat_response(response)
+
+        log.error("Error getting AI response: retries exhausted")
+        return None
+
+    @staticmethod
+    async def read_stream(chunks: AsyncIterator[Mapping], prompt_tokens: int = 0) -> Dict:
+        """Read a streamed answer until its Javadoc block is complete, see JavaDocAI.read_stream."""
+        answer = StreamedAnswer(prompt_tokens)
+        async for chunk in chunks:
+            if answer.add(chunk):
+                break
+        if answer.stopped_early:
+            await chunks.aclose()
+            metrics.inc("streams_stopped_total")
+        return answer.response()
@@ -0,0 +1,91 @@
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+
+from src.logger import log
+
+class JavadocCache:
+    """Persistent content-addressed cache of generated Javadoc comments.
+
+    Entries are stored in SQLite and evicted in least-recently-used order once
+    the total size of the cached comments exceeds the configured limit.
+    """
+
+    def __init__(self, path: Path, max_size_bytes: int):
+        """Open (or create) the cache database at the given path."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS javadocs ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS javadocs_last_access ON javadocs (last_access)")
+        self.total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM javadocs").fetchone()[0]
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Build a cache key from the hash of all inputs that influence a response."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached comment for a key, or None on a miss."""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM javadocs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.connection.execute("UPDATE javadocs SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def peek(self, key: str) -> Optional[str]:
+        """Return the cached comment for a key without counting a hit or miss or refreshing the entry."""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM javadocs WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def put(self, key: str, value: str):
+        """Store a comment and evict the least recently used entries if needed."""
+        size = len(value.encode("utf-8"))
+        with self.lock:
+            previous = self.connection.execute("SELECT size FROM javadocs WHERE key = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO javadocs (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time())
+            )
+            self.total_size += size - (previous[0] if previous else 0)
+            if self.total_size > self.max_size_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete the oldest entries until the cache fits its size limit."""
+        # Walk the last_access index lazily: only the evicted rows are read, not the whole table
+        cursor = self.connection.execute("SELECT key, size FROM javadocs ORDER BY last_access")
+        evicted = []
+        while self.total_size > self.max_size_bytes:
+            row = cursor.fetchone()
+            if row is None:
+                break
+            evicted.append((row[0],))
+            self.total_size -= row[1]
+        cursor.close()
+        self.connection.executemany("DELETE FROM javadocs WHERE key = ?", evicted)
+        log.debug(f"Evicted {len(evicted)} entries from Javadoc cache")
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self.lock:
+            self.connection.close()
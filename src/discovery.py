@@ -0,0 +1,165 @@
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.config import config
+
+class IgnoreRule:
+    """A single pattern of a .gitignore file."""
+
+    __slots__ = ("base", "pattern", "negated", "dir_only", "anchored")
+
+    def __init__(self, base: str, line: str):
+        """Parse a .gitignore line found in the directory ``base`` (relative to the root)."""
+        self.base = base
+        self.negated = line.startswith("!")
+        if self.negated:
+            line = line[1:]
+        self.dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        self.anchored = "/" in line
+        self.pattern = line.lstrip("/")
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        """Check whether a path relative to the root is matched by this rule."""
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        if self.anchored:
+            return glob_match(rel_path, self.pattern)
+        return fnmatch(rel_path.rsplit("/", 1)[-1], self.pattern)
+
+def glob_match(rel_path: str, pattern: str) -> bool:
+    """Match a relative POSIX path against a glob where a leading ``**/`` may match nothing."""
+    if fnmatch(rel_path, pattern):
+        return True
+    return pattern.startswith("**/") and fnmatch(rel_path, pattern[3:])
+
+def read_gitignore(directory: Path, base: str) -> List[IgnoreRule]:
+    """Read the rules of the .gitignore file of a directory, if there is one."""
+    try:
+        with (directory / ".gitignore").open("r", encoding="utf-8") as file:
+            lines = file.read().splitlines()
+    except OSError:
+        return []
+    return [IgnoreRule(base, line.strip()) for line in lines if line.strip() and not line.startswith("#")]
+
+class JavaFileDiscovery:
+    """Streaming discovery of the Java files of a repository.
+
+    Directories are walked lazily and pruned before they are entered when they
+    are in the exclude list, ignored by a .gitignore file or matched by an
+    exclude glob, so generated source trees are never walked.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        exclude_dirs: Iterable[str] = (),
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+        respect_gitignore: bool = True
+    ):
+        """
+        Args:
+            root (Path): Repository root.
+            exclude_dirs (Iterable[str]): Directory names never entered.
+            include (Iterable[str]): Globs relative to the root, files must match one of them if any.
+            exclude (Iterable[str]): Globs relative to the root of files and directories to skip.
+            respect_gitignore (bool): Skip paths ignored by .gitignore files.
+        """
+        self.root = root
+        self.exclude_dirs = set(exclude_dirs)
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.respect_gitignore = respect_gitignore
+        # Rules of the .gitignore files read by accepts, by directory relative to the root
+        self.gitignores: Dict[str, List[IgnoreRule]] = {}
+
+    @classmethod
+    def from_config(cls, root: Path) -> "JavaFileDiscovery":
+        """Create a discovery configured by the ``discovery`` settings."""
+        settings = config.get("discovery", {})
+        return cls(
+            root,
+            exclude_dirs=settings.get("exclude_dirs") or (),
+            include=settings.get("include") or (),
+            exclude=settings.get("exclude") or (),
+            respect_gitignore=settings.get("respect_gitignore", True)
+        )
+
+    def __iter__(self) -> Iterator[Path]:
+        """Yield Java files as they are found."""
+        stack: List[Tuple[Path, str, List[IgnoreRule]]] = [(self.root, "", [])]
+        while stack:
+            directory, rel_dir, rules = stack.pop()
+            if self.respect_gitignore:
+                rules = rules + read_gitignore(directory, rel_dir)
+            try:
+                entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+            except OSError:
+                continue
+            subdirectories = []
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if entry.name not in self.exclude_dirs and not self.is_excluded(rel_path, True, rules):
+                        subdirectories.append((Path(entry.path), rel_path, rules))
+                elif entry.name.endswith(".java") and self.accepts_relative(rel_path, rules):
+                    yield Path(entry.path)
+            stack.extend(reversed(subdirectories))
+
+    def first(self) -> Optional[Path]:
+        """Return the first Java file found, without walking the rest of the tree."""
+        return next(iter(self), None)
+
+    def accepts(self, file_path: Path) -> bool:
+        """
+        Check a single file like the walk would: its directories against the exclude list,
+        the exclude globs and the .gitignore rules, then the file itself.
+        """
+        try:
+            rel_path = file_path.relative_to(self.root).as_posix()
+        except ValueError:
+            return False
+        directory, rel_dir, rules = self.root, "", []
+        for name in rel_path.split("/")[:-1]:
+            rules = rules + self.directory_rules(directory, rel_dir)
+            directory, rel_dir = directory / name, f"{rel_dir}/{name}" if rel_dir else name
+            if name in self.exclude_dirs or self.is_excluded(rel_dir, True, rules):
+                return False
+        return self.accepts_relative(rel_path, rules + self.directory_rules(directory, rel_dir))
+
+    def directory_rules(self, directory: Path, rel_dir: str) -> List[IgnoreRule]:
+        """Return the .gitignore rules of a directory, read once per discovery."""
+        if not self.respect_gitignore:
+            return []
+        rules = self.gitignores.get(rel_dir)
+        if rules is None:
+            rules = self.gitignores[rel_dir] = read_gitignore(directory, rel_dir)
+        return rules
+
+    def accepts_relative(self, rel_path: str, rules: List[IgnoreRule]) -> bool:
+        """Check a file path relative to the root against the globs and ignore rules."""
+        if self.include and not any(glob_match(rel_path, pattern) for pattern in self.include):
+            return False
+        return not self.is_excluded(rel_path, False, rules)
+
+    def is_excluded(self, rel_path: str, is_dir: bool, rules: List[IgnoreRule]) -> bool:
+        """Check a path against the exclude globs and the .gitignore rules (last match wins)."""
+        candidates = (rel_path, rel_path + "/") if is_dir else (rel_path,)
+        if any(glob_match(path, pattern) for pattern in self.exclude for path in candidates):
+            return True
+        ignored = False
+        for rule in rules:
+            if rule.matches(rel_path, is_dir):
+                ignored = not rule.negated
+        return ignored
@@ -0,0 +1,149 @@
+import time
+import threading
+from typing import Callable, List, Optional
+
+from ollama import AsyncClient, Client
+
+from src.config import config
+from src.logger import log
+from src.health import OllamaHealthMonitor
+
+class Endpoint:
+    """An Ollama server requests are routed to.
+
+    Each endpoint keeps its own clients, so HTTP connections to it are pooled
+    and reused, and its own health monitor, so a failing node is drained
+    without affecting the others.
+    """
+
+    def __init__(self, host: str, weight: float, health_factory: Callable[["Endpoint"], OllamaHealthMonitor]):
+        """
+        Args:
+            host (str): Base URL of the server, e.g. ``http://gpu-1:11434``.
+            weight (float): Concurrent requests the endpoint accepts.
+            health_factory (Callable[[Endpoint], OllamaHealthMonitor]): Creates the health monitor of the endpoint.
+        """
+        self.host = host
+        self.weight = weight
+        self.client = Client(host=host)
+        self.async_client = AsyncClient(host=host)
+        self.in_flight = 0
+        self.health = health_factory(self)
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.host}, weight={self.weight:g})"
+
+    @property
+    def load(self) -> float:
+        """Requests in flight relative to the weight of the endpoint."""
+        return self.in_flight / self.weight
+
+    def is_running(self) -> bool:
+        """Check if the server answers."""
+        try:
+            self.client.list()
+            return True
+        except Exception as e:
+            log.error(f"Could not connect to Ollama endpoint {self.host}: {e}")
+            return False
+
+class EndpointPool:
+    """Least-loaded routing of requests over one or more Ollama endpoints.
+
+    Requests go to the healthy endpoint with the lowest load among those below
+    their weight. Endpoints whose circuit is open are drained, and receive a
+    single request (whose health check probes them) once their backoff is over.
+    """
+
+    def __init__(self, endpoints: List[Endpoint], configured: bool = False):
+        """
+        Args:
+            endpoints (List[Endpoint]): Endpoints to route to, the first one is the default.
+            configured (bool): Whether the endpoints come from ``ollama.endpoints`` rather than
+                being the local server.
+        """
+        self.endpoints = endpoints
+        self.configured = configured
+        self.condition = threading.Condition()
+
+    @classmethod
+    def from_config(
+        cls, local_health: Callable[[Endpoint], OllamaHealthMonitor], remote_health: Callable[[Endpoint], OllamaHealthMonitor]
+    ) -> "EndpointPool":
+        """
+        Create the pool of the ``ollama.endpoints`` setting, or of the local server if there is none.
+
+        Args:
+            local_health (Callable[[Endpoint], OllamaHealthMonitor]): Health monitor factory of the
+                local server, which may be restarted.
+            remote_health (Callable[[Endpoint], OllamaHealthMonitor]): Health monitor factory of
+                configured endpoints.
+        """
+        entries = config["ollama"].get("endpoints") or []
+        if not entries:
+            host = f'http://localhost:{config["ollama"]["server_port"]}'
+            # Concurrency is bounded by the workers alone
+            return cls([Endpoint(host, float("inf"), local_health)])
+        endpoints = [Endpoint(entry["host"], entry.get("weight", 1), remote_health) for entry in entries]
+        log.info(f"Balancing requests over {len(endpoints)} Ollama endpoints: {endpoints}")
+        return cls(endpoints, configured=True)
+
+    @property
+    def capacity(self) -> float:
+        """Sum of the weights of the endpoints."""
+        return sum(endpoint.weight for endpoint in self.endpoints)
+
+    def select(self) -> Optional[Endpoint]:
+        """Pick the endpoint for the next request, None if all are busy (call with the condition held)."""
+        now = time.monotonic()
+        candidates = []
+        for endpoint in self.endpoints:
+            if endpoint.health.healthy:
+                if endpoint.in_flight < endpoint.weight:
+                    candidates.append(endpoint)
+            elif endpoint.in_flight == 0 and now >= endpoint.health.open_until:
+                # Drained endpoint due for a probe, tried before the healthy ones so it recovers quickly
+                return endpoint
+        if candidates:
+            return min(candidates, key=lambda endpoint: endpoint.load)
+        if not any(endpoint.health.healthy for endpoint in self.endpoints):
+            # Every endpoint is down: wait on the one that reopens first, its health check decides
+            return min(self.endpoints, key=lambda endpoint: endpoint.health.open_until)
+        return None
+
+    def try_acquire(self) -> Optional[Endpoint]:
+        """Reserve a request slot on an endpoint without waiting, None if all are busy."""
+        with self.condition:
+            endpoint = self.select()
+            if endpoint is not None:
+                endpoint.in_flight += 1
+            return endpoint
+
+    def acquire(self) -> Endpoint:
+        """Reserve a request slot on the least-loaded available endpoint, waiting for one to free up."""
+        with self.condition:
+            while (endpoint := self.select()) is None:
+                # Circuits of drained endpoints reopen without a release, poll for them
+                self.condition.wait(timeout=1.0)
+            endpoint.in_flight += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint):
+        """Free the request slot reserved on an endpoint."""
+        with self.condition:
+            endpoint.in_flight -= 1
+            self.condition.notify()
+
+    def all_down(self) -> bool:
+        """Check whether no endpoint is usable."""
+        return not any(endpoint.health.healthy for endpoint in self.endpoints)
+
+    def check(self) -> bool:
+        """Probe every endpoint, draining those that do not answer. Returns True if any answers."""
+        reachable = False
+        for endpoint in self.endpoints:
+            if endpoint.is_running():
+                reachable = True
+            else:
+                endpoint.health.record_failure("endpoint unreachable at startup")
+        return reachable
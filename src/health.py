@@ -0,0 +1,113 @@
+import time
+import threading
+from typing import Callable
+
+from src.logger import log
+
+class OllamaHealthMonitor:
+    """Shared view of the Ollama server state, built from the outcome of real requests.
+
+    The server is only probed after a request failed. Failures open a circuit
+    breaker whose delay doubles on every consecutive failure, capped at
+    ``retry_delay``. Recovery (probing and restarting the server) is serialized
+    so concurrent failures trigger a single restart.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[], bool],
+        restart: Callable[[], bool],
+        max_retries: int,
+        retry_delay: float,
+        base_delay: float = 1.0,
+        name: str = "Ollama server"
+    ):
+        """
+        Args:
+            probe (Callable[[], bool]): Returns True if the server answers.
+            restart (Callable[[], bool]): Starts the server, returns True on success.
+            max_retries (int): Consecutive failures before requests fail fast.
+            retry_delay (float): Maximum backoff delay in seconds.
+            base_delay (float): Backoff delay after the first failure in seconds.
+            name (str): Server name used in log messages.
+        """
+        self.probe = probe
+        self.restart = restart
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.base_delay = base_delay
+        self.name = name
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.restart_attempted = False
+        self.state_lock = threading.Lock()
+        self.recovery_lock = threading.Lock()
+
+    def backoff(self, failures: int) -> float:
+        """Return the delay before the next attempt after a number of consecutive failures."""
+        return min(self.retry_delay, self.base_delay * 2 ** max(failures - 1, 0))
+
+    def record_success(self):
+        """Mark the server as healthy after a successful request."""
+        if self.healthy and not self.consecutive_failures:
+            return
+        with self.state_lock:
+            if not self.healthy:
+                log.info(f"{self.name} is reachable again")
+            self.healthy = True
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            self.restart_attempted = False
+
+    def record_failure(self, error: object = None):
+        """Open the circuit after a failed request."""
+        with self.state_lock:
+            if not self.healthy and time.monotonic() < self.open_until:
+                # Concurrent failures of the same outage count once
+                return
+            self.healthy = False
+            self.consecutive_failures += 1
+            self.open_until = time.monotonic() + self.backoff(self.consecutive_failures)
+            log.warning(f"Request to {self.name} failed ({self.consecutive_failures} in a row): {error}")
+
+    def acquire(self, wait: bool = True) -> bool:
+        """
+        Wait until requests may be sent to the server.
+
+        Returns immediately while the server is healthy. Otherwise one caller at a
+        time waits for the backoff, probes the server and restarts it at most once
+        per outage, while the others wait for its outcome.
+
+        Args:
+            wait (bool): Keep probing until the server recovers or the retries run out. Without
+                waiting a single due probe is made, so callers can move on to another server.
+
+        Returns:
+            bool: True if the server is usable, False if it stays unreachable.
+        """
+        if self.healthy:
+            return True
+
+        with self.recovery_lock:
+            while not self.healthy:
+                if self.consecutive_failures > self.max_retries and time.monotonic() < self.open_until:
+                    # Circuit open after too many failures: fail fast until the next probe is due
+                    return False
+                delay = self.open_until - time.monotonic()
+                if delay > 0:
+                    if not wait:
+                        return False
+                    time.sleep(delay)
+                if self.probe():
+                    self.record_success()
+                    break
+                if not self.restart_attempted:
+                    self.restart_attempted = True
+                    if self.restart():
+                        self.record_success()
+                        break
+                self.record_failure("health probe failed")
+                if not wait or self.consecutive_failures > self.max_retries:
+                    return False
+            return True
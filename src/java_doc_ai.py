@@ -1,25 +1,91 @@
 import os
+import re
+import json
 import time
 import socket
 import shutil
 import subprocess
+import queue
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, List, Dict, Mapping, Optional, Set, Tuple
 
-from tree_sitter import Language, Parser
+from tree_sitter import Parser
 import tree_sitter_java as java
 from tqdm import tqdm
 from ollama import Client, ResponseError
 
 from src.config import config
-from src.logger import log
+from src.logger import log, COMPACT_LOGS, MEMBER_LEVEL
+from src.cache import JavadocCache
+from src.async_pipeline import AsyncPipeline
+from src.health import OllamaHealthMonitor
+from src.endpoints import EndpointPool
+from src.discovery import JavaFileDiscovery
+from src.members import ALL_MEMBER_KINDS, Member, extract_members, java_language
+from src.parse_pool import ParsePool, ParsedFile
+from src.source import read_source, encode_source, splice_javadocs, repair_javadoc
+from src.manifest import Manifest, hash_member, git_changed_files
+from src.utils import resolve_repo_path
+from src.writers import create_writer
+from src.journal import Journal
+from src.symbols import SymbolIndex
+from src.templates import TemplateEngine
+from src.metrics import metrics
+from src.streaming import StreamedAnswer
+from src.scheduler import PlannedFile, RunBudget, request_passes
+
+# Rough token estimate for prompt budgeting, and the output reserved per batched member
+CHARS_PER_TOKEN = 4
+OUTPUT_TOKENS_PER_MEMBER = 200
+
+# Delay before the first retry of a malformed answer, doubled on each further retry
+RETRY_BASE_DELAY = 0.5
+
+# Failure reason of the members left out once the run budget is spent
+DEFERRED = "deferred"
+
+# Comment of methods that inherit the documentation of the method they override
+INHERIT_DOC = "/** {@inheritDoc} */"
+
+# Fallback when the messages have no prompts.system_role
+SYSTEM_PROMPT = "You are a professional Java developer. Your task is to generate high-quality Javadoc comments that follow best practices."
 
 class JavaDocAI:
     """Main class to add Javadoc comments to Java files in a repository."""
 
-    def __init__(self, repo_dir: Path, messages: Dict[str, Dict[str, str]]):
-        """Initialize JavaDocAI with repository directory and messages."""
+    def __init__(
+        self,
+        repo_dir: Path,
+        messages: Dict[str, Dict[str, str]],
+        incremental: Optional[bool] = None,
+        git_range: Optional[str] = None,
+        output_mode: Optional[str] = None,
+        resume: bool = False,
+        retry_failed: bool = False,
+        deadline: Optional[float] = None,
+        token_budget: Optional[int] = None
+    ):
+        """
+        Initialize JavaDocAI with repository directory and messages.
+
+        Args:
+            repo_dir (Path): Root of the Java repository.
+            messages (Dict[str, Dict[str, str]]): Localized messages.
+            incremental (Optional[bool]): Only process new or changed files and members,
+                defaults to the ``incremental.enabled`` setting.
+            git_range (Optional[str]): Only process files changed in this git revision range,
+                defaults to the ``incremental.git_range`` setting.
+            output_mode (Optional[str]): How updated files are written ("atomic", "inplace" or
+                "patch"), defaults to the ``output.mode`` setting.
+            resume (bool): Skip the files and reuse the Javadocs completed by an interrupted run.
+            retry_failed (bool): Only request the members whose Javadoc failed in the previous run,
+                as recorded in its journal.
+            deadline (Optional[float]): Minutes after which the run stops sending requests,
+                defaults to the ``schedule.deadline_minutes`` setting.
+            token_budget (Optional[int]): Tokens after which the run stops sending requests,
+                defaults to the ``schedule.max_tokens`` setting.
+        """
         self.repo_dir = repo_dir
         self.messages = messages
         self.logs = messages["logs"]
@@ -32,42 +98,150 @@ class JavaDocAI:
         self.cli_msgs = messages["cli"]
         self.ollama_msgs = messages["ollama"]
         self.warnings = messages["warnings"]
-        self.class_relationships: Dict[str, List[str]] = {}
-        self.parser = self.initialize_parser()
-        self.client = Client(host=f'http://localhost:{config["ollama"]["server_port"]}')
+        self.skipped_signatures = 0
+        self.stats_lock = threading.Lock()
+        # Per-file counts reported by the compact log line, until the file is finished
+        self.file_stats: Dict[Path, Dict[str, int]] = {}
+        # Why the Javadoc of a member (by member hash) could not be generated, until it is journaled
+        self.failure_reasons: Dict[str, str] = {}
+        # Parser objects are not thread-safe, every worker thread gets its own
+        self.parser_local = threading.local()
+        self.parser_local.parser = self.initialize_parser()
         self.max_retries = config["ollama"]["max_retries"]
         self.retry_delay = config["ollama"]["retry_delay"]
+        self.endpoints = EndpointPool.from_config(
+            local_health=lambda endpoint: OllamaHealthMonitor(
+                probe=self.is_ollama_server_running,
+                restart=self.start_ollama_server,
+                max_retries=self.max_retries,
+                retry_delay=self.retry_delay
+            ),
+            # Remote servers cannot be restarted from here, they are drained until they answer again
+            remote_health=lambda endpoint: OllamaHealthMonitor(
+                probe=endpoint.is_running,
+                restart=lambda: False,
+                max_retries=self.max_retries,
+                retry_delay=self.retry_delay,
+                name=f"Ollama endpoint {endpoint.host}"
+            )
+        )
         self.batch_size = config["processing"]["batch_size"]
         self.max_concurrent_tasks = config["processing"]["max_concurrent_tasks"]
+        self.prompt_mode = config["processing"].get("prompt_mode", "single")
+        self.parse_processes = config["processing"].get("parse_processes", 0)
+        self.context_window = config["ollama"]["context_window"]
+        self.max_tokens = config["ollama"].get("max_tokens")
+        self.stream = config["ollama"].get("stream", True)
+        # Identical for every request, so the server can reuse its cached prefix
+        self.system_prompt = self.prompts.get("system_role", SYSTEM_PROMPT)
+        context_config = config.get("context", {})
+        self.context_enabled = context_config.get("enabled", True)
+        self.inheritance_mode = config.get("inheritance", {}).get("mode", "inherit")
+        self.symbols = (
+            SymbolIndex(resolve_repo_path(repo_dir, config["paths"]["auxiliary_file"]), repo_dir)
+            if self.context_enabled or self.inheritance_mode != "off" else None
+        )
+        # Tokens of repository context a prompt may spend, a share of the context window
+        self.context_budget = int(self.context_window * context_config.get("budget_ratio", 0.1))
+        self.class_contexts: Dict[Tuple[Optional[Path], str], str] = {}
+        # Methods given a Javadoc in this run, by symbol index key of their file and signature
+        self.documented_methods: Set[Tuple[str, str]] = set()
+        self.templates = TemplateEngine.from_config(messages.get("templates", {}))
+        self.cache = self.initialize_cache(repo_dir)
+        incremental_config = config.get("incremental", {})
+        if incremental is None:
+            incremental = incremental_config.get("enabled", False)
+        self.git_range = git_range or incremental_config.get("git_range")
+        self.manifest = (
+            Manifest(resolve_repo_path(repo_dir, config["paths"]["auxiliary_file"]), repo_dir)
+            if incremental else None
+        )
+        self.writer = create_writer(repo_dir, output_mode)
+        self.journal = Journal(
+            resolve_repo_path(repo_dir, config["paths"].get("journal_file", ".javadocai/journal.jsonl")),
+            repo_dir,
+            resume=resume or retry_failed,
+            read_only=not self.writer.modifies_tree
+        )
+        self.retry_failed = retry_failed
+        schedule_config = config.get("schedule", {})
+        self.budget = RunBudget(
+            deadline if deadline is not None else schedule_config.get("deadline_minutes"),
+            token_budget if token_budget is not None else schedule_config.get("max_tokens")
+        )
+
+    @property
+    def client(self) -> Client:
+        """Client of the default endpoint, used for setup and health checks of the local server."""
+        return self.endpoints.endpoints[0].client
+
+    @client.setter
+    def client(self, client: Client):
+        self.endpoints.endpoints[0].client = client
+
+    @property
+    def health(self) -> OllamaHealthMonitor:
+        """Health monitor of the default endpoint."""
+        return self.endpoints.endpoints[0].health
 
     @staticmethod
     def initialize_parser() -> Parser:
         """Initialize the Tree-sitter parser for Java."""
         try:
-            # Load the built language library
-            JAVA_LANGUAGE = Language('build/java-languages.so', 'java')
             parser = Parser()
-            parser.set_language(JAVA_LANGUAGE)
+            parser.set_language(java_language())
             return parser
         except Exception as e:
             log.error(f"Failed to initialize Java parser: {e}")
             raise
 
+    @staticmethod
+    def initialize_cache(repo_dir: Path) -> Optional[JavadocCache]:
+        """Open the persistent Javadoc cache if it is enabled."""
+        cache_config = config.get("cache", {})
+        if not cache_config.get("enabled", False):
+            return None
+        try:
+            return JavadocCache(
+                resolve_repo_path(repo_dir, cache_config["path"]),
+                int(cache_config["max_size_mb"] * 1024 * 1024)
+            )
+        except Exception as e:
+            log.warning(f"Javadoc cache disabled, could not open it: {e}")
+            return None
+
+    @property
+    def parser(self) -> Parser:
+        """Return the Tree-sitter parser of the calling thread."""
+        parser = getattr(self.parser_local, "parser", None)
+        if parser is None:
+            parser = self.parser_local.parser = self.initialize_parser()
+        return parser
+
     def run(self):
         """Execute the main flow of JavaDocAI."""
         try:
-            # Ensure Ollama is configured
-            if not self.ensure_ollama_setup():
-                log.error("Ollama setup failed")
-                return
+            if self.endpoints.configured:
+                # Remote endpoints are managed on their own hosts, only check that one answers
+                if not self.endpoints.check():
+                    log.error("No Ollama endpoint is reachable")
+                    return
+            else:
+                # Ensure Ollama is configured
+                if not self.ensure_ollama_setup():
+                    log.error("Ollama setup failed")
+                    return
 
-            # Check if Ollama server is running
-            if not self.is_ollama_server_running():
-                log.error("Ollama server is not running")
-                return
+                # Check if Ollama server is running
+                if not self.is_ollama_server_running():
+                    log.error("Ollama server is not running")
+                    return
 
             # Process Java files to add Javadoc
-            self.process_files()
+            if config["processing"].get("engine", "threads") == "async":
+                AsyncPipeline(self).run()
+            else:
+                self.process_files()
         except Exception as e:
             log.error(f"Error in main execution: {e}")
             raise
@@ -105,15 +279,14 @@ class JavaDocAI:
             else:
                 log.info(f"Model {model_name} is already available")
 
-            # Keep model loaded if configured
-            if config["ollama"]["keep_alive"]:
+            # Load the model with the shared system prompt, kept loaded for keep_alive
+            if self.keep_alive() is not None:
                 log.info("Keeping model loaded...")
                 self.client.chat(
                     model=model_name,
-                    messages=[{"role": "system", "content": "Keep model loaded"}],
-                    options={
-                        "timeout": config["ollama"]["timeout"]
-                    }
+                    messages=[{"role": "system", "content": self.system_prompt}],
+                    options={"num_ctx": self.context_window, "num_predict": 1},
+                    keep_alive=self.keep_alive()
                 )
 
             return True
@@ -154,54 +327,399 @@ class JavaDocAI:
             return False
 
     def process_files(self):
-        """Process Java files in batches with proper error handling."""
+        """Process Java files through a bounded work queue with proper error handling."""
         try:
-            java_files = list(self.repo_dir.rglob("*.java"))
-            log.info(f"Found {len(java_files)} Java files to process")
-
-            with ThreadPoolExecutor(max_workers=self.max_concurrent_tasks) as executor:
-                for i in range(0, len(java_files), self.batch_size):
-                    batch = java_files[i:i + self.batch_size]
-                    futures = [executor.submit(self.process_file, file) for file in batch]
-                    
-                    for future in tqdm(as_completed(futures), total=len(batch)):
-                        try:
-                            result = future.result()
-                            if result:
-                                log.info(f"Successfully processed file: {result}")
-                        except Exception as e:
-                            log.error(f"Error processing file in batch: {e}")
+            self.skipped_signatures = 0
+            self.build_symbol_index()
+            self.budget.start()
+            java_files = self.order_files(self.discover_files())
+            parse_pool = ParsePool(self.parse_processes) if self.parse_processes else None
+            if parse_pool:
+                # Workers receive member tables parsed in other processes instead of paths
+                java_files = self.parse_in_pool(parse_pool, java_files)
+            progress = tqdm(desc="Files", unit="file")
+            try:
+                if self.priority_order:
+                    planned: List[PlannedFile] = []
+                    file_count = self.run_workers(java_files, lambda item: self.plan_item(item, planned, progress))
+                    progress.total = file_count
+                    progress.refresh()
+                    for requests in request_passes(planned):
+                        # Groups left when the budget runs out are still settled, as deferred members
+                        self.run_workers(
+                            iter(requests),
+                            lambda request: self.document_group(*request, progress),
+                            stop_on_budget=False
+                        )
+                else:
+                    file_count = self.run_workers(java_files, lambda item: self.process_item(item, progress))
+                    progress.total = file_count
+                    progress.refresh()
+            finally:
+                progress.close()
+                if parse_pool:
+                    parse_pool.close()
+
+            log.info(f"Found {file_count} Java files to process")
+            self.log_run_summary()
         except Exception as e:
             log.error(f"Error in file processing: {e}")
             raise
+        finally:
+            self.finish_run()
 
-    def process_file(self, file_path: Path):
-        """Process a single Java file."""
+    @property
+    def priority_order(self) -> bool:
+        """Whether members are requested in tier passes across the whole run, see src.scheduler."""
+        return config["processing"].get("order") == "priority"
+
+    def run_workers(self, items: Iterator, handle: Callable, stop_on_budget: bool = True) -> int:
+        """
+        Hand items to the worker threads through a bounded work queue.
+
+        Args:
+            items (Iterator): Items to handle.
+            handle (Callable): Called by a worker thread with each item.
+            stop_on_budget (bool): Stop queueing items once the run budget is spent.
+
+        Returns:
+            int: Number of items queued.
+        """
+        # Bounded so discovery never runs far ahead of the workers
+        work_queue: queue.Queue = queue.Queue(maxsize=self.batch_size)
+        workers = [
+            threading.Thread(target=self.file_worker, args=(work_queue, handle), daemon=True)
+            for _ in range(self.max_concurrent_tasks)
+        ]
+        for worker in workers:
+            worker.start()
+
+        count = 0
+        try:
+            for item in items:
+                if stop_on_budget and self.budget.exhausted():
+                    # Files not queued yet are left for the next run
+                    break
+                work_queue.put(item)
+                count += 1
+        finally:
+            for _ in workers:
+                work_queue.put(None)
+            for worker in workers:
+                worker.join()
+        return count
+
+    def file_worker(self, work_queue: queue.Queue, handle: Callable):
+        """Handle the items of the work queue until the end marker is received."""
+        while (item := work_queue.get()) is not None:
+            try:
+                handle(item)
+            except Exception as e:
+                file_path = item[0] if isinstance(item, tuple) else item
+                if isinstance(file_path, PlannedFile):
+                    file_path = file_path.file_path
+                log.error(f"Error processing file: {file_path} - {e}")
+
+    def process_item(self, item, progress: tqdm):
+        """Process a queued file, a path or a parsed file."""
+        try:
+            if isinstance(item, tuple):
+                result = self.process_parsed_file(*item)
+            else:
+                result = self.process_file(item)
+            if result and not COMPACT_LOGS:
+                log.info("Successfully processed file: {}", result)
+        finally:
+            with self.stats_lock:
+                progress.update(1)
+
+    def plan_item(self, item, planned: List[PlannedFile], progress: tqdm):
+        """
+        Plan a queued file of the "priority" order, a path or a parsed file, adding it to
+        ``planned`` when it has members to request. Other files are finished right away.
+        """
+        planned_file = None
+        try:
+            if isinstance(item, tuple):
+                file_path, original_code, members = item
+                pending = self.plan_members(members, file_path)
+            else:
+                file_path, original_code = item, self.read_java_file(item)
+                pending = None if original_code is None else self.plan_file(original_code, file_path)
+            if original_code is not None:
+                planned_file = PlannedFile(file_path, original_code, pending, self.repo_dir)
+        finally:
+            if planned_file is None:
+                with self.stats_lock:
+                    progress.update(1)
+        if not planned_file.remaining:
+            self.finish_planned(planned_file, progress)
+            return
+        with self.stats_lock:
+            planned.append(planned_file)
+
+    def document_group(self, planned: PlannedFile, members: List[Member], progress: tqdm):
+        """Request the Javadocs of one group of members of a planned file, finishing the file after its last group."""
         try:
-            with file_path.open("r", encoding="utf-8") as file:
-                original_code = file.read()
+            insertions = self.collect_javadocs(planned.original_code, members, planned.file_path)
         except Exception as e:
-            log.error(f"Error reading file: {file_path} - {e}")
+            log.error(f"Error processing file: {planned.file_path} - {e}")
+            insertions = None
+        if planned.settle(insertions):
+            self.finish_planned(planned, progress)
+
+    def finish_planned(self, planned: PlannedFile, progress: tqdm):
+        """Merge the Javadocs of a planned file and hand it to the output writer."""
+        try:
+            updated_code = None if planned.failed else self.apply_javadocs(planned.original_code, planned.insertions)
+            if self.finish_file(planned.file_path, planned.original_code, updated_code) and not COMPACT_LOGS:
+                log.info("Successfully processed file: {}", planned.file_path)
+        finally:
+            with self.stats_lock:
+                progress.update(1)
+
+    def order_files(self, java_files: Iterator[Path]) -> Iterator[Path]:
+        """
+        Apply the configured processing order to the discovered files.
+
+        "discovery" keeps streaming files as they are found. "largest_first" and
+        "members_first" start the longest files first to shorten the tail of the
+        run, at the cost of discovering (and for members_first parsing) every file
+        before the first one is processed. "priority" keeps the discovery order of
+        the files, its members are ordered once every file is planned (see
+        process_files).
+        """
+        order = config["processing"].get("order", "discovery")
+        if order == "largest_first":
+            return iter(sorted(java_files, key=lambda path: path.stat().st_size, reverse=True))
+        if order == "members_first":
+            return iter(sorted(java_files, key=self.count_pending_members, reverse=True))
+        return java_files
+
+    def parse_in_pool(self, parse_pool: ParsePool, java_files: Iterator[Path]) -> Iterator[ParsedFile]:
+        """Parse files in worker processes, skipping unreadable files and unchanged ones."""
+        candidates = (path for path in java_files if not self.is_unchanged(path))
+        for file_path, java_code, members in parse_pool.imap(candidates):
+            if java_code is None:
+                log.error(f"Error reading file: {file_path}")
+            elif not self.is_unchanged(file_path, java_code):
+                yield file_path, java_code, members
+
+    def count_pending_members(self, file_path: Path) -> int:
+        """Count the members of a file that still need a Javadoc."""
+        try:
+            return len(self.plan_javadocs(self.extract_members(read_source(file_path))))
+        except Exception:
+            return 0
+
+    def log_run_summary(self):
+        """Log the counters collected during a run."""
+        log.info(f"Skipped {self.skipped_signatures} LLM calls for already documented members")
+        deferred = metrics.counters.get("deferred_members_total", 0)
+        if self.budget.reason is not None:
+            log.warning(f"Run stopped at its {self.budget.reason}, {deferred:g} members left for --resume")
+        if self.cache:
+            log.info(f"Javadoc cache: {self.cache.hits} hits, {self.cache.misses} misses")
+
+    def finish_run(self):
+        """Flush pending writes and persist the state shared between runs."""
+        self.writer.close()
+        log.info(f"Output writer stored {self.writer.bytes_written} bytes")
+        self.journal.close()
+        log.info(f"Run metrics:\n{metrics.summary_table()}")
+        export_file = config.get("metrics", {}).get("export_file")
+        if export_file:
+            export_path = resolve_repo_path(self.repo_dir, export_file)
+            metrics.export(export_path)
+            log.info(f"Metrics exported to {export_path}")
+        if self.manifest:
+            # Entries of files not visited are only stale after a scan of the whole tree
+            full_scan = not self.git_range and not self.retry_failed and self.budget.reason is None
+            self.manifest.save(prune=full_scan)
+
+    def build_symbol_index(self):
+        """Index the types of the whole repository for the prompt context, before any file is documented."""
+        if not self.symbols:
+            return
+        with metrics.timer("index_seconds"):
+            # Every file, also when only a git range is documented, context comes from the whole tree
+            self.symbols.build(self.parser, JavaFileDiscovery.from_config(self.repo_dir))
+        self.class_contexts.clear()
+        self.symbols.save()
+
+    def class_context(self, class_signature: str, file_path: Optional[Path] = None) -> str:
+        """
+        Return the class signature of a prompt followed by what the repository tells
+        about the class declared in ``file_path``: its fields, then its supertypes and
+        their fields, nearest first, as long as they fit in the context budget.
+        """
+        context = self.class_contexts.get((file_path, class_signature))
+        if context is not None:
+            return context
+        lines = [class_signature]
+        symbol = None
+        if self.symbols and self.context_enabled and file_path is not None:
+            symbol = self.symbols.lookup(file_path, class_signature)
+        if symbol is not None:
+            candidates = []
+            if symbol["fields"]:
+                candidates.append(self.prompts["context_fields"].format(fields="; ".join(symbol["fields"])))
+            for parent in self.symbols.ancestors(symbol):
+                signature = " ".join(parent["signature"].split())
+                candidates.append(self.prompts["context_supertype"].format(signature=signature))
+                if parent["fields"]:
+                    candidates.append(self.prompts["context_fields"].format(fields="; ".join(parent["fields"])))
+            used = 0
+            for line in candidates:
+                cost = self.estimate_tokens(line)
+                if used + cost > self.context_budget:
+                    continue
+                lines.append(line)
+                used += cost
+        context = self.class_contexts[(file_path, class_signature)] = "\n".join(lines)
+        return context
+
+    def discover_files(self) -> Iterator[Path]:
+        """Stream the Java files to process, restricted to a git revision range if one is set."""
+        discovery = JavaFileDiscovery.from_config(self.repo_dir)
+        if self.retry_failed:
+            failed = [self.repo_dir / key for key in self.journal.failed_files()]
+            log.info(f"Retrying the failed members of {len(failed)} files")
+            return iter([path for path in sorted(failed) if path.is_file() and discovery.accepts(path)])
+        if self.git_range:
+            log.info(f"Restricting processing to files changed in {self.git_range}")
+            return iter([path for path in sorted(git_changed_files(self.repo_dir, self.git_range))
+                         if discovery.accepts(path)])
+        return iter(discovery)
+
+    def process_file(self, file_path: Path):
+        """Process a single Java file."""
+        original_code = self.read_java_file(file_path)
+        if original_code is None:
             return
 
         updated_code = self.add_javadocs(original_code, file_path)
-        if updated_code:
-            self.update_java_file(file_path, updated_code)
-            log.info(f"File processed: {file_path}")
+        if self.finish_file(file_path, original_code, updated_code):
             return file_path
-        else:
-            log.warning(f"Error processing file: {file_path}")
 
         time.sleep(1)  # Small pause to avoid rate limits
 
-    def update_java_file(self, file_path: Path, updated_code: str):
-        """Update the Java file with the new code."""
+    def process_parsed_file(self, file_path: Path, original_code: str, members: List[Member]):
+        """Process a Java file already parsed into its member table."""
+        pending = self.plan_members(members, file_path)
+        updated_code = None if pending is None else self.document_members(original_code, pending, file_path)
+        if self.finish_file(file_path, original_code, updated_code):
+            return file_path
+
+    def is_unchanged(self, file_path: Path, java_code: Optional[str] = None) -> bool:
+        """
+        Check whether a file can be skipped because a resumed run completed it or an
+        incremental run recorded it unchanged (without reading it when no code is given).
+        """
+        if self.retry_failed:
+            # Files with failed members were completed, they are visited again on purpose
+            return False
+        content = encode_source(java_code) if java_code is not None else None
+        if self.journal.is_completed(file_path, content):
+            log.debug("Skipping file completed before the interruption: {}", file_path)
+            if self.manifest:
+                self.manifest.mark_seen(file_path)
+            return True
+        if not self.manifest:
+            return False
+        if self.manifest.is_unchanged(file_path, content):
+            log.debug("Skipping unchanged file: {}", file_path)
+            return True
+        return False
+
+    def read_java_file(self, file_path: Path) -> Optional[str]:
+        """
+        Read a Java file that needs processing.
+
+        Args:
+            file_path (Path): Path to the Java file.
+
+        Returns:
+            Optional[str]: The file content, or None if it cannot be read or is unchanged
+            since the last incremental run.
+        """
+        if self.is_unchanged(file_path):
+            return None
+
         try:
-            # Write the updated code to the original file
-            with file_path.open("w", encoding="utf-8") as file:
-                file.write(updated_code)
+            original_code = read_source(file_path)
         except Exception as e:
-            log.error(f"Error writing file: {file_path} - {e}")
+            log.error(f"Error reading file: {file_path} - {e}")
+            return None
+
+        if self.is_unchanged(file_path, original_code):
+            return None
+        return original_code
+
+    def finish_file(self, file_path: Path, original_code: str, updated_code: Optional[str]) -> bool:
+        """
+        Hand the updated code of a file to the output writer and record it in the manifest.
+
+        Args:
+            file_path (Path): Path to the Java file.
+            original_code (str): Code read from the file.
+            updated_code (Optional[str]): Code with Javadocs, None if processing failed.
+
+        Returns:
+            bool: True if the file was processed.
+        """
+        with self.stats_lock:
+            deferred = self.file_stats.get(file_path, {}).get("deferred", 0)
+        if updated_code:
+            metrics.inc("files_processed_total")
+            # A file cut short by the run budget is not recorded, so --resume and incremental runs visit it again
+            on_written = None if deferred else lambda: self.record_file(file_path, updated_code, completed=True)
+            written = self.writer.write(file_path, original_code, updated_code, on_written)
+            if not written and not deferred:
+                self.record_file(file_path, original_code, completed=True)
+            self.log_file(file_path, "File processed" if written else "File processed without changes")
+            return True
+
+        self.record_file(file_path, original_code)
+        metrics.inc("files_failed_total")
+        self.log_file(file_path, "Error processing file", level="WARNING")
+        return False
+
+    def count_file(self, file_path: Path, **counts: int):
+        """Add to the per-file counts reported by the compact log line."""
+        with self.stats_lock:
+            stats = self.file_stats.setdefault(file_path, {})
+            for name, value in counts.items():
+                stats[name] = stats.get(name, 0) + value
+
+    def log_file(self, file_path: Path, outcome: str, level: str = "INFO"):
+        """Log the outcome of a file, with its member counts in one structured line in the compact mode."""
+        with self.stats_lock:
+            stats = self.file_stats.pop(file_path, {})
+        if not COMPACT_LOGS:
+            log.log(level, "{}: {}", outcome, file_path)
+            return
+        log.log(
+            level,
+            "{outcome}: {path} | members={members} documented={documented} "
+            "journaled={journaled} generated={generated}/{requested} inherited={inherited} templated={templated} "
+            "deferred={deferred}",
+            outcome=outcome,
+            path=file_path,
+            **{name: stats.get(name, 0) for name in (
+                "members", "documented", "journaled", "generated", "requested", "inherited", "templated", "deferred"
+            )}
+        )
+
+    def record_file(self, file_path: Path, java_code: str, completed: bool = False):
+        """Record the content of a file in the manifest, and in the journal if completed, once it is on disk."""
+        if not self.writer.modifies_tree:
+            return
+        content = encode_source(java_code)
+        if self.manifest:
+            self.manifest.record(file_path, content)
+        if completed:
+            self.journal.record_file(file_path, content)
 
     def add_javadocs(self, java_code: str, file_path: Path) -> Optional[str]:
         """
@@ -214,247 +732,682 @@ class JavaDocAI:
         Returns:
             Optional[str]: Java code updated with Javadocs or None if an error occurs.
         """
-        classes = self.extract_class_structures(java_code)
-        if not classes:
+        pending = self.plan_file(java_code, file_path)
+        if pending is None:
+            return None
+        return self.document_members(java_code, pending, file_path)
+
+    def document_members(self, java_code: str, pending: List[Member], file_path: Path) -> str:
+        """Get the Javadocs of the pending members and merge them into the code."""
+        return self.apply_javadocs(java_code, self.collect_javadocs(java_code, pending, file_path))
+
+    def collect_javadocs(self, java_code: str, pending: List[Member], file_path: Path) -> List[Tuple[Member, str]]:
+        """Get the Javadocs of the pending members, reused or requested, paired with their member."""
+        journaled, pending = self.split_journaled(file_path, pending)
+        inherited, pending = self.split_inherited(file_path, pending)
+        templated, pending = self.split_templated(file_path, java_code, pending)
+        return self.settle_members(
+            file_path, journaled + inherited + templated, pending, self.get_javadocs(pending, file_path)
+        )
+
+    def settle_members(
+        self,
+        file_path: Path,
+        reused: List[Tuple[Member, str]],
+        pending: List[Member],
+        comments: List[Optional[str]]
+    ) -> List[Tuple[Member, str]]:
+        """
+        Journal the outcome of the requested members of a file: the generated Javadocs,
+        and the reason of each failure so ``--retry-failed`` can ask for those members again.
+
+        Returns:
+            List[Tuple[Member, str]]: The ``reused`` (journaled or inherited) and generated members
+            paired with their comment.
+        """
+        generated = [(member, comment) for member, comment in zip(pending, comments) if comment]
+        self.journal_members(file_path, generated)
+        if self.symbols:
+            # Overriding methods of files processed later may now use {@inheritDoc}
+            key = self.symbols.key(file_path)
+            with self.stats_lock:
+                self.documented_methods.update(
+                    (key, member.signature) for member, _ in reused + generated if member.kind == 'method'
+                )
+        if self.manifest:
+            self.manifest.add_staged_members(
+                file_path, (hash_member(member.kind, member.signature) for member, _ in reused + generated)
+            )
+        deferred = 0
+        for member, comment in zip(pending, comments):
+            if not comment:
+                member_hash = hash_member(member.kind, member.signature)
+                with self.stats_lock:
+                    reason = self.failure_reasons.pop(member_hash, "no_javadoc")
+                if reason == DEFERRED:
+                    # Not a failure: the member is requested again by the next run
+                    deferred += 1
+                else:
+                    self.journal.record_failure(file_path, member_hash, reason)
+        self.count_file(file_path, requested=len(pending) - deferred, generated=len(generated), deferred=deferred)
+        return reused + generated
+
+    def record_failure(self, signature: str, signature_type: str, reason: str):
+        """Remember why the Javadoc of a member could not be generated."""
+        metrics.inc("generation_failures_total")
+        with self.stats_lock:
+            self.failure_reasons[hash_member(signature_type, signature)] = reason
+
+    def defer_member(self, signature: str, signature_type: str):
+        """Leave a member undocumented because the run reached its deadline or token budget."""
+        metrics.inc("deferred_members_total")
+        with self.stats_lock:
+            self.failure_reasons[hash_member(signature_type, signature)] = DEFERRED
+
+    def split_journaled(
+        self, file_path: Path, pending: List[Member]
+    ) -> Tuple[List[Tuple[Member, str]], List[Member]]:
+        """
+        Separate the members whose Javadoc was journaled by an interrupted run.
+
+        Returns:
+            Tuple[List[Tuple[Member, str]], List[Member]]: Journaled members paired with their
+            comment, and the members that still need a request.
+        """
+        journaled, remaining = [], []
+        for member in pending:
+            javadoc = self.journal.javadoc(file_path, hash_member(member.kind, member.signature))
+            if javadoc:
+                journaled.append((member, javadoc))
+            else:
+                remaining.append(member)
+        if journaled:
+            self.count_file(file_path, journaled=len(journaled))
+            if not COMPACT_LOGS:
+                log.info("Reusing {} journaled Javadocs in file: {}", len(journaled), file_path)
+        return journaled, remaining
+
+    def split_inherited(
+        self, file_path: Path, pending: List[Member]
+    ) -> Tuple[List[Tuple[Member, str]], List[Member]]:
+        """
+        Separate the methods overriding a method of a supertype in the repository, which
+        get the documentation of that method instead of a request.
+
+        Returns:
+            Tuple[List[Tuple[Member, str]], List[Member]]: Overriding methods paired with their
+            comment, and the members that still need a request.
+        """
+        if not self.symbols or self.inheritance_mode == "off":
+            return [], pending
+        inherited, remaining = [], []
+        for member in pending:
+            javadoc = self.inherited_javadoc(member, file_path) if member.kind == 'method' else None
+            if javadoc:
+                inherited.append((member, javadoc))
+            else:
+                remaining.append(member)
+        if inherited:
+            metrics.inc("inherited_javadocs_total", len(inherited))
+            self.count_file(file_path, inherited=len(inherited))
+        return inherited, remaining
+
+    def split_templated(
+        self, file_path: Path, java_code: str, pending: List[Member]
+    ) -> Tuple[List[Tuple[Member, str]], List[Member]]:
+        """
+        Separate the trivial members (accessors, plain constructors, enum constants)
+        documented locally by the template engine.
+
+        Returns:
+            Tuple[List[Tuple[Member, str]], List[Member]]: Templated members paired with their
+            comment, and the members that still need a request.
+        """
+        if not self.templates:
+            return [], pending
+        source = encode_source(java_code)
+        templated, remaining = [], []
+        for member in pending:
+            # Decoded like the member signatures, so the body starts right after the signature
+            declaration = source[member.start_byte:member.end_byte].decode("utf8", errors="replace")
+            javadoc = self.templates.render(member, declaration)
+            if javadoc:
+                templated.append((member, javadoc))
+            else:
+                remaining.append(member)
+        if templated:
+            metrics.inc("templated_javadocs_total", len(templated))
+            self.count_file(file_path, templated=len(templated))
+        return templated, remaining
+
+    def inherited_javadoc(self, member: Member, file_path: Path) -> Optional[str]:
+        """
+        Return the Javadoc of a method overriding a method of a supertype in the repository.
+
+        In the "copy" mode the comment generated for the overridden method is reused
+        when there is one. ``{@inheritDoc}`` is used when the overridden method has a
+        Javadoc in its source or got one earlier in this run, other methods get None
+        and are requested like any member.
+        """
+        symbol = self.symbols.lookup(file_path, member.class_signature)
+        method = self.symbols.method(symbol, member.signature) if symbol else None
+        overridden = self.symbols.overridden(symbol, method) if method else None
+        if overridden is None:
+            return None
+        parent, parent_method = overridden
+        if self.inheritance_mode == "copy" and self.cache:
+            # Probed without counting a hit or refreshing the entry, the parent's own lookup does that
+            generated = self.cache.peek(self.member_cache_key(parent_method["signature"], "method"))
+            if generated:
+                return generated
+        with self.stats_lock:
+            documented_in_run = (parent["path"], parent_method["signature"]) in self.documented_methods
+        if parent_method["documented"] or documented_in_run:
+            return INHERIT_DOC
+        return None
+
+    def journal_members(self, file_path: Path, insertions: List[Tuple[Member, str]]):
+        """Checkpoint the Javadocs generated for the members of a file."""
+        for member, javadoc in insertions:
+            self.journal.record_member(file_path, hash_member(member.kind, member.signature), javadoc)
+
+    def plan_file(self, java_code: str, file_path: Path) -> Optional[List[Member]]:
+        """
+        Parse a file and select the members that must be sent to the LLM.
+
+        Args:
+            java_code (str): Original Java code.
+            file_path (Path): Path to the Java file.
+
+        Returns:
+            Optional[List[Member]]: Members still needing a Javadoc, or None if the file has no signatures.
+        """
+        return self.plan_members(self.extract_members(java_code), file_path)
+
+    def plan_members(self, members: List[Member], file_path: Path) -> Optional[List[Member]]:
+        """
+        Select the members of a parsed file that must be sent to the LLM.
+
+        Args:
+            members (List[Member]): Member table of the file.
+            file_path (Path): Path to the Java file.
+
+        Returns:
+            Optional[List[Member]]: Members still needing a Javadoc, or None if the file has no signatures.
+        """
+        if not members:
             log.warning(f"No signatures found in file: {file_path}")
             return None
 
-        insertions = []
-
-        for class_info in classes:
-            # Get Javadoc for the class
-            class_javadoc = self.get_javadoc_for_signature(class_info['signature'], 'class')
-            if class_javadoc:
-                # Prepare the insertion for the class (before the class declaration)
-                insertions.append({
-                    'line': class_info['start_line'],
-                    'comment': class_javadoc
-                })
-
-            # Process methods of the class
-            for method_info in class_info['methods']:
-                method_javadoc = self.get_javadoc_for_signature(method_info['signature'], 'method')
-                if method_javadoc:
-                    # Prepare the insertion for the method (before the method declaration)
-                    insertions.append({
-                        'line': method_info['start_line'],
-                        'comment': method_javadoc
-                    })
+        pending = self.plan_javadocs(members)
+        # Members of the kinds left out by processing.member_kinds are neither pending nor documented
+        kinds = config["processing"].get("member_kinds", ALL_MEMBER_KINDS)
+        documentable = sum(member.kind in kinds for member in members)
+        skipped = documentable - len(pending)
+        self.count_file(file_path, members=documentable, documented=skipped)
+        if skipped:
+            with self.stats_lock:
+                self.skipped_signatures += skipped
+            if not COMPACT_LOGS:
+                log.info("Skipping {} already documented members in file: {}", skipped, file_path)
+
+        if self.manifest:
+            # Only members whose signature is new since the last run reach the LLM
+            known = self.manifest.member_hashes(file_path)
+            # Members still to document are staged by settle_members once their Javadoc is generated
+            undocumented = {hash_member(m.kind, m.signature) for m in pending} - known
+            self.manifest.stage_members(
+                file_path, {hash_member(m.kind, m.signature) for m in members} - undocumented
+            )
+            if not self.retry_failed:
+                pending = [m for m in pending if hash_member(m.kind, m.signature) not in known]
+        if self.retry_failed:
+            failed = self.journal.failed_members(file_path)
+            pending = [m for m in pending if hash_member(m.kind, m.signature) in failed]
+        return pending
 
+    @staticmethod
+    def apply_javadocs(java_code: str, insertions: List[Tuple[Member, str]]) -> str:
+        """
+        Merge generated Javadoc comments into the original code.
+
+        Args:
+            java_code (str): Original Java code.
+            insertions (List[Tuple[Member, str]]): Members paired with the comment to insert before them.
+
+        Returns:
+            str: Java code updated with the comments.
+        """
         if not insertions:
-            log.info("No Javadoc comments to add")
+            log.debug("No Javadoc comments to add")
             return java_code
 
-        # Sort insertions by line number in descending order
-        insertions_sorted = sorted(insertions, key=lambda x: x['line'], reverse=True)
+        for member, comment in insertions:
+            log.log(MEMBER_LEVEL, "Inserting Javadoc at line {}:\n{}", member.start_line + 1, comment)
+
+        return splice_javadocs(java_code, insertions)
+
+    @staticmethod
+    def plan_javadocs(members: List[Member]) -> List[Member]:
+        """
+        Select the members that still need a Javadoc comment.
+
+        Args:
+            members (List[Member]): Member table from extract_members.
+
+        Returns:
+            List[Member]: Members of the kinds in ``processing.member_kinds`` without an
+            existing Javadoc, in source order.
+        """
+        kinds = config["processing"].get("member_kinds", ALL_MEMBER_KINDS)
+        return [member for member in members if not member.has_javadoc and member.kind in kinds]
+
+    def get_javadocs(self, pending: List[Member], file_path: Optional[Path] = None) -> List[Optional[str]]:
+        """
+        Get the Javadoc of every pending member in the configured prompt mode.
 
-        updated_code = java_code.splitlines()
-        cumulative_offset = 0
+        Args:
+            pending (List[Member]): Members needing a Javadoc.
+            file_path (Optional[Path]): File declaring the members, for the class context.
 
-        for insertion in insertions_sorted:
-            line_number = insertion['line'] + cumulative_offset  # Adjust for previous insertions
-            comment = insertion['comment']
+        Returns:
+            List[Optional[str]]: One comment (or None) per member, in the same order.
+        """
+        if self.prompt_mode != "batched":
+            return [
+                self.get_javadoc_for_signature(m.signature, m.kind, m.class_signature, file_path) for m in pending
+            ]
 
-            # Check if Javadoc already exists above the line
-            if self.has_javadoc_above(updated_code, line_number):
-                log.info(f"Javadoc already exists above line {line_number + 1}. Skipping insertion.")
-                continue
+        comments = [self.get_cached_javadoc(m.signature, m.kind) for m in pending]
+        for batch in self.plan_batches(pending, [i for i, c in enumerate(comments) if c is None], file_path):
+            members = [pending[i] for i in batch]
+            results = {}
+            if len(members) > 1 and not self.budget.exhausted():
+                response = self.get_ai_single_response(
+                    self.build_batch_prompt(members, file_path), json_format=True, max_tokens=self.batch_max_tokens(members)
+                )
+                results = self.parse_batch_response(response, members)
+            for position, (index, member) in enumerate(zip(batch, members)):
+                comment = results.get(position)
+                if comment is None:
+                    # Malformed or missing members fall back to a single-signature request
+                    comment = self.request_javadoc(member.signature, member.kind, member.class_signature, file_path)
+                comments[index] = comment
+        return comments
+
+    def plan_batches(
+        self, pending: List[Member], indexes: List[int], file_path: Optional[Path] = None
+    ) -> List[List[int]]:
+        """
+        Group members of the same class into batches that fit the context window.
 
-            # Insert the comment before the specified line
-            updated_code.insert(line_number, comment)
-            log.debug(f"Inserting Javadoc at line {line_number + 1}:\n{comment}")
+        Args:
+            pending (List[Member]): Members needing a Javadoc.
+            indexes (List[int]): Indexes of the members to batch.
+            file_path (Optional[Path]): File declaring the members, for the class context.
+
+        Returns:
+            List[List[int]]: Member indexes of each batch.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index in indexes:
+            groups.setdefault(pending[index].class_signature, []).append(index)
+
+        batches = []
+        for owner, group in groups.items():
+            base_tokens = self.estimate_tokens(
+                self.prompts["batch_prompt"] + self.class_context(owner, file_path) + self.system_prompt
+            )
+            batch, used = [], base_tokens
+            for index in group:
+                cost = self.estimate_tokens(pending[index].signature) + OUTPUT_TOKENS_PER_MEMBER
+                if batch and used + cost > self.context_window:
+                    batches.append(batch)
+                    batch, used = [], base_tokens
+                batch.append(index)
+                used += cost
+            batches.append(batch)
+        return batches
+
+    def batch_max_tokens(self, members: List[Member]) -> Optional[int]:
+        """Return the generation budget of a batched request, max_tokens for each member."""
+        return self.max_tokens * len(members) if self.max_tokens else None
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Roughly estimate the number of tokens of a text."""
+        return len(text) // CHARS_PER_TOKEN + 1
 
-            cumulative_offset += 1  # Each insertion adds a line
+    def estimate_request_tokens(self, request: Mapping) -> int:
+        """Roughly estimate the prompt tokens of a chat request, system prompt included."""
+        return sum(self.estimate_tokens(message["content"]) for message in request["messages"])
 
-        # Join the updated code
-        final_code = '\n'.join(updated_code)
-        return final_code
+    def build_batch_prompt(self, members: List[Member], file_path: Optional[Path] = None) -> str:
+        """Format the prompt asking for the Javadocs of several members of one class as JSON."""
+        lines = [
+            f"{index}: {member.kind} {' '.join(member.signature.split())}"
+            for index, member in enumerate(members, start=1)
+        ]
+        return self.prompts["batch_prompt"].format(
+            class_signature=self.class_context(members[0].class_signature, file_path),
+            members="\n".join(lines)
+        )
 
-    def has_javadoc_above(self, code_lines: List[str], line_number: int) -> bool:
+    def parse_batch_response(self, response: Optional[str], members: List[Member]) -> Dict[int, str]:
         """
-        Check if a Javadoc comment already exists above a specific line.
+        Split a batched JSON response back into per-member comments.
 
         Args:
-            code_lines (List[str]): List of code lines.
-            line_number (int): Line number to check (0-based index).
+            response (Optional[str]): Raw response content, a JSON object keyed by member id.
+            members (List[Member]): Members of the batch, ids are their 1-based positions.
 
         Returns:
-            bool: True if a Javadoc comment exists above the line, False otherwise.
+            Dict[int, str]: Valid comments keyed by position in the batch (0-based), malformed
+            members are left out.
         """
-        if line_number == 0:
-            return False  # No lines above
+        if not response:
+            return {}
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', response.strip())
+        try:
+            data = json.loads(text)
+        except ValueError:
+            log.warning(f"Invalid JSON received for a batch of {len(members)} members")
+            metrics.inc("validation_failures_total")
+            return {}
+        if not isinstance(data, dict):
+            return {}
 
-        previous_line = code_lines[line_number - 1].strip()
-        return previous_line.startswith('/**')
+        results = {}
+        for index, member in enumerate(members):
+            value = data.get(str(index + 1))
+            if isinstance(value, str):
+                comment = self.validate_javadoc(value, member.signature, member.kind)
+                if comment:
+                    results[index] = comment
+                    if self.cache:
+                        self.cache.put(self.member_cache_key(member.signature, member.kind), comment)
+        return results
 
-    def get_javadoc_for_signature(self, signature: str, signature_type: str) -> Optional[str]:
+    def get_cached_javadoc(self, signature: str, signature_type: str) -> Optional[str]:
+        """Return the cached Javadoc of a signature, if any."""
+        if not self.cache:
+            return None
+        javadoc = self.cache.get(self.member_cache_key(signature, signature_type))
+        metrics.inc("cache_hits_total" if javadoc is not None else "cache_misses_total")
+        return javadoc
+
+    def get_javadoc_for_signature(
+        self, signature: str, signature_type: str, class_signature: str = "", file_path: Optional[Path] = None
+    ) -> Optional[str]:
         """
         Send a signature to the AI and get the corresponding Javadoc comment.
 
         Args:
             signature (str): The signature of the class or method.
             signature_type (str): 'class' or 'method'.
+            class_signature (str): Signature of the enclosing type, sent as context.
+            file_path (Optional[Path]): File declaring the enclosing type.
 
         Returns:
             Optional[str]: The generated Javadoc comment or None if an error occurs.
         """
-        prompt = self.prompts["single_prompt"].format(
-            signature_type=signature_type,
-            signature=signature
-        )
+        cached = self.get_cached_javadoc(signature, signature_type)
+        if cached is not None:
+            log.log(MEMBER_LEVEL, "Cache hit for {}: {}", signature_type, signature)
+            return cached
+        return self.request_javadoc(signature, signature_type, class_signature, file_path)
+
+    def request_javadoc(
+        self, signature: str, signature_type: str, class_signature: str = "", file_path: Optional[Path] = None
+    ) -> Optional[str]:
+        """
+        Request the Javadoc of a signature from the LLM and cache it, without a cache lookup.
 
+        An answer that cannot be repaired into a Javadoc is asked again, with a
+        reminder of the expected format, up to ``max_retries`` times with backoff.
+        """
+        if self.budget.exhausted():
+            self.defer_member(signature, signature_type)
+            return None
+        prompt = self.build_prompt(signature, signature_type, class_signature, file_path)
         try:
-            response = self.get_ai_single_response(prompt)
-            if response:
-                # Validate the Javadoc comment format
-                response = response.strip()
-                if response.startswith('/**') and response.endswith('*/'):
-                    # Remove any additional '*/' in the middle of the comment
-                    first_closing = response.find('*/')
-                    if first_closing != len(response) - 2:
-                        # Truncate after the first '*/'
-                        response = response[:first_closing + 2]
-                    return response
-                else:
-                    log.warning(f"Invalid Javadoc format received for {signature_type}: {signature}")
-                    log.debug(f"Received Javadoc: {response}")
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    time.sleep(self.retry_backoff(attempt))
+                response = self.get_ai_single_response(self.retry_prompt(prompt, attempt))
+                if response is None:
+                    # The request itself was already retried over the endpoints
+                    self.record_failure(signature, signature_type, "request_failed")
                     return None
-            else:
-                return None
+                javadoc = self.validate_javadoc(response, signature, signature_type)
+                if javadoc:
+                    if self.cache:
+                        self.cache.put(self.member_cache_key(signature, signature_type), javadoc)
+                    return javadoc
+            self.record_failure(signature, signature_type, "malformed")
+            return None
         except Exception as e:
             log.error(f"Error getting Javadoc for signature: {e}")
+            self.record_failure(signature, signature_type, "error")
             return None
 
-    def get_ai_single_response(self, prompt: str) -> Optional[str]:
+    def retry_prompt(self, prompt: str, attempt: int) -> str:
+        """Return the prompt of an attempt, retries end with a reminder of the expected format."""
+        if not attempt:
+            return prompt
+        metrics.inc("generation_retries_total")
+        return f"{prompt}\n\n{self.prompts['retry_reminder']}"
+
+    def retry_backoff(self, attempt: int) -> float:
+        """Return the delay before retrying a malformed answer, doubling up to ``retry_delay``."""
+        return min(self.retry_delay, RETRY_BASE_DELAY * 2 ** (attempt - 1))
+
+    def build_prompt(
+        self, signature: str, signature_type: str, class_signature: str = "", file_path: Optional[Path] = None
+    ) -> str:
+        """
+        Format the prompt asking for the Javadoc of a signature.
+
+        The instructions come first and the member last, so the prompts of the
+        members of a class share their prefix with each other and with the class.
+        """
+        return self.prompts["single_prompt"].format(
+            class_signature=self.class_context(class_signature, file_path),
+            signature_type=signature_type,
+            signature=signature
+        )
+
+    @staticmethod
+    def validate_javadoc(response: Optional[str], signature: str, signature_type: str) -> Optional[str]:
+        """
+        Validate the Javadoc comment format of an LLM response.
+
+        Args:
+            response (Optional[str]): Raw response content.
+            signature (str): The signature the comment was requested for.
+            signature_type (str): 'class' or 'method'.
+
+        Returns:
+            Optional[str]: The first Javadoc block of the response, without code fences or
+            surrounding text, or None if it holds no complete comment.
+        """
+        if not response:
+            return None
+        javadoc = repair_javadoc(response)
+        if javadoc is not None:
+            stripped = response.strip()
+            if not (stripped.startswith('/**') and stripped.endswith('*/')):
+                log.log(MEMBER_LEVEL, "Repaired Javadoc received for {}: {}", signature_type, signature)
+                metrics.inc("javadoc_repairs_total")
+            return javadoc
+        log.warning("Invalid Javadoc format received for {}: {}", signature_type, signature)
+        metrics.inc("validation_failures_total")
+        log.log(MEMBER_LEVEL, "Received Javadoc: {}", response)
+        return None
+
+    def member_cache_key(self, signature: str, signature_type: str) -> str:
+        """
+        Build the cache key of a member's Javadoc.
+
+        The class context is left out of the key, so a signature repeated across
+        classes (toString, getters...) is still generated once.
+        """
+        return self.cache_key(self.build_prompt(signature, signature_type))
+
+    def cache_key(self, prompt: str) -> str:
+        """Build the cache key of a prompt from every input that shapes the response."""
+        return JavadocCache.make_key(
+            config["ollama"]["model"],
+            config["ollama"]["temperature"],
+            config["ollama"]["top_p"],
+            self.system_prompt,
+            prompt
+        )
+
+    def get_ai_single_response(
+        self, prompt: str, json_format: bool = False, max_tokens: Optional[int] = None
+    ) -> Optional[str]:
         """
         Send a prompt to the AI and get the response.
 
         Args:
             prompt (str): The prompt to send.
+            json_format (bool): Ask the model for a JSON response.
+            max_tokens (Optional[int]): Generation budget, defaults to ``ollama.max_tokens``.
 
         Returns:
             Optional[str]: The AI response as a string.
         """
-        try:
-            log.debug(f"Sending prompt to LLM: {prompt}")
-            
-            # Check if Ollama server is running
-            if not self.is_ollama_server_running():
-                log.error("Ollama server is not running")
-                self.start_ollama_server()
-                time.sleep(5)  # Wait for server to start
-
-            response = self.client.chat(
-                model=config["ollama"]["model"],
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional Java developer. Your task is to generate high-quality Javadoc comments that follow best practices."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                options={
-                    "timeout": config["ollama"]["timeout"],
-                    "temperature": config["ollama"]["temperature"],
-                    "top_p": config["ollama"]["top_p"]
-                }
-            )
-            
-            if response and 'message' in response:
-                log.debug(f"Received response from LLM: {response['message']['content']}")
-                return response['message']['content']
-            else:
-                log.error(f"Invalid response format from LLM: {response}")
-                return None
-                
-        except Exception as e:
-            log.error(f"Error getting AI response: {e}")
-            return None
+        log.log(MEMBER_LEVEL, "Sending prompt to LLM: {}", prompt)
+
+        # Server state comes from the outcome of real requests, it is only probed after failures
+        for _ in range(self.max_retries + 1):
+            queued = time.perf_counter()
+            endpoint = self.endpoints.acquire()
+            try:
+                # Only block on recovery when no other endpoint can take the request
+                if not endpoint.health.acquire(wait=self.endpoints.all_down()):
+                    if self.endpoints.all_down():
+                        log.error("Ollama server is not running")
+                        return None
+                    # This endpoint stays drained, the next attempt goes to another one
+                    continue
+                metrics.inc("prompts_total")
+                start = time.perf_counter()
+                metrics.observe("request_queue_seconds", start - queued)
+                request = self.build_chat_request(prompt, json_format, max_tokens)
+                try:
+                    response = endpoint.client.chat(**request)
+                    if request.get("stream"):
+                        response = self.read_stream(response, self.estimate_request_tokens(request))
+                except ResponseError as e:
+                    # The server answered, only this request was rejected
+                    endpoint.health.record_success()
+                    metrics.inc("request_failures_total")
+                    log.error(f"Ollama API error: {e}")
+                    return None
+                except Exception as e:
+                    endpoint.health.record_failure(e)
+                    metrics.inc("request_failures_total")
+                    continue
+                endpoint.health.record_success()
+                metrics.record_chat(response, time.perf_counter() - start)
+                self.budget.charge(response)
+                return self.parse_chat_response(response)
+            finally:
+                self.endpoints.release(endpoint)
 
-    def extract_class_structures(self, java_code: str) -> List[Dict]:
+        log.error("Error getting AI response: retries exhausted")
+        return None
+
+    @staticmethod
+    def read_stream(chunks: Iterator[Mapping], prompt_tokens: int = 0) -> Dict:
         """
-        Extract the structure of classes and methods from the Java code.
+        Read a streamed answer until its Javadoc block is complete.
+
+        The stream is closed as soon as the closing ``*/`` arrives, which makes
+        Ollama stop generating the explanations chatty models add after it.
 
         Args:
-            java_code (str): The original Java code.
+            chunks (Iterator[Mapping]): Chunks of a chat request sent with ``stream=True``.
+            prompt_tokens (int): Estimated prompt tokens, reported when the stream is closed
+                before Ollama sends its statistics.
 
         Returns:
-            List[Dict]: A list of dictionaries representing each class, with their methods.
-        """
-        tree = self.parser.parse(bytes(java_code, "utf8"))
-        root_node = tree.root_node
-        classes = []
-
-        # Function to recursively walk the syntax tree
-        def walk(node, parent_class=None):
-            if node.type in ['class_declaration', 'interface_declaration', 'enum_declaration']:
-                # Extract the class signature
-                start = node.start_byte
-                for child in node.children:
-                    if child.type == 'class_body':
-                        end = child.start_byte  # Exclude the body
-                        break
-                else:
-                    end = node.end_byte
-                class_signature = java_code[start:end].strip()
-                # Get the class name
-                class_name = None
-                for child in node.children:
-                    if child.type == 'identifier':
-                        class_name = java_code[child.start_byte:child.end_byte]
-                        break
-                # Get the starting line number
-                start_line = node.start_point[0]  # 0-based index
-
-                class_dict = {
-                    'type': 'class',
-                    'signature': class_signature,
-                    'name': class_name,
-                    'methods': [],
-                    'start_line': start_line
-                }
-                # Recurse into the class body
-                for child in node.children:
-                    if child.type == 'class_body':
-                        for class_body_child in child.children:
-                            walk(class_body_child, parent_class=class_dict)
-                classes.append(class_dict)
-            elif node.type == 'method_declaration' and parent_class is not None:
-                # Extract the method signature
-                start = node.start_byte
-                for child in node.children:
-                    if child.type == 'block':
-                        end = child.start_byte  # Exclude the method body
-                        break
-                else:
-                    end = node.end_byte
-                method_signature = java_code[start:end].strip()
-                # Get the method name
-                method_name = None
-                for child in node.children:
-                    if child.type == 'identifier':
-                        method_name = java_code[child.start_byte:child.end_byte]
-                        break
-                # Get the starting line number
-                start_line = node.start_point[0]  # 0-based index
-
-                method_dict = {
-                    'type': 'method',
-                    'signature': method_signature,
-                    'name': method_name,
-                    'start_line': start_line
+            Dict: The answer in the form of a non-streamed chat response.
+        """
+        answer = StreamedAnswer(prompt_tokens)
+        for chunk in chunks:
+            if answer.add(chunk):
+                break
+        if answer.stopped_early:
+            chunks.close()
+            metrics.inc("streams_stopped_total")
+        return answer.response()
+
+    @staticmethod
+    def keep_alive():
+        """Return the Ollama keep_alive of the requests (True keeps the model loaded indefinitely), None to omit it."""
+        keep_alive = config["ollama"].get("keep_alive")
+        if keep_alive is True:
+            return -1
+        return None if keep_alive is False else keep_alive
+
+    def build_chat_request(self, prompt: str, json_format: bool = False, max_tokens: Optional[int] = None) -> Dict:
+        """Build the keyword arguments of a chat request for a prompt."""
+        request = {
+            "model": config["ollama"]["model"],
+            "messages": [
+                {
+                    "role": "system",
+                    "content": self.system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": prompt
                 }
-                parent_class['methods'].append(method_dict)
-            else:
-                # Recurse into child nodes
-                for child in node.children:
-                    walk(child, parent_class=parent_class)
+            ],
+            "options": {
+                "timeout": config["ollama"]["timeout"],
+                "temperature": config["ollama"]["temperature"],
+                "top_p": config["ollama"]["top_p"],
+                # A constant context size, a different num_ctx would reload the model
+                "num_ctx": self.context_window
+            }
+        }
+        max_tokens = max_tokens or self.max_tokens
+        if max_tokens:
+            request["options"]["num_predict"] = max_tokens
+        if self.keep_alive() is not None:
+            request["keep_alive"] = self.keep_alive()
+        if json_format:
+            request["format"] = "json"
+        elif self.stream:
+            # JSON answers are only usable whole, Javadoc answers can be cut off once complete
+            request["stream"] = True
+        return request
 
-        walk(root_node)
-        return classes
+    @staticmethod
+    def parse_chat_response(response) -> Optional[str]:
+        """Extract the message content of a chat response."""
+        if response and 'message' in response:
+            log.log(MEMBER_LEVEL, "Received response from LLM: {}", response['message']['content'])
+            return response['message']['content']
+        log.error(f"Invalid response format from LLM: {response}")
+        return None
+
+    def extract_members(self, java_code: str) -> List[Member]:
+        """
+        Parse Java code once into a table of its classes and methods.
+
+        Args:
+            java_code (str): The original Java code.
+
+        Returns:
+            List[Member]: Types and their methods in source order, each type before its methods.
+        """
+        with metrics.timer("parse_seconds"):
+            return extract_members(self.parser, java_code)
 
     def is_ollama_installed(self) -> bool:
         """Check if Ollama is installed."""
@@ -0,0 +1,156 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+
+from src.logger import log
+from src.manifest import hash_bytes
+
+class Journal:
+    """Append-only checkpoint journal of the files and members completed by a run.
+
+    Every completed file and every generated member Javadoc is appended as one
+    JSON line with the hash of its result, so an interrupted run can be resumed:
+    finished files are skipped and the comments already paid for are reused.
+    """
+
+    def __init__(self, path: Path, repo_dir: Path, resume: bool = False, read_only: bool = False):
+        """
+        Open the journal, replaying it when resuming and starting a new one otherwise.
+
+        Args:
+            path (Path): Location of the JSON lines file.
+            repo_dir (Path): Repository root, entries use paths relative to it.
+            resume (bool): Load the entries of the previous run instead of discarding them.
+            read_only (bool): Leave the journal file untouched, for runs that do not write to
+                the tree (dry runs), so the resume state of an interrupted run survives them.
+        """
+        self.path = path
+        self.repo_dir = repo_dir
+        self.read_only = read_only
+        self.lock = threading.Lock()
+        self.files: Dict[str, Dict] = {}
+        self.members: Dict[str, Dict[str, str]] = {}
+        # Members whose Javadoc could not be generated, with the reason, until they succeed
+        self.failures: Dict[str, Dict[str, str]] = {}
+        self.file: Optional[TextIO] = None
+        if not read_only:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            self.load()
+        elif not read_only:
+            path.write_text("", encoding="utf-8")
+
+    def load(self):
+        """Rebuild the completed files and members from the journal, ignoring a torn last line."""
+        try:
+            with self.path.open("r", encoding="utf-8") as file:
+                lines = file.readlines()
+        except OSError:
+            return
+        if lines and not lines[-1].endswith("\n"):
+            # Terminate a line torn by a crash so new entries start on their own line
+            self.append_line("\n")
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("type") == "file":
+                self.files[entry["path"]] = entry
+            elif entry.get("type") == "member" and entry["hash"] == hash_bytes(entry["javadoc"].encode("utf-8")):
+                self.members.setdefault(entry["path"], {})[entry["member"]] = entry["javadoc"]
+                self.failures.get(entry["path"], {}).pop(entry["member"], None)
+            elif entry.get("type") == "failure":
+                self.failures.setdefault(entry["path"], {})[entry["member"]] = entry["reason"]
+        member_count = sum(len(members) for members in self.members.values())
+        failure_count = sum(len(failures) for failures in self.failures.values())
+        log.info(
+            f"Resuming from journal: {len(self.files)} files and {member_count} members already completed, "
+            f"{failure_count} members failed"
+        )
+
+    def key(self, file_path: Path) -> str:
+        """Return the journal key of a file (its path relative to the repository)."""
+        try:
+            return file_path.relative_to(self.repo_dir).as_posix()
+        except ValueError:
+            return file_path.as_posix()
+
+    def is_completed(self, file_path: Path, content: Optional[bytes] = None) -> bool:
+        """
+        Check whether a file was completed by a previous run and left untouched since.
+
+        The size and modification time are compared first, the content hash
+        decides when only the timestamp moved.
+        """
+        entry = self.files.get(self.key(file_path))
+        if entry is None:
+            return False
+        stat = file_path.stat()
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return True
+        return content is not None and entry["hash"] == hash_bytes(content)
+
+    def javadoc(self, file_path: Path, member_hash: str) -> Optional[str]:
+        """Return the Javadoc journaled for a member of a file, if any."""
+        return self.members.get(self.key(file_path), {}).get(member_hash)
+
+    def failed_members(self, file_path: Path) -> Dict[str, str]:
+        """Return the members of a file whose Javadoc failed in the journaled run, with the reasons."""
+        return self.failures.get(self.key(file_path), {})
+
+    def failed_files(self) -> List[str]:
+        """Return the journal keys of the files with failed members."""
+        return [key for key, failures in self.failures.items() if failures]
+
+    def record_file(self, file_path: Path, content: bytes):
+        """Append the completion of a file, with the hash of its final content."""
+        stat = file_path.stat()
+        self.append({
+            "type": "file",
+            "path": self.key(file_path),
+            "hash": hash_bytes(content),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        })
+
+    def record_member(self, file_path: Path, member_hash: str, javadoc: str):
+        """Append the Javadoc generated for a member of a file."""
+        self.append({
+            "type": "member",
+            "path": self.key(file_path),
+            "member": member_hash,
+            "hash": hash_bytes(javadoc.encode("utf-8")),
+            "javadoc": javadoc,
+        })
+
+    def record_failure(self, file_path: Path, member_hash: str, reason: str):
+        """Append the failure of a member of a file, e.g. ``malformed`` or ``request_failed``."""
+        self.append({
+            "type": "failure",
+            "path": self.key(file_path),
+            "member": member_hash,
+            "reason": reason,
+        })
+
+    def append(self, entry: Dict):
+        """Append an entry and flush it, so it survives the process being killed."""
+        self.append_line(json.dumps(entry) + "\n")
+
+    def append_line(self, line: str):
+        """Append raw text to the journal file and flush it."""
+        if self.read_only:
+            return
+        with self.lock:
+            if self.file is None:
+                self.file = self.path.open("a", encoding="utf-8")
+            self.file.write(line)
+            self.file.flush()
+
+    def close(self):
+        """Close the journal file, later entries reopen it."""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -3,6 +3,11 @@ import sys
 from pathlib import Path
 from src.config import config, LOG_DIR
 
+# Per-member lines (prompts, responses, inserted comments) are demoted to TRACE in the
+# compact mode, where a single structured line summarizes each file instead
+COMPACT_LOGS = config["logging"].get("mode", "compact") == "compact"
+MEMBER_LEVEL = "TRACE" if COMPACT_LOGS else "DEBUG"
+
 def setup_logger():
     """Configure loguru logger with rotation and custom format."""
     # Remove default handler
@@ -16,7 +21,8 @@ def setup_logger():
         colorize=True,
     )
     
-    # Add file handler with rotation
+    # Add file handler with rotation, written from a background thread (enqueue)
+    # so workers never wait on log I/O
     log_file = LOG_DIR / "java_doc_ai.log"
     logger.add(
         log_file,
@@ -25,6 +31,7 @@ def setup_logger():
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
         level=config["logging"]["level"],
         compression="zip",
+        enqueue=config["logging"].get("enqueue", True),
     )
     
     return logger
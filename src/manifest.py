@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+from src.logger import log
+
+def hash_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of some bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+def hash_member(member_type: str, signature: str) -> str:
+    """Return the hash identifying a member by its kind and signature."""
+    return hashlib.sha256(f"{member_type}\0{signature}".encode("utf-8")).hexdigest()[:16]
+
+def save_auxiliary_section(path: Path, key: str, value):
+    """
+    Atomically replace one top-level section of the auxiliary JSON file.
+
+    The file is read again before writing, so sections saved by others since it
+    was loaded (the manifest, the symbol index) are preserved.
+    """
+    data: Dict = {}
+    if path.is_file():
+        try:
+            with path.open("r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            log.warning(f"Could not read {path}, rewriting it: {e}")
+    data[key] = value
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{key}.tmp")
+    with temp_path.open("w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(temp_path, path)
+
+class Manifest:
+    """Record of file content hashes and member signature hashes from previous runs.
+
+    The manifest is stored under the ``manifest`` key of the auxiliary JSON file,
+    other top-level keys of that file are preserved when it is saved.
+    """
+
+    def __init__(self, path: Path, repo_dir: Path):
+        """Load the manifest from the auxiliary file, starting empty if it does not exist."""
+        self.path = path
+        self.repo_dir = repo_dir
+        self.lock = threading.Lock()
+        self.data: Dict = {}
+        if path.is_file():
+            try:
+                with path.open("r", encoding="utf-8") as file:
+                    self.data = json.load(file)
+            except (OSError, ValueError) as e:
+                log.warning(f"Could not read manifest {path}, starting from scratch: {e}")
+        self.files: Dict[str, Dict] = self.data.setdefault("manifest", {})
+        self.seen: Set[str] = set()
+        self.staged: Dict[str, Set[str]] = {}
+
+    def key(self, file_path: Path) -> str:
+        """Return the manifest key of a file (its path relative to the repository)."""
+        try:
+            return file_path.relative_to(self.repo_dir).as_posix()
+        except ValueError:
+            return file_path.as_posix()
+
+    def mark_seen(self, file_path: Path):
+        """Keep the entry of a file visited in this run from being pruned."""
+        with self.lock:
+            self.seen.add(self.key(file_path))
+
+    def is_unchanged(self, file_path: Path, content: Optional[bytes] = None) -> bool:
+        """
+        Check whether a file is identical to the last recorded run.
+
+        The size and modification time are compared first so unchanged files are
+        not read at all, the content hash decides when only the timestamp moved.
+        """
+        key = self.key(file_path)
+        with self.lock:
+            self.seen.add(key)
+            entry = self.files.get(key)
+        if entry is None:
+            return False
+        stat = file_path.stat()
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return True
+        if content is None:
+            return False
+        if entry["hash"] != hash_bytes(content):
+            return False
+        with self.lock:
+            entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def member_hashes(self, file_path: Path) -> Set[str]:
+        """Return the member hashes recorded for a file in the last run."""
+        with self.lock:
+            entry = self.files.get(self.key(file_path))
+            return set(entry["members"]) if entry else set()
+
+    def stage_members(self, file_path: Path, members: Iterable[str]):
+        """Remember the member hashes of a file until its final content is recorded."""
+        with self.lock:
+            self.staged[self.key(file_path)] = set(members)
+
+    def add_staged_members(self, file_path: Path, members: Iterable[str]):
+        """Add member hashes to those staged for a file, e.g. once their Javadoc is generated."""
+        with self.lock:
+            self.staged.setdefault(self.key(file_path), set()).update(members)
+
+    def record(self, file_path: Path, content: bytes):
+        """Record the final content of a processed file along with its staged member hashes."""
+        key = self.key(file_path)
+        stat = file_path.stat()
+        with self.lock:
+            members = self.staged.pop(key, None)
+            if members is None:
+                members = self.files.get(key, {}).get("members", [])
+            self.files[key] = {
+                "hash": hash_bytes(content),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "members": sorted(members),
+            }
+
+    def save(self, prune: bool = False):
+        """
+        Atomically write the manifest back to the auxiliary file.
+
+        Args:
+            prune (bool): Drop entries of files not seen in this run (only valid after a full walk).
+        """
+        with self.lock:
+            if prune:
+                for key in set(self.files) - self.seen:
+                    del self.files[key]
+            save_auxiliary_section(self.path, "manifest", self.files)
+
+def git_changed_files(repo_dir: Path, revision_range: str) -> Set[Path]:
+    """
+    List the Java files added or modified in a git revision range.
+
+    Args:
+        repo_dir (Path): Repository (or sub-directory of one) to inspect.
+        revision_range (str): Anything ``git diff`` accepts, e.g. ``HEAD~5`` or ``main...feature``.
+
+    Returns:
+        Set[Path]: Absolute paths of the changed Java files that still exist.
+    """
+    result = subprocess.run(
+        ["git", "-C", str(repo_dir), "diff", "--name-only", "--relative", "--diff-filter=ACMR",
+         revision_range, "--", "*.java"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    changed = set()
+    for line in result.stdout.splitlines():
+        if line.strip():
+            path = repo_dir / line.strip()
+            if path.is_file():
+                changed.add(path)
+    return changed
@@ -0,0 +1,222 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from tree_sitter import Language, Parser
+
+# Built by build_parsers.py
+JAVA_LIBRARY = 'build/java-languages.so'
+
+# Tree-sitter node types that hold comments (older grammars use a single type)
+COMMENT_NODE_TYPES = ('comment', 'block_comment', 'line_comment')
+
+# Type declarations, all documented as 'class'
+TYPE_DECLARATIONS = (
+    'class_declaration', 'interface_declaration', 'enum_declaration', 'record_declaration',
+    'annotation_type_declaration',
+)
+
+# Member declarations and their kind in the member table
+MEMBER_KINDS = {
+    'method_declaration': 'method',
+    'annotation_type_element_declaration': 'method',
+    'constructor_declaration': 'constructor',
+    'compact_constructor_declaration': 'constructor',
+    'enum_constant': 'enum_constant',
+    'field_declaration': 'field',
+    'constant_declaration': 'field',
+}
+
+# Member declarations named by their first variable declarator
+FIELD_DECLARATIONS = ('field_declaration', 'constant_declaration')
+
+# Every kind of the member table, types being 'class'
+ALL_MEMBER_KINDS = ('class', 'method', 'constructor', 'enum_constant', 'field')
+
+# Captures every declaration in a single pass, in document order, with the
+# initializer blocks of types, whose local classes are not members, and the
+# comments that may document a declaration
+MEMBER_QUERY = (
+    "[" + " ".join(f"({node})" for node in TYPE_DECLARATIONS) + "] @type\n"
+    "[" + " ".join(f"({node})" for node in MEMBER_KINDS) + "] @member\n"
+    "(class_body [(block) (static_initializer)] @scope)\n"
+    "(enum_body_declarations [(block) (static_initializer)] @scope)\n"
+    "[" + " ".join(f"({node})" for node in COMMENT_NODE_TYPES[1:]) + "] @comment"
+)
+
+@lru_cache(maxsize=None)
+def java_language() -> Language:
+    """Load the Java grammar from the built language library, once per process."""
+    return Language(JAVA_LIBRARY, 'java')
+
+@lru_cache(maxsize=None)
+def member_query():
+    """Compile the declaration query, once per process."""
+    return java_language().query(MEMBER_QUERY)
+
+class Member:
+    """A documentable declaration of a Java file.
+
+    Files are parsed once into a flat table of members in source order, which
+    planning, prompting, validation and insertion all read from.
+    """
+
+    __slots__ = (
+        "kind", "name", "signature", "start_byte", "end_byte", "start_line", "has_javadoc", "class_signature"
+    )
+
+    def __init__(
+        self,
+        kind: str,
+        name: Optional[str],
+        signature: str,
+        start_byte: int,
+        end_byte: int,
+        start_line: int,
+        has_javadoc: bool,
+        class_signature: str
+    ):
+        """
+        Args:
+            kind (str): 'class' for type declarations, 'method', 'constructor', 'enum_constant' or 'field'.
+            name (Optional[str]): Declared name.
+            signature (str): Declaration without its body.
+            start_byte (int): Offset of the declaration in the UTF-8 source.
+            end_byte (int): Offset of the end of the declaration in the UTF-8 source.
+            start_line (int): 0-based line of the declaration.
+            has_javadoc (bool): Whether a Javadoc comment already documents it.
+            class_signature (str): Signature of the type the member belongs to (its own for types).
+        """
+        self.kind = kind
+        self.name = name
+        self.signature = signature
+        self.start_byte = start_byte
+        self.end_byte = end_byte
+        self.start_line = start_line
+        self.has_javadoc = has_javadoc
+        self.class_signature = class_signature
+
+    def __repr__(self) -> str:
+        return f"Member({self.kind} {self.name!r} at line {self.start_line + 1})"
+
+def has_javadoc_above(node, source: bytes) -> bool:
+    """
+    Check if a Javadoc comment already documents a declaration node.
+
+    Comments are found through the sibling nodes of the declaration, so
+    blank lines and annotations between the comment and the declaration
+    do not hide it.
+
+    Args:
+        node: Tree-sitter node of a class or method declaration.
+        source (bytes): Source code the tree was parsed from.
+
+    Returns:
+        bool: True if a Javadoc comment precedes the declaration, False otherwise.
+    """
+    def is_javadoc(comment_node) -> bool:
+        text = source[comment_node.start_byte:comment_node.end_byte]
+        return text.startswith(b'/**') and text != b'/**/'
+
+    # A comment placed between annotations ends up inside the modifiers node
+    for child in node.children:
+        if child.type == 'modifiers':
+            if any(c.type in COMMENT_NODE_TYPES and is_javadoc(c) for c in child.children):
+                return True
+            break
+
+    sibling = node.prev_sibling
+    while sibling is not None and sibling.type in COMMENT_NODE_TYPES:
+        if is_javadoc(sibling):
+            return True
+        sibling = sibling.prev_sibling
+    return False
+
+def extract_members(parser: Parser, java_code: str) -> List[Member]:
+    """
+    Parse Java code once into a table of its types and their members.
+
+    Declarations are found by a precompiled query rather than by walking the
+    tree in Python. Captures come in document order, so a stack of the
+    enclosing declarations is enough to attach each member to its type and
+    to leave out the declarations of method bodies, initializers and enum
+    constant bodies (local and anonymous classes).
+
+    Args:
+        parser (Parser): Tree-sitter parser for Java, owned by the calling thread or process.
+        java_code (str): The original Java code.
+
+    Returns:
+        List[Member]: Types and their members in source order, each type before its members.
+    """
+    # Same bytes as the file on disk (see src.source), so offsets can be spliced directly
+    source = java_code.encode("utf-8", "surrogateescape")
+    tree = parser.parse(source)
+    members: List[Member] = []
+
+    def text(start: int, end: int) -> str:
+        return source[start:end].decode("utf8", errors="replace")
+
+    def is_javadoc(start: int, end: int) -> bool:
+        return source.startswith(b'/**', start) and end - start > 4
+
+    # Enclosing declarations as (end byte, type signature or None for members and scopes)
+    enclosing: List[Tuple[int, Optional[str]]] = []
+    # Run of comments separated by whitespace only: its end and whether it holds a Javadoc
+    comments_end, comments_javadoc = -1, False
+    # End of the signature of the last member
+    signature_end = -1
+    for node, capture in member_query().captures(tree.root_node):
+        start_byte, end_byte = node.start_byte, node.end_byte
+        while enclosing and enclosing[-1][0] <= start_byte:
+            enclosing.pop()
+        if capture == 'comment':
+            javadoc = is_javadoc(start_byte, end_byte)
+            if comments_end >= 0 and not source[comments_end:start_byte].strip():
+                comments_javadoc = comments_javadoc or javadoc
+            else:
+                comments_javadoc = javadoc
+            comments_end = end_byte
+            if javadoc and members and members[-1].start_byte < start_byte < signature_end:
+                # A comment placed between annotations ends up inside the modifiers node
+                parent = node.parent
+                if parent is not None and parent.type == 'modifiers' and parent.start_byte == members[-1].start_byte:
+                    members[-1].has_javadoc = True
+            continue
+        class_signature = enclosing[-1][1] if enclosing else None
+        if enclosing and class_signature is None:
+            # Inside a member body
+            continue
+        if capture == 'scope':
+            enclosing.append((end_byte, None))
+            continue
+        if capture == 'member' and class_signature is None:
+            continue
+
+        node_type = node.type
+        declarator = node.child_by_field_name('declarator') if node_type in FIELD_DECLARATIONS else None
+        if declarator is not None:
+            name = declarator.child_by_field_name('name')
+            value = declarator.child_by_field_name('value')
+            # Exclude the initializer and the semicolon
+            end = value.start_byte if value is not None else end_byte - 1
+        else:
+            name = node.child_by_field_name('name')
+            body = node.child_by_field_name('body')
+            end = body.start_byte if body is not None else end_byte
+        signature = text(start_byte, end).strip()
+        if capture == 'type':
+            kind = 'class'
+            class_signature = signature
+        else:
+            kind = MEMBER_KINDS[node_type]
+            if kind == 'field':
+                signature = signature.rstrip('=').rstrip()
+        # Same rule as has_javadoc_above: comments and whitespace only between the Javadoc and the declaration
+        documented = comments_javadoc and 0 <= comments_end <= start_byte and not source[comments_end:start_byte].strip()
+        members.append(Member(
+            kind, text(name.start_byte, name.end_byte) if name is not None else None, signature,
+            start_byte, end_byte, node.start_point[0], documented, class_signature
+        ))
+        signature_end = end
+        enclosing.append((end_byte, signature if capture == 'type' else None))
+    return members
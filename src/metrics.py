@@ -0,0 +1,208 @@
+import json
+import time
+import bisect
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# Upper bounds in seconds of the histogram buckets, from parsing a file to a long generation
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+PREFIX = "javadocai_"
+
+# Help texts of the metrics, also the order of the summary table
+DESCRIPTIONS = {
+    "files_processed_total": "Java files processed successfully",
+    "files_failed_total": "Java files whose processing failed",
+    "prompts_total": "Chat requests sent to Ollama, retries included",
+    "request_failures_total": "Chat requests that failed before an answer",
+    "cache_hits_total": "Javadocs served from the persistent cache",
+    "cache_misses_total": "Cache lookups that fell through to the LLM",
+    "inherited_javadocs_total": "Overriding methods documented from the method they override",
+    "templated_javadocs_total": "Trivial members documented locally from a template",
+    "prompt_tokens_total": "Prompt tokens evaluated by Ollama (prompt_eval_count)",
+    "generated_tokens_total": "Tokens generated by Ollama (eval_count, estimated for streams stopped early)",
+    "streams_stopped_total": "Streamed answers cut off once their Javadoc was complete",
+    "deferred_members_total": "Members left for the next run once the deadline or token budget was reached",
+    "validation_failures_total": "LLM answers rejected as malformed Javadoc or JSON",
+    "javadoc_repairs_total": "LLM answers whose Javadoc was recovered from surrounding text",
+    "generation_retries_total": "Requests repeated after a malformed answer",
+    "generation_failures_total": "Members left without a Javadoc, journaled for --retry-failed",
+    "bytes_written_total": "Bytes written by the output writer",
+    "parse_seconds": "Time to parse a file into its member table",
+    "index_seconds": "Time to build the repository symbol index",
+    "request_queue_seconds": "Time a request waited for a free endpoint or in-flight slot",
+    "request_seconds": "Chat request latency seen by the client",
+    "server_queue_seconds": "Request latency not spent in the model (network and Ollama queue)",
+    "load_seconds": "Model load time reported by Ollama",
+    "prefill_seconds": "Prompt evaluation time reported by Ollama",
+    "generation_seconds": "Token generation time reported by Ollama",
+    "write_seconds": "Time to write the output of a file",
+}
+
+class Histogram:
+    """Cumulative bucket histogram in the Prometheus model."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside its bucket, None without observations."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+class Metrics:
+    """Thread-safe registry of the counters and histograms of a run."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def reset(self):
+        """Forget every value, e.g. between benchmark runs."""
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def inc(self, name: str, value: float = 1):
+        """Increase a counter."""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        """Add an observation to a histogram."""
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Observe the wall-clock time of a block in a histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def record_chat(self, response, elapsed: float):
+        """
+        Record a chat response: the client latency and the token counts and
+        durations Ollama reports, splitting the time between queueing, model
+        load, prefill and generation.
+
+        Args:
+            response: Chat response (a final streamed chunk works too).
+            elapsed (float): Seconds between sending the request and the answer.
+        """
+        self.observe("request_seconds", elapsed)
+        if not response:
+            return
+        self.inc("prompt_tokens_total", response.get("prompt_eval_count") or 0)
+        self.inc("generated_tokens_total", response.get("eval_count") or 0)
+        # Durations are reported in nanoseconds
+        for key, name in (
+            ("load_duration", "load_seconds"),
+            ("prompt_eval_duration", "prefill_seconds"),
+            ("eval_duration", "generation_seconds"),
+        ):
+            if response.get(key):
+                self.observe(name, response[key] / 1e9)
+        if response.get("total_duration"):
+            self.observe("server_queue_seconds", max(0.0, elapsed - response["total_duration"] / 1e9))
+
+    def to_json(self) -> Dict:
+        """Return the metrics as a JSON-serializable dictionary."""
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "p50": histogram.quantile(0.50),
+                        "p95": histogram.quantile(0.95),
+                        "p99": histogram.quantile(0.99),
+                        "buckets": dict(zip(map(str, histogram.buckets + ["+Inf"]), histogram.counts)),
+                    }
+                    for name, histogram in self.histograms.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                metric = PREFIX + name
+                lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value:g}")
+            for name, histogram in sorted(self.histograms.items()):
+                metric = PREFIX + name
+                lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f"{metric}_sum {histogram.sum:g}")
+                lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Path):
+        """Write the metrics to a file, as JSON for a .json suffix and Prometheus text otherwise."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".json":
+            content = json.dumps(self.to_json(), indent=2) + "\n"
+        else:
+            content = self.to_prometheus()
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_text(content, encoding="utf-8")
+        temp_path.replace(path)
+
+    def summary_table(self) -> str:
+        """Format the end-of-run summary: counters, then count, total and percentiles of each histogram."""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+        order = list(DESCRIPTIONS)
+        rank = lambda name: order.index(name) if name in order else len(order)
+        lines = [f"{'metric':<28} {'value':>12}"]
+        for name in sorted(counters, key=rank):
+            lines.append(f"{name:<28} {counters[name]:>12g}")
+        if histograms:
+            lines.append("")
+            lines.append(f"{'timing (seconds)':<28} {'count':>8} {'total':>10} {'p50':>8} {'p95':>8} {'p99':>8}")
+            for name in sorted(histograms, key=rank):
+                histogram = histograms[name]
+                quantiles = [histogram.quantile(q) for q in (0.50, 0.95, 0.99)]
+                lines.append(
+                    f"{name:<28} {histogram.count:>8} {histogram.sum:>10.3f} "
+                    + " ".join(f"{q:>8.3f}" for q in quantiles)
+                )
+        return "\n".join(lines)
+
+# Metrics of the current process, shared like the config and the logger
+metrics = Metrics()
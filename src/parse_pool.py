@@ -0,0 +1,77 @@
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from tree_sitter import Parser
+
+from src.members import Member, extract_members, java_language
+from src.source import read_source
+
+# Result of parsing a file in a worker process: its path, code and member table
+ParsedFile = Tuple[Path, Optional[str], Optional[List[Member]]]
+
+_parser = None
+
+def _initialize_worker():
+    """Create the tree-sitter parser of a worker process, which only loads the grammar and the extractor."""
+    global _parser
+    _parser = Parser()
+    _parser.set_language(java_language())
+
+def parse_file(file_path: Path) -> ParsedFile:
+    """
+    Read and parse a Java file in a worker process.
+
+    Only the picklable member table travels back to the main process, the
+    syntax tree never leaves the worker.
+
+    Returns:
+        ParsedFile: The path, the code (None if unreadable) and the member table.
+    """
+    try:
+        java_code = read_source(file_path)
+    except Exception:
+        return file_path, None, None
+    return file_path, java_code, extract_members(_parser, java_code)
+
+class ParsePool:
+    """Pool of worker processes that parse Java files into member tables.
+
+    CPU-bound parsing scales across cores without holding the GIL of the main
+    process, where the LLM dispatch keeps running.
+    """
+
+    def __init__(self, processes: int):
+        """Start the worker processes."""
+        self.processes = processes
+        self.executor = ProcessPoolExecutor(
+            max_workers=processes,
+            # Spawned workers do not inherit the locks of the main process threads
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize_worker
+        )
+
+    def imap(self, file_paths: Iterable[Path]) -> Iterator[ParsedFile]:
+        """
+        Parse files in the worker processes and yield results as they complete.
+
+        At most a few files per process are in flight, so the input can be a
+        lazy discovery stream.
+        """
+        limit = self.processes * 4
+        pending: Set[Future] = set()
+        for file_path in file_paths:
+            pending.add(self.executor.submit(parse_file, file_path))
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    def close(self):
+        """Stop the worker processes."""
+        self.executor.shutdown(cancel_futures=True)
@@ -0,0 +1,175 @@
+import re
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from src.logger import log
+from src.members import Member
+
+# Priority tiers of members, documented in this order
+PUBLIC, PROTECTED, PRIVATE = 0, 1, 2
+
+# Directories and class name suffixes of test sources, documented last
+TEST_DIRECTORIES = ('test', 'tests')
+TEST_SUFFIXES = ('Test', 'Tests', 'IT', 'TestCase')
+
+ANNOTATION = re.compile(r'@[\w.]+(\s*\([^)]*\))?')
+
+def modifiers(signature: str) -> List[str]:
+    """Return the words of a signature before its parameters or body, annotations removed."""
+    return re.split(r'[({]', ANNOTATION.sub(' ', signature), maxsplit=1)[0].split()
+
+def visibility(signature: str) -> int:
+    """Return the tier of the access modifier of a signature."""
+    words = modifiers(signature)
+    if 'public' in words:
+        return PUBLIC
+    if 'protected' in words:
+        return PROTECTED
+    return PRIVATE
+
+def member_tier(member: Member) -> int:
+    """
+    Return the priority tier of a member: public API first, then protected members,
+    then the rest. A member never ranks above the type declaring it, and the
+    members of interfaces and annotation types are public unless declared private.
+    """
+    type_tier = visibility(member.class_signature)
+    if member.kind in ('class', 'enum_constant'):
+        return type_tier
+    tier = visibility(member.signature)
+    if re.search(r'\binterface\b', member.class_signature.split('{', 1)[0]):
+        tier = PRIVATE if 'private' in modifiers(member.signature) else PUBLIC
+    return max(tier, type_tier)
+
+def is_test_source(file_path: Path, repo_dir: Path) -> bool:
+    """Check whether a Java file is a test, by its directory in the repository (``src/test``) or class name."""
+    try:
+        directories = file_path.relative_to(repo_dir).parts[:-1]
+    except ValueError:
+        directories = ()
+    return any(part in TEST_DIRECTORIES for part in directories) or file_path.stem.endswith(TEST_SUFFIXES)
+
+class PlannedFile:
+    """A parsed file of a run in the "priority" order, documented over several request passes.
+
+    Its pending members are grouped by tier, each group is requested in the pass of
+    its tier and the file is written once the last of its groups is settled.
+    """
+
+    def __init__(self, file_path: Path, original_code: str, pending: Optional[Iterable[Member]], repo_dir: Path):
+        """
+        Args:
+            file_path (Path): Path to the Java file.
+            original_code (str): Code read from the file.
+            pending (Optional[Iterable[Member]]): Members still needing a Javadoc, None if the
+                file could not be planned.
+            repo_dir (Path): Root of the repository, to tell test sources apart.
+        """
+        self.file_path = file_path
+        self.original_code = original_code
+        self.test = is_test_source(file_path, repo_dir)
+        self.groups: Dict[int, List[Member]] = {}
+        for member in pending or []:
+            self.groups.setdefault(member_tier(member), []).append(member)
+        self.remaining = len(self.groups)
+        self.insertions: List[Tuple[Member, str]] = []
+        self.failed = pending is None
+        self.lock = threading.Lock()
+
+    def settle(self, insertions: Optional[List[Tuple[Member, str]]]) -> bool:
+        """
+        Add the Javadocs of one group of members, None if the group failed.
+
+        Returns:
+            bool: True once every group of the file is settled.
+        """
+        with self.lock:
+            if insertions is None:
+                self.failed = True
+            else:
+                self.insertions.extend(insertions)
+            self.remaining -= 1
+            return self.remaining == 0
+
+def request_passes(files: Iterable[PlannedFile]) -> List[List[Tuple[PlannedFile, List[Member]]]]:
+    """
+    Split the pending members of the planned files of a run into request passes.
+
+    Sources come before tests and, within each, public members of every file before
+    protected ones, then the rest. A pass starts once the previous one is complete,
+    so a run cut short by its deadline or token budget has documented the most
+    valuable members of the whole repository, whichever file declares them.
+
+    Returns:
+        List[List[Tuple[PlannedFile, List[Member]]]]: The groups of members of each pass, in order.
+    """
+    passes: Dict[Tuple[bool, int], List[Tuple[PlannedFile, List[Member]]]] = {}
+    for planned in files:
+        for tier, members in planned.groups.items():
+            passes.setdefault((planned.test, tier), []).append((planned, members))
+    return [passes[key] for key in sorted(passes)]
+
+class RunBudget:
+    """Wall-clock deadline and token budget of a run.
+
+    Once either is reached no new LLM request starts: files in progress are
+    written with the members documented so far but not marked completed, and
+    no further file is queued, so a partial run ends cleanly and ``--resume``
+    continues it. Requests already in flight are completed, so the token
+    budget can be exceeded by their answers.
+    """
+
+    def __init__(self, deadline_minutes: Optional[float] = None, max_tokens: Optional[int] = None):
+        """
+        Args:
+            deadline_minutes (Optional[float]): Minutes after the start of the run when requests
+                stop, None or 0 for no deadline.
+            max_tokens (Optional[int]): Prompt and generated tokens after which requests stop,
+                None or 0 for no budget.
+        """
+        self.deadline = deadline_minutes * 60 if deadline_minutes else None
+        self.max_tokens = max_tokens or None
+        self.tokens = 0
+        self.started = time.monotonic()
+        self.reason: Optional[str] = None
+        self.lock = threading.Lock()
+
+    @property
+    def limited(self) -> bool:
+        """Whether the run has a deadline or a token budget."""
+        return self.deadline is not None or self.max_tokens is not None
+
+    def start(self):
+        """Start the clock and the token count of a run."""
+        with self.lock:
+            self.started = time.monotonic()
+            self.tokens = 0
+            self.reason = None
+
+    def charge(self, response: Optional[Mapping]):
+        """Count the prompt and generated tokens of a chat response, as Ollama reported or estimated them."""
+        if self.max_tokens is None or not response:
+            return
+        with self.lock:
+            self.tokens += (response.get("prompt_eval_count") or 0) + (response.get("eval_count") or 0)
+
+    def exhausted(self) -> bool:
+        """Check whether the deadline or the token budget was reached, logging it the first time."""
+        if self.reason is not None:
+            return True
+        if not self.limited:
+            return False
+        with self.lock:
+            if self.reason is None:
+                if self.deadline is not None and time.monotonic() - self.started >= self.deadline:
+                    self.reason = "deadline"
+                elif self.max_tokens is not None and self.tokens >= self.max_tokens:
+                    self.reason = "token budget"
+                if self.reason is not None:
+                    log.warning(
+                        f"Run {self.reason} reached, finishing the files in progress without new requests "
+                        f"(continue with --resume)"
+                    )
+        return self.reason is not None
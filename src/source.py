@@ -0,0 +1,118 @@
+import re
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from src.members import Member
+
+# Bytes that are not valid UTF-8 are kept as surrogates, so files in any
+# ASCII-compatible encoding round-trip byte for byte
+SOURCE_ENCODING = "utf-8"
+SOURCE_ERRORS = "surrogateescape"
+
+# Indentation added to members moved to a line of their own, tabs in tab-indented code
+INDENT_UNIT = "    "
+
+def read_source(file_path: Path) -> str:
+    """Read a Java file without translating line endings or losing undecodable bytes."""
+    with file_path.open("r", encoding=SOURCE_ENCODING, errors=SOURCE_ERRORS, newline="") as file:
+        return file.read()
+
+def write_source(file_path: Path, java_code: str):
+    """Write Java code read with read_source back with its original bytes and line endings."""
+    with file_path.open("w", encoding=SOURCE_ENCODING, errors=SOURCE_ERRORS, newline="") as file:
+        file.write(java_code)
+
+def encode_source(java_code: str) -> bytes:
+    """Return the original bytes of Java code read with read_source (tree-sitter offsets refer to these)."""
+    return java_code.encode(SOURCE_ENCODING, SOURCE_ERRORS)
+
+def detect_newline(source: bytes) -> bytes:
+    """Return the line ending used by a source, from its first line break."""
+    index = source.find(b"\n")
+    if index > 0 and source[index - 1:index] == b"\r":
+        return b"\r\n"
+    return b"\n"
+
+def format_javadoc(comment: str, indent: str, newline: str) -> str:
+    """
+    Re-indent a Javadoc comment to sit in front of a member.
+
+    Continuation lines are normalized to the `` * `` form so comments line up
+    whatever indentation the model produced.
+    """
+    lines = comment.strip().splitlines()
+    formatted = [indent + lines[0].strip()]
+    for line in lines[1:]:
+        line = line.strip()
+        if line.startswith("*"):
+            formatted.append(f"{indent} {line}")
+        elif line:
+            formatted.append(f"{indent} * {line}")
+        else:
+            formatted.append(f"{indent} *")
+    return newline.join(formatted)
+
+def repair_javadoc(response: str) -> Optional[str]:
+    """
+    Recover the Javadoc comment of an LLM answer that does not consist of it alone.
+
+    Markdown code fences and any text around the comment are dropped, only the
+    first ``/** ... */`` block is kept, and its lines are normalized to the
+    `` * `` form.
+
+    Args:
+        response (str): Raw answer of the model.
+
+    Returns:
+        Optional[str]: The comment, or None if the answer holds no complete one.
+    """
+    text = re.sub(r'^\s*```[\w-]*[ \t]*$', '', response, flags=re.MULTILINE)
+    match = re.search(r'/\*\*(?!/).*?\*/', text, flags=re.DOTALL)
+    if match is None:
+        return None
+    return format_javadoc(match.group(0), "", "\n")
+
+def splice_javadocs(java_code: str, insertions: Sequence[Tuple[Member, str]]) -> str:
+    """
+    Insert Javadoc comments in front of their members in a single linear pass.
+
+    The output is assembled from slices of the original bytes between the
+    members' start offsets, so line endings, the trailing newline and bytes in
+    other encodings are preserved. Each comment is indented like its member;
+    a member that does not start its line (an inline enum constant, a one-line
+    class) is moved to a new line below the comment, one level deeper than the
+    line it was on.
+
+    Args:
+        java_code (str): Original Java code, as read with read_source.
+        insertions (Sequence[Tuple[Member, str]]): Members paired with the comment to insert.
+
+    Returns:
+        str: The updated Java code.
+    """
+    source = encode_source(java_code)
+    newline = detect_newline(source)
+    text_newline = newline.decode("ascii")
+    chunks: List[bytes] = []
+    position = 0
+
+    for member, comment in sorted(insertions, key=lambda insertion: insertion[0].start_byte):
+        line_start = source.rfind(b"\n", 0, member.start_byte) + 1
+        prefix = source[line_start:member.start_byte]
+        if prefix.strip():
+            # Something precedes the member on its line: break the line before the member
+            indent = prefix[:len(prefix) - len(prefix.lstrip())].decode(SOURCE_ENCODING, SOURCE_ERRORS)
+            indent += "\t" if "\t" in indent else INDENT_UNIT
+            javadoc = format_javadoc(comment, indent, text_newline).encode(SOURCE_ENCODING, SOURCE_ERRORS)
+            chunks.append(source[position:member.start_byte].rstrip(b" \t"))
+            chunks.append(newline + javadoc + newline + indent.encode(SOURCE_ENCODING, SOURCE_ERRORS))
+            position = member.start_byte
+        else:
+            indent = prefix.decode(SOURCE_ENCODING, SOURCE_ERRORS)
+            javadoc = format_javadoc(comment, indent, text_newline).encode(SOURCE_ENCODING, SOURCE_ERRORS)
+            chunks.append(source[position:line_start])
+            chunks.append(javadoc + newline)
+            position = line_start
+
+    chunks.append(source[position:])
+    return b"".join(chunks).decode(SOURCE_ENCODING, SOURCE_ERRORS)
@@ -0,0 +1,96 @@
+import time
+from typing import Dict, List, Mapping, Optional
+
+JAVADOC_START = "/**"
+JAVADOC_END = "*/"
+
+class StreamedAnswer:
+    """A chat answer assembled from the chunks of a streamed request.
+
+    Chunks are added as they arrive, and the answer tells when its first
+    Javadoc block is closed, so the request can be cut off before the model
+    goes on with explanations nobody reads.
+    """
+
+    def __init__(self, prompt_tokens: int = 0):
+        """
+        Args:
+            prompt_tokens (int): Estimated tokens of the prompt, reported for an answer cut off
+                before Ollama sent its statistics.
+        """
+        self.prompt_tokens = prompt_tokens
+        self.started = time.perf_counter()
+        self.first_chunk: Optional[float] = None
+        self.last_chunk: Optional[float] = None
+        self.parts: List[str] = []
+        self.length = 0
+        self.chunks = 0
+        # Offset of the opening /** in the content, -1 until it arrives
+        self.javadoc_start = -1
+        self.javadoc_closed = False
+        self.final: Optional[Mapping] = None
+        self.tail = ""
+
+    @property
+    def content(self) -> str:
+        return "".join(self.parts)
+
+    def add(self, chunk: Mapping) -> bool:
+        """
+        Add a streamed chunk to the answer.
+
+        Args:
+            chunk (Mapping): A chunk of the chat stream, the last one carries ``done`` and the statistics.
+
+        Returns:
+            bool: True once the answer is complete: the stream is done or a Javadoc block was closed.
+        """
+        self.chunks += 1
+        self.last_chunk = time.perf_counter()
+        if self.first_chunk is None:
+            self.first_chunk = self.last_chunk
+        piece = (chunk.get("message") or {}).get("content") or ""
+        if piece:
+            # Markers may be split over chunks, keep the end of the previous ones in view
+            window = self.tail + piece
+            offset = self.length - len(self.tail)
+            self.parts.append(piece)
+            self.length += len(piece)
+            if self.javadoc_start < 0:
+                index = window.find(JAVADOC_START)
+                if index >= 0:
+                    self.javadoc_start = offset + index
+            if self.javadoc_start >= 0 and not self.javadoc_closed:
+                # The closing */ cannot share the star of the opening /** (as in /**/)
+                search_from = max(self.javadoc_start + len(JAVADOC_START) - offset, 0)
+                self.javadoc_closed = window.find(JAVADOC_END, search_from) >= 0
+            self.tail = window[-(len(JAVADOC_START) + 1):]
+        if chunk.get("done"):
+            self.final = chunk
+        return self.final is not None or self.javadoc_closed
+
+    @property
+    def stopped_early(self) -> bool:
+        """Whether the answer is complete before the end of the stream."""
+        return self.final is None and self.javadoc_closed
+
+    def response(self) -> Dict:
+        """
+        Return the answer in the form of a non-streamed chat response.
+
+        The statistics are those of the final chunk. An answer cut off early has
+        none: its prompt token count is the estimate it was given, its generated
+        token count is estimated from the chunks received (Ollama streams about
+        one token per chunk), and the time to the first chunk and from there to
+        the last one stand for the prefill and generation durations.
+        """
+        if self.final is not None:
+            response = dict(self.final)
+        else:
+            response = {"prompt_eval_count": self.prompt_tokens, "eval_count": self.chunks}
+            if self.first_chunk is not None:
+                # Durations are reported in nanoseconds
+                response["prompt_eval_duration"] = int((self.first_chunk - self.started) * 1e9)
+                response["eval_duration"] = int((self.last_chunk - self.first_chunk) * 1e9)
+        response["message"] = {"role": "assistant", "content": self.content}
+        return response
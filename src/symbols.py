@@ -0,0 +1,328 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tree_sitter import Parser
+
+from src.logger import log
+from src.manifest import save_auxiliary_section
+from src.members import has_javadoc_above
+from src.source import read_source
+
+# Declarations indexed as types, and the node holding the members of each
+TYPE_BODIES = {
+    'class_declaration': 'class_body',
+    'interface_declaration': 'interface_body',
+    'enum_declaration': 'enum_body',
+    'record_declaration': 'class_body',
+    'annotation_type_declaration': 'annotation_type_body',
+}
+SUPERTYPE_NODES = ('superclass', 'super_interfaces', 'extends_interfaces')
+FIELD_NODES = ('field_declaration', 'constant_declaration')
+
+# Section of the auxiliary file holding the index, and the version of its format
+SECTION = "class_relationships"
+INDEX_VERSION = 3
+
+def type_name(type_text: str) -> str:
+    """Reduce a type reference such as ``java.util.List<String>`` to its simple name ``List``."""
+    return type_text.split('<', 1)[0].strip().rsplit('.', 1)[-1]
+
+def type_reference(type_text: str) -> str:
+    """Reduce a type reference to the name it is written with, ``java.util.List<String>`` to ``java.util.List``."""
+    return "".join(type_text.split('<', 1)[0].split())
+
+def parameter_count(method_key: str) -> int:
+    """Return the number of parameters of a method key such as ``put(String,int)``."""
+    parameters = method_key[method_key.index('(') + 1:-1]
+    return parameters.count(',') + 1 if parameters else 0
+
+def extract_symbols(parser: Parser, java_code: str) -> Dict:
+    """
+    Parse Java code into its package, its imports and the types it declares, nested types included.
+
+    Only declarations are visited, method bodies are never walked.
+
+    Args:
+        parser (Parser): Tree-sitter parser for Java, owned by the calling thread.
+        java_code (str): The Java code.
+
+    Returns:
+        Dict: The ``package`` name ("" for the default package), the ``imports`` (on-demand
+        imports end with ``.*``) and the ``types``: one entry per type with its ``name``, its
+        ``qualified`` name, ``kind``, ``signature`` (as in the member table), its ``supertypes``
+        as written, its ``fields`` and its ``methods``. Methods are identified by a ``key`` made
+        of their name and simple parameter types, and record whether they are ``documented``
+        and marked ``override``.
+    """
+    source = java_code.encode("utf-8", "surrogateescape")
+    tree = parser.parse(source)
+    symbols: List[Dict] = []
+    package, imports = "", []
+
+    def text(node) -> str:
+        return " ".join(source[node.start_byte:node.end_byte].decode("utf8", errors="replace").split())
+
+    def field(node) -> str:
+        parts, names = [], []
+        for child in node.children:
+            if child.type == 'modifiers':
+                # Annotations add tokens without telling the model much about the field
+                parts.extend(text(c) for c in child.children if 'annotation' not in c.type)
+            elif child.type == 'variable_declarator':
+                name = child.child_by_field_name('name')
+                names.append(text(name) if name is not None else text(child))
+            elif child.type not in (',', ';'):
+                parts.append(text(child))
+        return " ".join(parts + [", ".join(names)])
+
+    def method(node) -> Dict:
+        name = node.child_by_field_name('name')
+        body = node.child_by_field_name('body')
+        parameters = node.child_by_field_name('parameters')
+        types = []
+        for parameter in parameters.named_children if parameters is not None else []:
+            parameter_type = parameter.child_by_field_name('type')
+            if parameter_type is None:
+                # Varargs: the type is the first named child of the spread parameter
+                parameter_type = next((c for c in parameter.named_children if c.type != 'modifiers'), None)
+            if parameter_type is not None:
+                type_text = text(parameter_type)
+                dimensions = type_text.count('[') + (parameter.type == 'spread_parameter') + sum(
+                    text(c).count('[') for c in parameter.children if c.type == 'dimensions'  # int values[]
+                )
+                types.append(type_name(type_text.split('[', 1)[0]) + "[]" * dimensions)
+        modifiers = next((c for c in node.children if c.type == 'modifiers'), None)
+        return {
+            "key": f"{text(name) if name is not None else ''}({','.join(types)})",
+            # Same text as the signature of the member table
+            "signature": source[node.start_byte:body.start_byte if body is not None else node.end_byte]
+            .decode("utf8", errors="replace").strip(),
+            "documented": has_javadoc_above(node, source),
+            "override": modifiers is not None and any(text(c) == "@Override" for c in modifiers.children),
+        }
+
+    def visit(node, outer: str):
+        body_type = TYPE_BODIES.get(node.type)
+        if body_type is None:
+            return
+        body = next((child for child in node.children if child.type == body_type), None)
+        end = body.start_byte if body is not None else node.end_byte
+        symbol = {
+            "name": None,
+            "kind": node.type[:-len('_declaration')],
+            "signature": source[node.start_byte:end].decode("utf8", errors="replace").strip(),
+            "supertypes": [],
+            "fields": [],
+            "methods": [],
+        }
+        for child in node.children:
+            if child.type == 'identifier':
+                symbol["name"] = text(child)
+            elif child.type in SUPERTYPE_NODES:
+                for reference in child.children:
+                    if reference.type == 'type_list':
+                        symbol["supertypes"].extend(type_reference(text(t)) for t in reference.named_children)
+                    elif reference.is_named:
+                        symbol["supertypes"].append(type_reference(text(reference)))
+            elif child.type == 'formal_parameters':
+                # Record components
+                symbol["fields"].extend(text(c) for c in child.named_children)
+        symbol["qualified"] = f"{outer}.{symbol['name']}" if outer else symbol["name"]
+        symbols.append(symbol)
+
+        if body is None:
+            return
+        declarations = []
+        for child in body.children:
+            if child.type == 'enum_body_declarations':
+                declarations.extend(child.children)
+            else:
+                declarations.append(child)
+        for child in declarations:
+            if child.type in FIELD_NODES:
+                symbol["fields"].append(field(child))
+            elif child.type == 'method_declaration':
+                symbol["methods"].append(method(child))
+            else:
+                visit(child, symbol["qualified"])
+
+    for child in tree.root_node.children:
+        if child.type == 'package_declaration':
+            package = next((text(c) for c in child.named_children if 'identifier' in c.type), "")
+        elif child.type == 'import_declaration':
+            declaration = text(child)
+            if not declaration.startswith("import static"):
+                imports.append("".join(declaration[len("import"):].rstrip(';').split()))
+        else:
+            visit(child, package)
+    return {"package": package, "imports": imports, "types": symbols}
+
+class SymbolIndex:
+    """Repository-wide index of the declared types, their supertypes, fields and methods.
+
+    The index is built in a single pass over the repository before files are
+    documented, so prompts can describe the class of a member and the classes it
+    inherits from, and overriding methods can inherit their documentation.
+    Supertypes are resolved through the package and imports of the file naming
+    them. The index is cached in the auxiliary file, where unchanged files (same
+    size and modification time) are not parsed again.
+    """
+
+    def __init__(self, path: Path, repo_dir: Path):
+        """Load the cached index from the auxiliary file, starting empty if there is none."""
+        self.path = path
+        self.repo_dir = repo_dir
+        self.files: Dict[str, Dict] = {}
+        # Types by file and signature (two files may declare the same signature) and by qualified name
+        self.by_signature: Dict[Tuple[str, str], Dict] = {}
+        self.by_qualified: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        if path.is_file():
+            try:
+                with path.open("r", encoding="utf-8") as file:
+                    section = json.load(file).get(SECTION, {})
+                if section.get("version") == INDEX_VERSION:
+                    self.files = section.get("files", {})
+            except (OSError, ValueError, AttributeError) as e:
+                log.warning(f"Could not read symbol index {path}, rebuilding it: {e}")
+
+    def key(self, file_path: Path) -> str:
+        """Return the index key of a file (its path relative to the repository)."""
+        try:
+            return file_path.relative_to(self.repo_dir).as_posix()
+        except ValueError:
+            return file_path.as_posix()
+
+    def build(self, parser: Parser, file_paths: Iterable[Path]) -> int:
+        """
+        Index the types of a set of files, reusing cached entries of unchanged files.
+
+        Files missing from ``file_paths`` are dropped from the index.
+
+        Args:
+            parser (Parser): Tree-sitter parser for Java.
+            file_paths (Iterable[Path]): Every Java file of the repository.
+
+        Returns:
+            int: Number of files parsed (not served from the cache).
+        """
+        files: Dict[str, Dict] = {}
+        parsed = 0
+        for file_path in file_paths:
+            key = self.key(file_path)
+            try:
+                stat = file_path.stat()
+                entry = self.files.get(key)
+                if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+                    entry = {
+                        "size": stat.st_size,
+                        "mtime_ns": stat.st_mtime_ns,
+                        **extract_symbols(parser, read_source(file_path)),
+                    }
+                    parsed += 1
+            except Exception as e:
+                log.warning(f"Could not index {file_path}: {e}")
+                continue
+            files[key] = entry
+
+        by_signature: Dict[Tuple[str, str], Dict] = {}
+        by_qualified: Dict[str, Dict] = {}
+        for key, entry in files.items():
+            for symbol in entry["types"]:
+                symbol["path"] = key
+                by_signature.setdefault((key, symbol["signature"]), symbol)
+                by_qualified.setdefault(symbol["qualified"], symbol)
+        with self.lock:
+            self.files, self.by_signature, self.by_qualified = files, by_signature, by_qualified
+        log.info(f"Indexed {len(by_signature)} types in {len(files)} files ({parsed} parsed)")
+        return parsed
+
+    def save(self):
+        """Write the index to its section of the auxiliary file."""
+        with self.lock:
+            save_auxiliary_section(self.path, SECTION, {"version": INDEX_VERSION, "files": self.files})
+
+    def lookup(self, file_path: Path, class_signature: str) -> Optional[Dict]:
+        """Return the type a file declares with a signature, None if it is not indexed."""
+        return self.by_signature.get((self.key(file_path), class_signature))
+
+    def get(self, qualified_name: str) -> Optional[Dict]:
+        """Return a type of the repository by qualified name (``demo.Outer.Inner``)."""
+        return self.by_qualified.get(qualified_name)
+
+    def resolve(self, reference: str, scope: Dict) -> Optional[Dict]:
+        """
+        Resolve a type reference written in the declaration of a type, the way javac does.
+
+        The first name of the reference is looked up in the enclosing types, the
+        single-type imports, the package and the on-demand imports of the file
+        declaring ``scope``, in that order. A reference whose first name is none of
+        these is taken as fully qualified.
+
+        Returns:
+            Optional[Dict]: The type, None for types declared elsewhere (JDK, libraries).
+        """
+        head, _, rest = reference.partition('.')
+        entry = self.files.get(scope["path"], {})
+        package = entry.get("package", "")
+        imports = entry.get("imports", [])
+        candidates = []
+        outer = scope["qualified"].rsplit('.', 1)[0] if '.' in scope["qualified"] else ""
+        while outer and outer != package:
+            candidates.append(f"{outer}.{head}")
+            outer = outer.rsplit('.', 1)[0] if '.' in outer else ""
+        candidates.extend(name for name in imports if name.rsplit('.', 1)[-1] == head)
+        candidates.append(f"{package}.{head}" if package else head)
+        candidates.extend(f"{name[:-1]}{head}" for name in imports if name.endswith(".*"))
+        for candidate in candidates:
+            symbol = self.by_qualified.get(candidate)
+            if symbol is not None:
+                return self.by_qualified.get(f"{candidate}.{rest}") if rest else symbol
+        return self.by_qualified.get(reference)
+
+    @staticmethod
+    def method(symbol: Dict, signature: str) -> Optional[Dict]:
+        """Return the method of a type declared with a signature, None if there is none."""
+        return next((method for method in symbol["methods"] if method["signature"] == signature), None)
+
+    def overridden(self, symbol: Dict, method: Dict) -> Optional[Tuple[Dict, Dict]]:
+        """
+        Find the method of a supertype declared in the repository that a method overrides.
+
+        Methods match on their name and parameter types. A method marked ``@Override``
+        also matches a single method with its name and number of parameters, as its
+        parameter types may be type variables of the supertype.
+
+        Returns:
+            Optional[Tuple[Dict, Dict]]: The nearest supertype and its method, None if the
+            method overrides nothing in the repository.
+        """
+        name = method["key"].split('(', 1)[0]
+        arity = parameter_count(method["key"])
+        for parent in self.ancestors(symbol):
+            loose = []
+            for candidate in parent["methods"]:
+                if candidate["key"] == method["key"]:
+                    return parent, candidate
+                if candidate["key"].split('(', 1)[0] == name and parameter_count(candidate["key"]) == arity:
+                    loose.append(candidate)
+            if method["override"] and len(loose) == 1:
+                return parent, loose[0]
+        return None
+
+    def ancestors(self, symbol: Dict) -> List[Dict]:
+        """Return the supertypes of a type declared in the repository, nearest first."""
+        ancestors, seen = [], {id(symbol)}
+        # Each supertype is resolved in the file of the type naming it
+        queue = [(reference, symbol) for reference in symbol["supertypes"]]
+        while queue:
+            reference, scope = queue.pop(0)
+            parent = self.resolve(reference, scope)
+            if parent is None or id(parent) in seen:
+                continue
+            seen.add(id(parent))
+            ancestors.append(parent)
+            queue.extend((parent_reference, parent) for parent_reference in parent["supertypes"])
+        return ancestors
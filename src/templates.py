@@ -0,0 +1,185 @@
+import re
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.config import config
+from src.logger import log
+from src.members import Member
+
+# A rule receives a member, its whole declaration and the template messages, and
+# returns the member's Javadoc, or None when the member is not one it handles
+TemplateRule = Callable[[Member, str, Dict[str, str]], Optional[str]]
+
+TEMPLATE_RULES: Dict[str, TemplateRule] = {}
+
+def template_rule(name: str) -> Callable[[TemplateRule], TemplateRule]:
+    """Register a rule under the name ``templates.patterns`` enables it with."""
+    def register(rule: TemplateRule) -> TemplateRule:
+        TEMPLATE_RULES[name] = rule
+        return rule
+    return register
+
+def words(identifier: str) -> str:
+    """Spell an identifier as lowercase words: ``firstName`` and ``FIRST_NAME`` become ``first name``."""
+    spaced = re.sub(r'([a-z0-9])([A-Z])|([A-Z])([A-Z][a-z])', r'\1\3 \2\4', identifier)
+    return " ".join(spaced.replace('_', ' ').lower().split())
+
+def render(summary: str, tags: Iterable[str] = ()) -> str:
+    """Format a Javadoc comment from its summary sentence and block tags."""
+    tags = list(tags)
+    if not tags:
+        return f"/** {summary} */"
+    return "\n".join(["/**", f" * {summary}", " *"] + [f" * {tag}" for tag in tags] + [" */"])
+
+def body_statements(member: Member, declaration: str) -> Optional[List[str]]:
+    """
+    Return the statements of a member's body, None unless it is a flat list of simple
+    statements (no nested blocks, comments or literals a template could misread).
+    """
+    body = declaration[len(member.signature):].strip()
+    if not (body.startswith('{') and body.endswith('}')):
+        return None
+    inner = body[1:-1]
+    if any(token in inner for token in ('{', '}', '//', '/*', '"', "'")):
+        return None
+    return [statement.strip() for statement in inner.split(';') if statement.strip()]
+
+def parameter_names(signature: str) -> List[str]:
+    """Return the parameter names of a method or constructor signature."""
+    match = re.search(r'\((.*)\)', signature, flags=re.DOTALL)
+    if match is None or not match.group(1).strip():
+        return []
+    names, depth, current = [], 0, ""
+    for char in match.group(1) + ',':
+        depth += char == '<'
+        depth -= char == '>'
+        if char == ',' and depth == 0:
+            names.append(re.sub(r'\[\s*\]', '', current).split()[-1])
+            current = ""
+        else:
+            current += char
+    return names
+
+def returns_void(member: Member) -> bool:
+    """Check whether a method is declared ``void``."""
+    return re.search(rf'\bvoid\s+{re.escape(member.name)}\s*\(', member.signature) is not None
+
+def is_accessor(member: Member, prefix: str) -> bool:
+    """Check whether a method is named like an accessor, e.g. ``get`` followed by a capitalized name."""
+    name = member.name or ""
+    return member.kind == 'method' and len(name) > len(prefix) and name.startswith(prefix) \
+        and name[len(prefix)].isupper()
+
+@template_rule("getter")
+def getter(member: Member, declaration: str, messages: Dict[str, str]) -> Optional[str]:
+    """``T getName() { return name; }``"""
+    if not is_accessor(member, "get") or parameter_names(member.signature) or returns_void(member):
+        return None
+    statements = body_statements(member, declaration)
+    if statements is None or len(statements) != 1 or not re.fullmatch(r'return\s+(this\.)?\w+', statements[0]):
+        return None
+    prop = words(member.name[3:])
+    return render(
+        messages["getter"].format(property=prop),
+        [f"@return {messages['getter_return'].format(property=prop)}"]
+    )
+
+@template_rule("boolean_getter")
+def boolean_getter(member: Member, declaration: str, messages: Dict[str, str]) -> Optional[str]:
+    """``boolean isActive() { return active; }``"""
+    if not is_accessor(member, "is") or parameter_names(member.signature):
+        return None
+    if not re.search(rf'\b[bB]oolean\s+{re.escape(member.name)}\s*\(', member.signature):
+        return None
+    statements = body_statements(member, declaration)
+    if statements is None or len(statements) != 1 or not re.fullmatch(r'return\s+(this\.)?\w+', statements[0]):
+        return None
+    prop = words(member.name[2:])
+    return render(
+        messages["boolean_getter"].format(property=prop),
+        [f"@return {messages['boolean_getter_return'].format(property=prop)}"]
+    )
+
+@template_rule("setter")
+def setter(member: Member, declaration: str, messages: Dict[str, str]) -> Optional[str]:
+    """``void setName(String name) { this.name = name; }``"""
+    parameters = parameter_names(member.signature)
+    if not is_accessor(member, "set") or len(parameters) != 1 or not returns_void(member):
+        return None
+    statements = body_statements(member, declaration)
+    if statements is None or len(statements) != 1 \
+            or not re.fullmatch(rf'(this\.)?\w+\s*=\s*{re.escape(parameters[0])}', statements[0]):
+        return None
+    prop = words(member.name[3:])
+    return render(
+        messages["setter"].format(property=prop),
+        [f"@param {parameters[0]} {messages['param'].format(property=words(parameters[0]))}"]
+    )
+
+@template_rule("constructor")
+def constructor(member: Member, declaration: str, messages: Dict[str, str]) -> Optional[str]:
+    """Constructors that only assign their parameters to fields or delegate to ``super``/``this``."""
+    if member.kind != 'constructor':
+        return None
+    statements = body_statements(member, declaration)
+    if statements is None or not all(
+        re.fullmatch(r'this\.\w+\s*=\s*\w+|(super|this)\s*\(\s*(\w+(\s*,\s*\w+)*)?\s*\)', statement)
+        for statement in statements
+    ):
+        return None
+    return render(
+        messages["constructor"].format(type=member.name),
+        [f"@param {name} {messages['param'].format(property=words(name))}"
+         for name in parameter_names(member.signature)]
+    )
+
+@template_rule("enum_constant")
+def enum_constant(member: Member, declaration: str, messages: Dict[str, str]) -> Optional[str]:
+    """Enum constants without a body of their own."""
+    if member.kind != 'enum_constant' or '{' in declaration:
+        return None
+    return render(messages["enum_constant"].format(constant=words(member.name)))
+
+class TemplateEngine:
+    """Documents trivial members locally, before the LLM dispatcher.
+
+    Each enabled rule recognizes one kind of trivial member (accessors, plain
+    constructors, enum constants) from its declaration and fills in a
+    localized template, the first rule that matches wins. Rules are
+    registered with the ``template_rule`` decorator.
+    """
+
+    def __init__(self, messages: Dict[str, str], patterns: Iterable[str]):
+        """
+        Args:
+            messages (Dict[str, str]): The ``templates`` messages of the configured language.
+            patterns (Iterable[str]): Names of the rules to apply, in order.
+        """
+        self.messages = messages
+        self.rules: List[TemplateRule] = []
+        for name in patterns:
+            if name in TEMPLATE_RULES:
+                self.rules.append(TEMPLATE_RULES[name])
+            else:
+                log.warning(f"Unknown template pattern ignored: {name}")
+
+    @classmethod
+    def from_config(cls, messages: Dict[str, str]) -> Optional["TemplateEngine"]:
+        """Create the engine of the ``templates`` settings, None if templates are disabled."""
+        templates_config = config.get("templates", {})
+        if not templates_config.get("enabled", True):
+            return None
+        return cls(messages, templates_config.get("patterns", list(TEMPLATE_RULES)))
+
+    def render(self, member: Member, declaration: str) -> Optional[str]:
+        """
+        Return the templated Javadoc of a member, None if no rule handles it.
+
+        Args:
+            member (Member): The member to document.
+            declaration (str): Its whole declaration, body included.
+        """
+        for rule in self.rules:
+            comment = rule(member, declaration, self.messages)
+            if comment:
+                return comment
+        return None
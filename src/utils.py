@@ -2,6 +2,8 @@ import json
 import logging
 from pathlib import Path
 
+from src.discovery import JavaFileDiscovery
+
 def load_messages(language: str, config_path: Path) -> dict[str, dict]:
     """Load messages from the JSON configuration file."""
     if not config_path.is_file():
@@ -20,8 +22,13 @@ def get_repository_directory(messages: dict[str, dict[str, str]]) -> Path:
         if not repo_dir.is_dir():
             logging.error(messages["input"]["dir_not_exist"])
             continue
-        java_files = list(repo_dir.rglob("*.java"))
-        if not java_files:
+        # Stop at the first Java file instead of walking the whole tree
+        if JavaFileDiscovery.from_config(repo_dir).first() is None:
             logging.error(messages["input"]["no_java_files"])
             continue
         return repo_dir
+
+def resolve_repo_path(repo_dir: Path, path: str) -> Path:
+    """Resolve a configured path, taking relative paths from the repository root."""
+    resolved = Path(path).expanduser()
+    return resolved if resolved.is_absolute() else repo_dir / resolved
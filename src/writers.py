@@ -0,0 +1,198 @@
+import os
+import queue
+import shutil
+import difflib
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from src.config import config
+from src.logger import log
+from src.metrics import metrics
+from src.source import encode_source, write_source
+from src.utils import resolve_repo_path
+
+class OutputWriter(ABC):
+    """Base class of the writers that store updated Java files.
+
+    ``write`` returns True when the output was stored. When ``skip_unchanged``
+    is set, files whose content did not change are not written at all.
+    """
+
+    # Whether writing updates the files of the repository
+    modifies_tree = True
+
+    def __init__(self, skip_unchanged: bool = True):
+        self.skip_unchanged = skip_unchanged
+        self.bytes_written = 0
+        self.lock = threading.Lock()
+
+    def write(
+        self,
+        file_path: Path,
+        original_code: str,
+        updated_code: str,
+        on_written: Optional[Callable[[], None]] = None
+    ) -> bool:
+        """
+        Store the updated code of a file.
+
+        Args:
+            file_path (Path): Path to the Java file.
+            original_code (str): Code read from the file.
+            updated_code (str): Code with Javadocs.
+            on_written (Optional[Callable[[], None]]): Called once the output is stored.
+
+        Returns:
+            bool: True if the output was stored (or queued), False if skipped or failed.
+        """
+        if self.skip_unchanged and updated_code == original_code:
+            log.debug("Content unchanged, not writing: {}", file_path)
+            return False
+        try:
+            with metrics.timer("write_seconds"):
+                size = self.store(file_path, original_code, updated_code)
+        except Exception as e:
+            log.error(f"Error writing file: {file_path} - {e}")
+            return False
+        metrics.inc("bytes_written_total", size)
+        with self.lock:
+            self.bytes_written += size
+        if on_written:
+            on_written()
+        return True
+
+    @abstractmethod
+    def store(self, file_path: Path, original_code: str, updated_code: str) -> int:
+        """Store the output of a file and return the number of bytes written."""
+
+    def close(self):
+        """Flush pending output."""
+
+class InPlaceWriter(OutputWriter):
+    """Overwrite files directly (a crash mid-write can leave a file truncated)."""
+
+    def store(self, file_path: Path, original_code: str, updated_code: str) -> int:
+        write_source(file_path, updated_code)
+        return len(encode_source(updated_code))
+
+class AtomicWriter(OutputWriter):
+    """Write to a temporary file next to the original, then replace it with os.replace."""
+
+    def store(self, file_path: Path, original_code: str, updated_code: str) -> int:
+        data = encode_source(updated_code)
+        descriptor, temp_name = tempfile.mkstemp(prefix=f".{file_path.name}.", suffix=".tmp", dir=file_path.parent)
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            shutil.copymode(file_path, temp_name)
+            os.replace(temp_name, file_path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+        return len(data)
+
+def patch_lines(text: str) -> List[str]:
+    """Split text into lines on ``\\n`` only, as git does, ``str.splitlines`` also splits on form feeds."""
+    lines = text.split("\n")
+    ended = [line + "\n" for line in lines[:-1]]
+    return ended + [lines[-1]] if lines[-1] else ended
+
+class PatchWriter(OutputWriter):
+    """Append unified diffs to a patch file instead of touching the tree (dry run).
+
+    The patch uses paths relative to the repository and applies with ``git apply``.
+    """
+
+    modifies_tree = False
+
+    def __init__(self, patch_path: Path, repo_dir: Path, skip_unchanged: bool = True):
+        super().__init__(skip_unchanged)
+        self.patch_path = patch_path
+        self.repo_dir = repo_dir
+        patch_path.parent.mkdir(parents=True, exist_ok=True)
+        patch_path.write_bytes(b"")
+
+    def store(self, file_path: Path, original_code: str, updated_code: str) -> int:
+        try:
+            name = file_path.relative_to(self.repo_dir).as_posix()
+        except ValueError:
+            name = file_path.as_posix()
+        lines = []
+        for line in difflib.unified_diff(
+            patch_lines(original_code),
+            patch_lines(updated_code),
+            fromfile=f"a/{name}",
+            tofile=f"b/{name}"
+        ):
+            lines.append(line)
+            if not line.endswith("\n"):
+                lines.append("\n\\ No newline at end of file\n")
+        data = encode_source("".join(lines))
+        with self.lock:
+            with self.patch_path.open("ab") as file:
+                file.write(data)
+        return len(data)
+
+class BackgroundWriter(OutputWriter):
+    """Hand writes over to a dedicated thread so workers never block on disk I/O.
+
+    The writer thread stores files through the wrapped writer and counts them here.
+    """
+
+    def __init__(self, writer: OutputWriter, max_pending: int = 64):
+        super().__init__(writer.skip_unchanged)
+        self.writer = writer
+        self.modifies_tree = writer.modifies_tree
+        self.pending: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self.run, name="javadoc-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, file_path, original_code, updated_code, on_written=None) -> bool:
+        if self.skip_unchanged and updated_code == original_code:
+            log.debug("Content unchanged, not writing: {}", file_path)
+            return False
+        self.pending.put((file_path, original_code, updated_code, on_written))
+        return True
+
+    def store(self, file_path: Path, original_code: str, updated_code: str) -> int:
+        return self.writer.store(file_path, original_code, updated_code)
+
+    def run(self):
+        """Write queued files until the end marker is received."""
+        while (item := self.pending.get()) is not None:
+            super().write(*item)
+
+    def close(self):
+        """Wait for all queued writes to finish."""
+        self.pending.put(None)
+        self.thread.join()
+        self.writer.close()
+
+def create_writer(repo_dir: Path, mode: Optional[str] = None) -> OutputWriter:
+    """
+    Create the output writer configured by the ``output`` settings.
+
+    Args:
+        repo_dir (Path): Repository root, patch paths are relative to it.
+        mode (Optional[str]): Overrides ``output.mode`` ("atomic", "inplace" or "patch").
+
+    Returns:
+        OutputWriter: The writer, wrapped in a BackgroundWriter if ``output.background`` is set.
+    """
+    settings = config.get("output", {})
+    mode = mode or settings.get("mode", "atomic")
+    skip_unchanged = settings.get("skip_unchanged", True)
+    if mode == "patch":
+        patch_path = resolve_repo_path(repo_dir, settings.get("patch_file", ".javadocai/javadoc.patch"))
+        writer: OutputWriter = PatchWriter(patch_path, repo_dir, skip_unchanged)
+        log.info(f"Dry run, writing changes to patch file: {patch_path}")
+    elif mode == "inplace":
+        writer = InPlaceWriter(skip_unchanged)
+    else:
+        writer = AtomicWriter(skip_unchanged)
+    if settings.get("background", False):
+        writer = BackgroundWriter(writer)
+    return writer
@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+from pathlib import Path
+from src.config import CONFIG_PATH
+from src.utils import load_messages
+
+pytestmark = pytest.mark.skipif(
+    not Path("build/java-languages.so").exists(), reason="Java parser not built, run build_parsers.py"
+)
+
+
+class FakeAsyncClient:
+    """Stand-in for the Ollama async client tracking request concurrency."""
+
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def chat(self, model, messages, options=None, stream=False, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if not stream:
+            return {"message": {"content": "/** Generated. */"}}
+
+        async def chunks():
+            for piece in ("/** Generated.", " */", "\nThis comment describes the method."):
+                yield {"message": {"content": piece}, "done": False}
+            yield {"message": {"content": ""}, "done": True}
+        return chunks()
+
+
+def test_async_pipeline_documents_all_files(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+    from src.async_pipeline import AsyncPipeline
+
+    for index in range(5):
+        methods = "\n".join(f"    void m{i}() {{}}" for i in range(4))
+        (tmp_path / f"C{index}.java").write_text(f"class C{index} {{\n{methods}\n}}\n")
+
+    ai = JavaDocAI(tmp_path, messages=load_messages("en", CONFIG_PATH))
+    ai.cache = None
+    pipeline = AsyncPipeline(ai)
+    pipeline.client = FakeAsyncClient()
+    pipeline.max_inflight_requests = 3
+    pipeline.run()
+
+    assert pipeline.client.calls == 25
+    assert 1 < pipeline.client.max_in_flight <= 3
+    for index in range(5):
+        assert (tmp_path / f"C{index}.java").read_text().count("Generated.") == 5
+
+
+def test_async_pipeline_stops_requests_once_the_budget_is_spent(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+    from src.async_pipeline import AsyncPipeline
+    from src.metrics import metrics
+
+    for index in range(5):
+        methods = "\n".join(f"    void m{i}() {{}}" for i in range(4))
+        (tmp_path / f"C{index}.java").write_text(f"class C{index} {{\n{methods}\n}}\n")
+
+    ai = JavaDocAI(tmp_path, messages=load_messages("en", CONFIG_PATH), token_budget=1)
+    ai.cache = None
+    pipeline = AsyncPipeline(ai)
+    pipeline.client = FakeAsyncClient()
+    pipeline.max_inflight_requests = 3
+    pipeline.run()
+
+    # Only the requests started before the first answer was counted are sent
+    assert pipeline.client.calls <= 3
+    assert metrics.counters.get("deferred_members_total", 0) > 0
+    assert not any(ai.journal.is_completed(tmp_path / f"C{index}.java") for index in range(5))
+
+
+class CountingAsyncClient:
+    """Async client recording each prompt and reporting its tokens like Ollama does."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def chat(self, model, messages, options=None, stream=False, **kwargs):
+        self.prompts.append(messages[-1]["content"])
+        answer = {"message": {"content": "/** Generated. */"}, "done": True, "prompt_eval_count": 40, "eval_count": 10}
+        if not stream:
+            return answer
+
+        async def chunks():
+            yield answer
+        return chunks()
+
+
+def test_async_pipeline_spends_the_budget_on_the_public_api_of_every_file_first(tmp_path, monkeypatch):
+    from src.config import config
+    from src.java_doc_ai import JavaDocAI
+    from src.async_pipeline import AsyncPipeline
+
+    monkeypatch.setitem(config["processing"], "order", "priority")
+    helpers = "".join(f"    private void helper{index}() {{}}\n" for index in range(5))
+    (tmp_path / "A.java").write_text(f"public class A {{\n    public void api() {{}}\n{helpers}}}\n")
+    (tmp_path / "B.java").write_text("public class B {\n    public void important() {}\n}\n")
+
+    ai = JavaDocAI(tmp_path, messages=load_messages("en", CONFIG_PATH), token_budget=350)
+    ai.cache = None
+    ai.templates = None
+    pipeline = AsyncPipeline(ai)
+    pipeline.client = CountingAsyncClient()
+    pipeline.max_inflight_requests = 1
+    pipeline.run()
+
+    prompts = pipeline.client.prompts
+    assert len(prompts) == 7
+    assert not any("helper" in prompt for prompt in prompts[:4])
+    assert any(prompt.endswith("public void important()") for prompt in prompts[:4])
+    assert (tmp_path / "B.java").read_text().count("Generated.") == 2
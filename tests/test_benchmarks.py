@@ -0,0 +1,90 @@
+import time
+import json
+
+import pytest
+from pathlib import Path
+from ollama import Client
+
+from benchmarks.mock_ollama import MockOllamaServer
+from benchmarks.synthetic_repo import generate_repository
+
+def test_mock_server_answers_chat_and_batches():
+    with MockOllamaServer() as server:
+        client = Client(host=f"http://127.0.0.1:{server.port}")
+        assert client.list()["models"][0]["name"] == "mock"
+
+        single = client.chat(model="mock", messages=[{"role": "user", "content": "void a()"}])
+        assert single["message"]["content"].startswith("/**")
+        assert single["eval_count"] > 0
+
+        batch = client.chat(model="mock", messages=[{"role": "user", "content": "1: class A\n2: method void a()"}],
+                            format="json")
+        assert set(json.loads(batch["message"]["content"])) == {"1", "2"}
+
+        chunks = list(client.chat(model="mock", messages=[{"role": "user", "content": "x"}], stream=True))
+        assert "".join(c["message"]["content"] for c in chunks).endswith("*/")
+        assert chunks[-1]["done"]
+        assert server.requests == 3
+
+def test_mock_server_chatters_up_to_num_predict():
+    from src.java_doc_ai import JavaDocAI
+
+    with MockOllamaServer(chatter_tokens=100) as server:
+        client = Client(host=f"http://127.0.0.1:{server.port}")
+        messages = [{"role": "user", "content": "void a()"}]
+        assert client.chat(model="mock", messages=messages)["eval_count"] == 16 + 100
+        assert client.chat(model="mock", messages=messages, options={"num_predict": 40})["eval_count"] == 40
+
+        streamed = JavaDocAI.read_stream(client.chat(model="mock", messages=messages, stream=True))
+        assert streamed["message"]["content"].rstrip().endswith("*/")
+
+def test_mock_server_counts_streams_closed_early(capsys):
+    from src.java_doc_ai import JavaDocAI
+
+    with MockOllamaServer(tokens_per_second=200, chatter_tokens=200) as server:
+        client = Client(host=f"http://127.0.0.1:{server.port}")
+        messages = [{"role": "user", "content": "void a()"}]
+        JavaDocAI.read_stream(client.chat(model="mock", messages=messages, stream=True))
+        deadline = time.monotonic() + 5
+        while server.streams_closed == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    assert server.streams_closed == 1
+    assert "Traceback" not in capsys.readouterr().err
+
+def test_generate_repository_counts_signatures(tmp_path):
+    assert generate_repository(tmp_path, files=3, classes=2, methods=4) == 3 * 2 * 5
+    files = sorted(tmp_path.rglob("*.java"))
+    assert len(files) == 3
+    assert files[0].read_text().count("public ") == 1 + 2 * 4
+
+@pytest.mark.skipif(not Path("build/java-languages.so").exists(), reason="Java parser not built")
+def test_run_benchmark_reports_throughput(tmp_path, monkeypatch):
+    from benchmarks.run_benchmark import report, run_benchmark
+    from src.config import config
+
+    # run_benchmark overrides settings in place
+    for section in ("ollama", "processing", "cache", "incremental"):
+        monkeypatch.setitem(config, section, dict(config.get(section, {})))
+
+    signatures = generate_repository(tmp_path, files=4, classes=1, methods=3)
+    with MockOllamaServer() as server:
+        measurements = run_benchmark(tmp_path, [server])
+        results = report(measurements, 4, signatures, [server], {})
+    assert results["requests"] == signatures
+    assert results["latency_seconds"]["p50"] is not None
+    assert results["stage_seconds"]["write"] > 0
+
+@pytest.mark.skipif(not Path("build/java-languages.so").exists(), reason="Java parser not built")
+def test_query_extractor_matches_the_legacy_walk():
+    from tree_sitter import Parser
+    from benchmarks.bench_extractor import generate_file, legacy_extract_members
+    from src.members import extract_members, java_language
+
+    parser = Parser()
+    parser.set_language(java_language())
+    code = generate_file(classes=3, methods=5)
+    members = extract_members(parser, code)
+    legacy = legacy_extract_members(parser, code)
+    assert [(m.kind, m.signature, m.class_signature, m.has_javadoc) for m in members if m.kind != "field"] == \
+        [(m.kind, m.signature, m.class_signature, m.has_javadoc) for m in legacy]
+    assert sum(m.kind == "field" for m in members) == 3 * 5
@@ -0,0 +1,52 @@
+import pytest
+from src.cache import JavadocCache
+
+@pytest.fixture
+def cache(tmp_path):
+    instance = JavadocCache(tmp_path / "cache.sqlite", max_size_bytes=64)
+    yield instance
+    instance.close()
+
+def test_make_key_depends_on_every_part():
+    assert JavadocCache.make_key("model", 0.7, "prompt") == JavadocCache.make_key("model", 0.7, "prompt")
+    assert JavadocCache.make_key("model", 0.7, "prompt") != JavadocCache.make_key("model", 0.2, "prompt")
+
+def test_get_and_put_count_hits_and_misses(cache):
+    assert cache.get("key") is None
+    cache.put("key", "/** Doc. */")
+    assert cache.get("key") == "/** Doc. */"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_cache_persists_between_instances(tmp_path):
+    first = JavadocCache(tmp_path / "cache.sqlite", max_size_bytes=1024)
+    first.put("key", "/** Doc. */")
+    first.close()
+
+    second = JavadocCache(tmp_path / "cache.sqlite", max_size_bytes=1024)
+    assert second.get("key") == "/** Doc. */"
+    second.close()
+
+def test_eviction_removes_least_recently_used(cache):
+    cache.put("old", "x" * 30)
+    cache.put("recent", "y" * 30)
+    cache.get("old")
+    cache.put("new", "z" * 30)
+
+    assert cache.get("recent") is None
+    assert cache.get("old") == "x" * 30
+    assert cache.total_size <= cache.max_size_bytes
+
+def test_eviction_of_a_large_cache_only_reads_the_oldest_entries(tmp_path):
+    cache = JavadocCache(tmp_path / "cache.sqlite", max_size_bytes=10 * 5000)
+    for index in range(5000):
+        cache.put(f"key{index}", "x" * 10)
+    statements = []
+    cache.connection.set_trace_callback(statements.append)
+    cache.put("new", "x" * 25)
+    cache.connection.set_trace_callback(None)
+
+    assert [cache.get(f"key{index}") for index in range(3)] == [None, None, None]
+    assert cache.get("key3") == "x" * 10
+    assert cache.total_size <= cache.max_size_bytes
+    assert len([s for s in statements if s.startswith("DELETE")]) == 3
+    cache.close()
@@ -0,0 +1,73 @@
+import pytest
+from pathlib import Path
+from src.discovery import JavaFileDiscovery, glob_match
+
+@pytest.fixture
+def repo(tmp_path):
+    files = [
+        "src/main/java/App.java",
+        "src/main/java/util/Strings.java",
+        "src/generated/Gen.java",
+        "node_modules/pkg/Ignored.java",
+        "target/classes/Built.java",
+        "ignored/Skipped.java",
+        "logs/Debug.java",
+        "logs/Keep.java",
+        "README.md",
+    ]
+    for name in files:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("class X {}\n")
+    (tmp_path / ".gitignore").write_text("# comment\nignored/\nlogs/*.java\n!logs/Keep.java\n")
+    return tmp_path
+
+def relative(root, paths):
+    return [path.relative_to(root).as_posix() for path in paths]
+
+def test_walk_prunes_excluded_and_ignored_paths(repo):
+    discovery = JavaFileDiscovery(repo, exclude_dirs=["node_modules", "target"])
+    assert relative(repo, discovery) == [
+        "logs/Keep.java",
+        "src/generated/Gen.java",
+        "src/main/java/App.java",
+        "src/main/java/util/Strings.java",
+    ]
+
+def test_include_and_exclude_globs(repo):
+    discovery = JavaFileDiscovery(
+        repo, exclude_dirs=["node_modules", "target"], include=["src/**"], exclude=["**/generated/**"]
+    )
+    assert relative(repo, discovery) == ["src/main/java/App.java", "src/main/java/util/Strings.java"]
+
+def test_gitignore_can_be_disabled(repo):
+    discovery = JavaFileDiscovery(repo, respect_gitignore=False)
+    assert "ignored/Skipped.java" in relative(repo, discovery)
+
+def test_first_stops_at_first_hit(repo, tmp_path):
+    assert JavaFileDiscovery(repo).first() is not None
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    assert JavaFileDiscovery(empty).first() is None
+
+def test_accepts_single_files(repo):
+    discovery = JavaFileDiscovery(repo, exclude_dirs=["target"], exclude=["**/generated/**"])
+    assert discovery.accepts(repo / "src/main/java/App.java")
+    assert not discovery.accepts(repo / "src/generated/Gen.java")
+    assert not discovery.accepts(repo / "target/classes/Built.java")
+
+def test_accepts_applies_gitignore_rules_like_the_walk(repo):
+    (repo / "src/main/.gitignore").write_text("java/util/\n")
+    discovery = JavaFileDiscovery(repo)
+    walked = relative(repo, discovery)
+    for name in ["ignored/Skipped.java", "logs/Debug.java", "logs/Keep.java", "src/main/java/util/Strings.java",
+                 "src/main/java/App.java"]:
+        assert discovery.accepts(repo / name) == (name in walked)
+    assert not discovery.accepts(repo / "src/main/java/util/Strings.java")
+    assert discovery.accepts(repo / "logs/Keep.java")
+    assert JavaFileDiscovery(repo, respect_gitignore=False).accepts(repo / "ignored/Skipped.java")
+
+def test_glob_match_leading_double_star():
+    assert glob_match("Gen.java", "**/*.java")
+    assert glob_match("a/b/Gen.java", "**/*.java")
+    assert not glob_match("Gen.kt", "**/*.java")
@@ -0,0 +1,39 @@
+import time
+import threading
+
+from src.endpoints import Endpoint, EndpointPool
+from src.health import OllamaHealthMonitor
+
+def make_pool(*weights):
+    def health(endpoint):
+        return OllamaHealthMonitor(probe=lambda: False, restart=lambda: False, max_retries=3, retry_delay=60)
+    return EndpointPool([Endpoint(f"http://node{i}:11434", w, health) for i, w in enumerate(weights)], True)
+
+def test_routes_to_least_loaded_endpoint_by_weight():
+    pool = make_pool(1, 3)
+    acquired = [pool.acquire() for _ in range(4)]
+    assert [e.in_flight for e in pool.endpoints] == [1, 3]
+    assert acquired[0] is pool.endpoints[0]
+    assert pool.try_acquire() is None
+    pool.release(acquired[0])
+    assert pool.try_acquire() is pool.endpoints[0]
+
+def test_failing_endpoint_is_drained_until_due():
+    pool = make_pool(2, 2)
+    failing, healthy = pool.endpoints
+    failing.health.record_failure("connection refused")
+    assert {id(pool.acquire()) for _ in range(2)} == {id(healthy)}
+    assert pool.try_acquire() is None
+
+    # Once its backoff is over, one request probes the drained endpoint
+    failing.health.open_until = 0
+    assert pool.try_acquire() is failing
+    assert pool.try_acquire() is None
+
+def test_acquire_waits_for_a_free_slot():
+    pool = make_pool(1)
+    first = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(first,)).start()
+    start = time.monotonic()
+    assert pool.acquire() is first
+    assert time.monotonic() - start >= 0.04
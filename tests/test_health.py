@@ -0,0 +1,66 @@
+import threading
+from src.health import OllamaHealthMonitor
+
+class FakeServer:
+    def __init__(self, up=True, starts=True):
+        self.up = up
+        self.starts = starts
+        self.probes = 0
+        self.restarts = 0
+        self.lock = threading.Lock()
+
+    def probe(self):
+        with self.lock:
+            self.probes += 1
+        return self.up
+
+    def restart(self):
+        with self.lock:
+            self.restarts += 1
+        self.up = self.starts
+        return self.up
+
+def make_monitor(server, max_retries=3):
+    return OllamaHealthMonitor(server.probe, server.restart, max_retries=max_retries, retry_delay=0.05, base_delay=0.01)
+
+def test_healthy_server_is_never_probed():
+    server = FakeServer()
+    monitor = make_monitor(server)
+    for _ in range(10):
+        assert monitor.acquire()
+        monitor.record_success()
+    assert server.probes == 0
+
+def test_backoff_doubles_up_to_retry_delay():
+    monitor = make_monitor(FakeServer())
+    assert [monitor.backoff(n) for n in range(1, 6)] == [0.01, 0.02, 0.04, 0.05, 0.05]
+
+def test_concurrent_failures_restart_the_server_once():
+    server = FakeServer(up=False)
+    monitor = make_monitor(server)
+    for _ in range(8):
+        monitor.record_failure("connection refused")
+    assert monitor.consecutive_failures == 1
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(monitor.acquire())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(results)
+    assert server.restarts == 1
+    assert monitor.healthy
+
+def test_unreachable_server_fails_fast_after_max_retries():
+    server = FakeServer(up=False, starts=False)
+    monitor = make_monitor(server, max_retries=2)
+    monitor.record_failure("connection refused")
+
+    assert not monitor.acquire()
+    assert server.restarts == 1
+    probes = server.probes
+    # The circuit is open, the next caller gives up without probing
+    assert not monitor.acquire()
+    assert server.probes == probes
@@ -0,0 +1,794 @@
+import re
+import sys
+import json
+
+import pytest
+from pathlib import Path
+from src.config import CONFIG_PATH
+from src.utils import load_messages
+
+PARSER_LIBRARY = Path("build/java-languages.so")
+
+pytestmark = pytest.mark.skipif(
+    not PARSER_LIBRARY.exists(), reason="Java parser not built, run build_parsers.py"
+)
+
+JAVA_SOURCE = """package demo;
+
+/**
+ * Already documented.
+ */
+@Deprecated
+public class Service {
+
+    /** Documented method. */
+
+    @Override
+    public String toString() {
+        return "Service";
+    }
+
+    // plain comment
+    public int add(int a, int b) {
+        return a + b;
+    }
+}
+"""
+
+
+def chat_answer(content, stream=False):
+    """Answer like the Ollama client: a response, or a generator of chunks when streaming."""
+    if not stream:
+        return {"message": {"content": content}}
+
+    def chunks():
+        for piece in content.splitlines(keepends=True):
+            yield {"message": {"content": piece}, "done": False}
+        yield {"message": {"content": ""}, "done": True, "eval_count": len(content.splitlines())}
+    return chunks()
+
+
+class FakeClient:
+    """Stand-in for the Ollama client that records every chat call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def chat(self, model, messages, options=None, stream=False, **kwargs):
+        self.calls.append(messages[-1]["content"])
+        return chat_answer("/**\n * Generated.\n */", stream)
+
+    def list(self):
+        return {"models": []}
+
+
+@pytest.fixture
+def ai(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+
+    instance = JavaDocAI(tmp_path, messages=load_messages("en", CONFIG_PATH))
+    instance.client = FakeClient()
+    return instance
+
+
+def test_extract_marks_documented_members(ai):
+    members = ai.extract_members(JAVA_SOURCE)
+    assert [(m.kind, m.name, m.has_javadoc) for m in members] == [
+        ("class", "Service", True),
+        ("method", "toString", True),
+        ("method", "add", False),
+    ]
+    assert members[2].class_signature == members[0].signature
+    assert members[2].start_line == 16
+    assert JAVA_SOURCE.encode("utf-8")[members[2].start_byte:].startswith(b"public int add")
+
+
+def test_extract_members_uses_byte_offsets_for_non_ascii(ai):
+    members = ai.extract_members("class Ação {\n    String olá() { return \"é\"; }\n}\n")
+    assert [m.name for m in members] == ["Ação", "olá"]
+    assert members[1].signature == "String olá()"
+
+
+def test_extract_members_covers_every_declaration_kind(ai):
+    members = ai.extract_members(
+        "record Point(int x, int y) {\n"
+        "    /** Validates. */ Point { if (x < 0) throw new IllegalArgumentException(); }\n"
+        "    static final int ORIGIN = 0;\n"
+        "}\n"
+        "interface Shape { double area(); default String describe() { return \"shape\"; } }\n"
+        "@interface Marker { String value() default \"\"; }\n"
+        "class Outer {\n"
+        "    void run() { Runnable r = new Runnable() { public void run() {} }; class Local { void local() {} } }\n"
+        "    static { class InInitializer { void hidden() {} } }\n"
+        "}\n"
+    )
+    assert [(m.kind, m.name, m.has_javadoc) for m in members] == [
+        ("class", "Point", False), ("constructor", "Point", True), ("field", "ORIGIN", False),
+        ("class", "Shape", False), ("method", "area", False), ("method", "describe", False),
+        ("class", "Marker", False), ("method", "value", False),
+        ("class", "Outer", False), ("method", "run", False),
+    ]
+    assert members[2].signature == "static final int ORIGIN"
+    assert members[5].class_signature == "interface Shape"
+
+
+def test_extract_members_handles_deeply_nested_initializers(ai):
+    concatenation = " + ".join(f'"{index}"' for index in range(3000))
+    members = ai.extract_members(f"class A {{\n    String s = {concatenation};\n    void m() {{}}\n}}\n")
+    assert [(m.kind, m.name) for m in members] == [("class", "A"), ("field", "s"), ("method", "m")]
+
+
+def test_extract_members_skips_local_classes_of_enum_initializers(ai):
+    members = ai.extract_members(
+        "enum Mode {\n    ON;\n    { class Local { void hidden() {} } }\n"
+        "    static { class Static {} }\n    void run() {}\n}\n"
+    )
+    assert [(m.kind, m.name) for m in members] == [("class", "Mode"), ("enum_constant", "ON"), ("method", "run")]
+
+
+def test_each_thread_gets_its_own_parser(ai):
+    import threading
+
+    parsers = []
+    thread = threading.Thread(target=lambda: parsers.append(ai.parser))
+    thread.start()
+    thread.join()
+    assert parsers[0] is not ai.parser
+
+
+def test_add_javadocs_only_calls_llm_for_undocumented(ai, tmp_path):
+    updated = ai.add_javadocs(JAVA_SOURCE, tmp_path / "Service.java")
+    assert len(ai.client.calls) == 1
+    assert "int add(int a, int b)" in ai.client.calls[0]
+    assert ai.skipped_signatures == 2
+    assert updated.count("Generated.") == 1
+
+
+def test_requests_record_their_client_queue_time(ai, tmp_path):
+    from src.metrics import metrics
+
+    metrics.reset()
+    ai.cache = None
+    ai.add_javadocs("class A {\n    void a() {}\n}\n", tmp_path / "A.java")
+    assert metrics.to_json()["histograms"]["request_queue_seconds"]["count"] == len(ai.client.calls) == 2
+
+
+def test_repeated_signatures_are_served_from_cache(ai, tmp_path):
+    source = "class A {\n    public String toString() { return \"A\"; }\n}\n"
+    ai.add_javadocs(source, tmp_path / "A.java")
+    ai.add_javadocs(source.replace("class A", "class B").replace('"A"', '"B"'), tmp_path / "B.java")
+    prompts = [call for call in ai.client.calls if "toString()" in call]
+    assert len(prompts) == 1
+    assert ai.cache.hits == 1
+
+
+def test_incremental_run_skips_unchanged_files_and_members(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+
+    source = tmp_path / "Service.java"
+    source.write_text("class Service {\n    void a() {}\n}\n")
+    messages = load_messages("en", CONFIG_PATH)
+
+    first = JavaDocAI(tmp_path, messages=messages, incremental=True)
+    first.client = FakeClient()
+    first.cache = None
+    first.process_files()
+    assert len(first.client.calls) == 2
+
+    # Signatures seen in the previous run are not sent again, only the new method is
+    source.write_text(source.read_text().replace("void a() {}", "void a() {}\n    void b() {}"))
+    second = JavaDocAI(tmp_path, messages=messages, incremental=True)
+    second.client = FakeClient()
+    second.cache = None
+    second.process_files()
+    assert len(second.client.calls) == 1
+    assert "void b()" in second.client.calls[0]
+
+    third = JavaDocAI(tmp_path, messages=messages, incremental=True)
+    third.client = FakeClient()
+    third.process_files()
+    assert third.client.calls == []
+
+
+
+class FailingClient(FakeClient):
+    """Answers every chat request with an Ollama API error."""
+
+    def chat(self, model, messages, options=None, stream=False, **kwargs):
+        from ollama import ResponseError
+
+        self.calls.append(messages[-1]["content"])
+        raise ResponseError("model not found")
+
+
+def test_incremental_run_requests_members_that_failed_again(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+
+    source = tmp_path / "Service.java"
+    source.write_text("/** Doc. */\nclass Service {\n    int compute() { return 1; }\n}\n")
+    messages = load_messages("en", CONFIG_PATH)
+
+    first = JavaDocAI(tmp_path, messages=messages, incremental=True)
+    first.client = FailingClient()
+    first.cache = None
+    first.process_files()
+    assert len(first.client.calls) == 1
+
+    source.write_text(source.read_text().replace("}\n}", "}\n    void other() {}\n}"))
+    second = JavaDocAI(tmp_path, messages=messages, incremental=True)
+    second.client = FakeClient()
+    second.cache = None
+    second.process_files()
+    assert len(second.client.calls) == 2
+    assert source.read_text().count("Generated.") == 2
+
+
+def test_resume_skips_completed_files_and_reuses_journaled_javadocs(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+    from src.manifest import hash_member
+
+    done = tmp_path / "Done.java"
+    done.write_text("class Done {\n    void a() {}\n}\n")
+    messages = load_messages("en", CONFIG_PATH)
+
+    first = JavaDocAI(tmp_path, messages=messages)
+    first.client = FakeClient()
+    first.cache = None
+    first.process_files()
+    # The run dies while documenting a second file, after its class comment was generated
+    partial = tmp_path / "Partial.java"
+    partial.write_text("class Partial {\n    void b() {}\n}\n")
+    first.journal.record_member(partial, hash_member("class", "class Partial"), "/**\n * Journaled.\n */")
+    first.journal.close()
+
+    second = JavaDocAI(tmp_path, messages=messages, resume=True)
+    second.client = FakeClient()
+    second.cache = None
+    assert second.is_unchanged(done)
+    second.process_files()
+    assert len(second.client.calls) == 1
+    assert "void b()" in second.client.calls[0]
+    assert "Journaled." in partial.read_text()
+
+    # A run without --resume starts a new journal
+    third = JavaDocAI(tmp_path, messages=messages)
+    assert not third.is_unchanged(done)
+
+def test_dry_run_keeps_the_journal_of_an_interrupted_run(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+
+    done = tmp_path / "Done.java"
+    done.write_text("class Done {\n    void a() {}\n}\n")
+    messages = load_messages("en", CONFIG_PATH)
+    first = JavaDocAI(tmp_path, messages=messages)
+    first.client = FakeClient()
+    first.cache = None
+    first.process_files()
+    first.journal.close()
+    journal = first.journal.path.read_bytes()
+
+    dry_run = JavaDocAI(tmp_path, messages=messages, output_mode="patch")
+    dry_run.client = FakeClient()
+    dry_run.cache = None
+    (tmp_path / "Other.java").write_text("class Other {\n    void b() {}\n}\n")
+    dry_run.process_files()
+    dry_run.writer.close()
+    assert dry_run.journal.path.read_bytes() == journal
+
+    resumed = JavaDocAI(tmp_path, messages=messages, resume=True)
+    assert resumed.is_unchanged(done)
+
+
+def test_resumed_incremental_run_keeps_the_manifest_of_completed_files(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+    from src.manifest import Manifest
+
+    done = tmp_path / "Done.java"
+    done.write_text("class Done {\n    void a() {}\n}\n")
+    messages = load_messages("en", CONFIG_PATH)
+    first = JavaDocAI(tmp_path, messages=messages, incremental=True)
+    first.client = FakeClient()
+    first.cache = None
+    first.process_files()
+    first.journal.close()
+
+    second = JavaDocAI(tmp_path, messages=messages, incremental=True, resume=True)
+    second.client = FakeClient()
+    second.process_files()
+    assert second.client.calls == []
+    assert Manifest(second.manifest.path, tmp_path).is_unchanged(done)
+
+
+class FlakyClient(FakeClient):
+    """Answers with prose until it is reminded of the format, and never for method run()."""
+
+    def chat(self, model, messages, options=None, stream=False, **kwargs):
+        prompt = messages[-1]["content"]
+        self.calls.append(prompt)
+        if "void run()" in prompt or "starting with /** and ending with */." not in prompt.splitlines()[-1]:
+            return chat_answer("I cannot help with that.", stream)
+        return chat_answer("/** Retried. */", stream)
+
+
+def test_malformed_answers_are_retried_and_failures_journaled(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+
+    source = tmp_path / "Job.java"
+    source.write_text("class Job {\n    void run() {}\n}\n")
+    messages = load_messages("en", CONFIG_PATH)
+    first = JavaDocAI(tmp_path, messages=messages)
+    first.client = FlakyClient()
+    first.cache = None
+    first.retry_delay = 0
+    first.process_files()
+    assert "/** Retried. */" in source.read_text()
+    assert len(first.client.calls) == 2 + first.max_retries + 1
+    first.journal.close()
+
+    # Only the member that failed is requested again
+    second = JavaDocAI(tmp_path, messages=messages, retry_failed=True)
+    second.client = FakeClient()
+    second.cache = None
+    second.process_files()
+    assert len(second.client.calls) == 1
+    assert second.client.calls[0].endswith("void run()")
+    assert "Generated." in source.read_text()
+    second.journal.close()
+    assert JavaDocAI(tmp_path, messages=messages, retry_failed=True).journal.failed_files() == []
+
+
+class PickyClient(FakeClient):
+    """Fails the requests of the members named ``broken``."""
+
+    def chat(self, model, messages, options=None, stream=False, **kwargs):
+        from ollama import ResponseError
+
+        if "broken" in messages[-1]["content"]:
+            self.calls.append(messages[-1]["content"])
+            raise ResponseError("model not found")
+        return super().chat(model, messages, options, stream, **kwargs)
+
+
+def test_retry_run_keeps_the_manifest_of_files_it_does_not_visit(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+    from src.manifest import Manifest
+
+    (tmp_path / "Done.java").write_text("class Done {\n    void fine() {}\n}\n")
+    (tmp_path / "Job.java").write_text("class Job {\n    void broken() {}\n}\n")
+    messages = load_messages("en", CONFIG_PATH)
+    first = JavaDocAI(tmp_path, messages=messages, incremental=True)
+    first.client = PickyClient()
+    first.cache = None
+    first.process_files()
+    first.journal.close()
+
+    second = JavaDocAI(tmp_path, messages=messages, incremental=True, retry_failed=True)
+    second.client = FakeClient()
+    second.cache = None
+    second.process_files()
+    assert len(second.client.calls) == 1
+
+    manifest = Manifest(second.manifest.path, tmp_path)
+    assert manifest.is_unchanged(tmp_path / "Done.java")
+
+
+class FakeBatchClient(FakeClient):
+    """Answers batched prompts with a JSON object where the second member is malformed."""
+
+    def chat(self, model, messages, options=None, format="", stream=False, **kwargs):
+        self.calls.append(messages[-1]["content"])
+        if format == "json":
+            assert not stream
+            return {"message": {"content": '```json\n{"1": "/** Class. */", "2": "not javadoc", "3": "/** Three. */"}\n```'}}
+        return chat_answer("/** Fallback. */", stream)
+
+
+def test_batched_mode_splits_results_and_falls_back(ai, tmp_path):
+    ai.client = FakeBatchClient()
+    ai.prompt_mode = "batched"
+    ai.cache = None
+    source = "class A {\n    void one() {}\n    void two() {}\n}\n"
+    updated = ai.add_javadocs(source, tmp_path / "A.java")
+
+    assert len(ai.client.calls) == 2
+    assert "void one()" in ai.client.calls[1]
+    assert "/** Class. */" in updated
+    assert "/** Three. */" in updated
+    assert "/** Fallback. */" in updated
+
+
+class NamingBatchClient(FakeClient):
+    """Answers batched prompts with a Javadoc naming each member it was asked for."""
+
+    def chat(self, model, messages, options=None, format="", stream=False, **kwargs):
+        prompt = messages[-1]["content"]
+        self.calls.append(prompt)
+        if format == "json":
+            members = re.findall(r"^(\d+): \w+ ([^(\n]*)", prompt, re.MULTILINE)
+            answer = {number: f"/** Doc of {words.split()[-1]}. */" for number, words in members}
+            return {"message": {"content": json.dumps(answer)}}
+        return chat_answer("/** Single. */", stream)
+
+
+def test_batched_results_follow_members_after_a_cached_class(ai, tmp_path):
+    ai.client = NamingBatchClient()
+    ai.prompt_mode = "batched"
+    source = "class A {\n    void alpha() {}\n    void beta() {}\n    void gamma() {}\n}\n"
+    owner = ai.extract_members(source)[0]
+    ai.cache.put(ai.member_cache_key(owner.signature, owner.kind), "/** Cached class. */")
+    updated = ai.add_javadocs(source, tmp_path / "A.java")
+
+    assert len(ai.client.calls) == 1
+    for name in ("alpha", "beta", "gamma"):
+        assert f"/** Doc of {name}. */\n    void {name}()" in updated
+
+
+def test_batched_results_follow_members_of_each_class(ai, tmp_path):
+    ai.client = NamingBatchClient()
+    ai.prompt_mode = "batched"
+    ai.cache = None
+    source = (
+        "class A {\n    void alpha() {}\n}\n\n"
+        "class B {\n    void beta() {}\n    void gamma() {}\n}\n"
+    )
+    updated = ai.add_javadocs(source, tmp_path / "A.java")
+
+    assert len(ai.client.calls) == 2
+    assert "/** Doc of A. */\nclass A" in updated
+    assert "/** Doc of B. */\nclass B" in updated
+    for name in ("alpha", "beta", "gamma"):
+        assert f"/** Doc of {name}. */\n    void {name}()" in updated
+
+
+def test_plan_batches_respects_context_window(ai):
+    from src.members import Member
+
+    pending = [Member("class", "A", "class A", 0, 0, 0, False, "class A")] + [
+        Member("method", f"m{i}", f"void m{i}()", 0, 0, i + 1, False, "class A") for i in range(10)
+    ]
+    ai.context_window = 1000
+    batches = ai.plan_batches(pending, list(range(len(pending))))
+    assert sorted(i for batch in batches for i in batch) == list(range(11))
+    assert all(len(batch) <= 4 for batch in batches)
+    assert len(batches) > 1
+
+
+def test_chat_requests_share_a_stable_prefix(ai, monkeypatch):
+    from src.config import config
+    from src.members import Member
+
+    monkeypatch.setitem(config, "ollama", {**config["ollama"], "keep_alive": "30m", "max_tokens": 100})
+    ai.max_tokens = 100
+    first = ai.build_chat_request(ai.build_prompt("void one()", "method", "class A"))
+    second = ai.build_chat_request(ai.build_prompt("void two()", "method", "class A"))
+
+    assert first["keep_alive"] == "30m"
+    assert first["options"]["num_ctx"] == ai.context_window
+    assert first["options"]["num_predict"] == 100
+    assert first["messages"][0] == second["messages"][0]
+    assert first["messages"][0]["content"] == ai.prompts["system_role"]
+    prompt, other = first["messages"][-1]["content"], second["messages"][-1]["content"]
+    assert prompt.endswith("void one()") and other.endswith("void two()")
+    assert prompt[:prompt.index("void one()")] == other[:other.index("void two()")]
+
+    members = [Member("method", f"m{i}", f"void m{i}()", 0, 0, i, False, "class A") for i in range(3)]
+    assert ai.batch_max_tokens(members) == 300
+
+
+class ChattyClient(FakeClient):
+    """Streams a Javadoc followed by an explanation, recording how much of it was read."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+        self.closed = False
+
+    def chat(self, model, messages, options=None, stream=False, **kwargs):
+        self.calls.append(messages[-1]["content"])
+        assert stream and options["num_predict"] == 512
+
+        def chunks():
+            try:
+                for piece in ("Here it is:\n", "/**\n", " * Adds.\n", " */\n", "It adds a to b", " and returns it."):
+                    self.sent.append(piece)
+                    yield {"message": {"content": piece}, "done": False}
+                yield {"message": {"content": ""}, "done": True}
+            except GeneratorExit:
+                self.closed = True
+                raise
+        return chunks()
+
+
+def test_streamed_answers_stop_once_the_javadoc_is_complete(ai, tmp_path):
+    from src.metrics import metrics
+
+    metrics.reset()
+    ai.client = ChattyClient()
+    ai.max_tokens = 512
+    assert ai.request_javadoc("int add(int a, int b)", "method") == "/**\n * Adds.\n */"
+    assert ai.client.sent == ["Here it is:\n", "/**\n", " * Adds.\n", " */\n"]
+    assert ai.client.closed
+    assert metrics.counters["streams_stopped_total"] == 1
+
+
+def test_prompts_describe_the_class_within_the_budget(ai, tmp_path):
+    (tmp_path / "Base.java").write_text("class Base { protected String name; }\n")
+    (tmp_path / "Child.java").write_text("class Child extends Base {\n    private int age;\n    int age() { return age; }\n}\n")
+    ai.build_symbol_index()
+
+    child = tmp_path / "Child.java"
+    prompt = ai.build_prompt("int age()", "method", "class Child extends Base", child)
+    assert "Fields: private int age\nSupertype: class Base\nFields: protected String name" in prompt
+
+    ai.context_budget = 8
+    ai.class_contexts.clear()
+    assert "Supertype" not in ai.build_prompt("int age()", "method", "class Child extends Base", child)
+
+
+def test_overriding_methods_inherit_documentation(ai, tmp_path):
+    (tmp_path / "Repo.java").write_text("interface Repo<T> {\n    /** Saves. */\n    void save(T item);\n}\n")
+    (tmp_path / "Base.java").write_text("class Base {\n    void close() {}\n}\n")
+    impl = tmp_path / "Impl.java"
+    impl.write_text(
+        "class Impl extends Base implements Repo<String> {\n"
+        "    @Override\n    public void save(String item) {}\n"
+        "    public void close() {}\n"
+        "    void other() {}\n}\n"
+    )
+    ai.build_symbol_index()
+    # The overridden close() is documented first, in this run
+    ai.process_file(tmp_path / "Base.java")
+    ai.process_file(impl)
+
+    requested = " ".join(ai.client.calls)
+    assert "save(String item)" not in requested and "public void close()" not in requested
+    assert "void other()" in requested
+    assert impl.read_text().count("{@inheritDoc}") == 2
+
+    ai.inheritance_mode = "copy"
+    member = next(m for m in ai.extract_members(impl.read_text()) if m.name == "close")
+    assert ai.inherited_javadoc(member, impl) == "/**\n * Generated.\n */"
+
+
+def test_overriding_methods_are_requested_when_the_parent_gets_no_javadoc(ai, tmp_path):
+    (tmp_path / "Base.java").write_text("class Base {\n    void broken() {}\n}\n")
+    impl = tmp_path / "Impl.java"
+    impl.write_text("class Impl extends Base {\n    @Override\n    void broken() {}\n}\n")
+    ai.client = PickyClient()
+    ai.inheritance_mode = "copy"
+    ai.build_symbol_index()
+    ai.process_file(tmp_path / "Base.java")
+    ai.process_file(impl)
+
+    assert "{@inheritDoc}" not in impl.read_text()
+    assert sum("broken()" in call for call in ai.client.calls) == 2
+    # Probing the cache for the parent's comment counts no lookup
+    assert (ai.cache.hits, ai.cache.misses) == (0, 4)
+
+
+def test_trivial_members_are_templated_locally(ai, tmp_path):
+    source = tmp_path / "User.java"
+    source.write_text(
+        "class User {\n"
+        "    private String name;\n"
+        "    User(String name) { this.name = name; }\n"
+        "    String getName() { return name; }\n"
+        "    String describe() { return \"User \" + name; }\n"
+        "    enum Role { ADMIN, GUEST; int level() { return ordinal(); } }\n"
+        "}\n"
+    )
+    members = ai.extract_members(source.read_text())
+    assert [(m.kind, m.name) for m in members] == [
+        ("class", "User"), ("field", "name"), ("constructor", "User"), ("method", "getName"),
+        ("method", "describe"), ("class", "Role"), ("enum_constant", "ADMIN"), ("enum_constant", "GUEST"), ("method", "level"),
+    ]
+
+    ai.process_files()
+    requested = [call.splitlines()[-1] for call in ai.client.calls]
+    assert requested == ["class User", "String describe()", "enum Role", "int level()"]
+    updated = source.read_text()
+    assert "Creates a new User instance." in updated
+    assert "/** The guest value. */" in updated
+
+
+def test_order_files_members_first(ai, tmp_path, monkeypatch):
+    from src.config import config
+
+    small = tmp_path / "Small.java"
+    small.write_text("/** Doc. */\nclass Small {\n    void a() {}\n}\n")
+    large = tmp_path / "Large.java"
+    large.write_text("class Large {\n    void a() {}\n    void b() {}\n}\n")
+
+    monkeypatch.setitem(config["processing"], "order", "members_first")
+    assert list(ai.order_files(iter([small, large]))) == [large, small]
+    monkeypatch.setitem(config["processing"], "order", "discovery")
+    assert list(ai.order_files(iter([small, large]))) == [small, large]
+
+
+def test_process_files_drains_work_queue(ai, tmp_path):
+    for index in range(7):
+        (tmp_path / f"C{index}.java").write_text(f"class C{index} {{\n    void m() {{}}\n}}\n")
+    ai.batch_size = 2
+    ai.max_concurrent_tasks = 3
+    ai.process_files()
+    for index in range(7):
+        assert "Generated." in (tmp_path / f"C{index}.java").read_text()
+
+
+def test_parse_pool_returns_member_tables(tmp_path):
+    from src.parse_pool import ParsePool
+
+    paths = []
+    for index in range(6):
+        path = tmp_path / f"C{index}.java"
+        path.write_text(f"class C{index} {{\n    void m() {{}}\n}}\n")
+        paths.append(path)
+
+    pool = ParsePool(2)
+    try:
+        results = {path: members for path, _, members in pool.imap(iter(paths))}
+    finally:
+        pool.close()
+    assert set(results) == set(paths)
+    assert [m.name for m in results[paths[3]]] == ["C3", "m"]
+
+
+def loaded_modules():
+    """Return the modules imported by the calling process."""
+    return set(sys.modules)
+
+
+def test_parse_workers_only_load_the_extractor():
+    from src.parse_pool import ParsePool
+
+    pool = ParsePool(1)
+    try:
+        modules = pool.executor.submit(loaded_modules).result()
+    finally:
+        pool.close()
+    assert "src.members" in modules
+    assert not {"src.java_doc_ai", "src.logger", "ollama", "tqdm"} & modules
+
+
+def test_process_files_with_parse_processes(ai, tmp_path):
+    for index in range(3):
+        (tmp_path / f"C{index}.java").write_text(f"class C{index} {{\n    void m() {{}}\n}}\n")
+    ai.parse_processes = 2
+    ai.process_files()
+    for index in range(3):
+        assert (tmp_path / f"C{index}.java").read_text().count("Generated.") == 2
+
+
+def test_compact_log_summarizes_each_file(ai, tmp_path, monkeypatch):
+    from src import java_doc_ai
+    from src.logger import log
+
+    monkeypatch.setattr(java_doc_ai, "COMPACT_LOGS", True)
+    (tmp_path / "Service.java").write_text(JAVA_SOURCE)
+    lines = []
+    sink = log.add(lines.append, level="INFO", format="{message}")
+    try:
+        ai.process_files()
+    finally:
+        log.remove(sink)
+    processed = [line for line in lines if line.startswith("File processed")]
+    assert len(processed) == 1
+    assert "members=3 documented=2 journaled=0 generated=1/1" in processed[0]
+    assert ai.skipped_signatures == 2
+    assert not any("Sending prompt" in line for line in lines)
+
+
+def test_members_of_excluded_kinds_do_not_count_as_documented(ai, tmp_path):
+    fields = "".join(f"    private int field{index};\n" for index in range(10))
+    (tmp_path / "Entity.java").write_text(f"/** Doc. */\nclass Entity {{\n{fields}    void run() {{}}\n}}\n")
+    ai.process_files()
+    assert ai.skipped_signatures == 1
+
+
+class CountingClient(FakeClient):
+    """Reports the tokens of each answer like Ollama does."""
+
+    def chat(self, model, messages, options=None, stream=False, **kwargs):
+        self.calls.append(messages[-1]["content"])
+        answer = {"message": {"content": "/**\n * Generated.\n */"}, "done": True, "prompt_eval_count": 40, "eval_count": 10}
+        return iter([answer]) if stream else answer
+
+
+def test_token_budget_defers_members_to_a_resumed_run(tmp_path, monkeypatch):
+    from src.config import config
+    from src.java_doc_ai import JavaDocAI
+
+    monkeypatch.setitem(config["processing"], "order", "priority")
+    (tmp_path / "Service.java").write_text(
+        "public class Service {\n    void helper() {}\n    protected void hook() {}\n    public void run() {}\n}\n"
+    )
+    messages = load_messages("en", CONFIG_PATH)
+
+    first = JavaDocAI(tmp_path, messages=messages, token_budget=100)
+    first.client = CountingClient()
+    first.cache = None
+    first.templates = None
+    first.process_files()
+    # The class and its public method are documented before the budget runs out
+    assert len(first.client.calls) == 2
+    assert "class Service" in first.client.calls[0]
+    assert "public void run()" in first.client.calls[1]
+    assert (tmp_path / "Service.java").read_text().count("Generated.") == 2
+    assert not first.journal.is_completed(tmp_path / "Service.java")
+    first.journal.close()
+
+    second = JavaDocAI(tmp_path, messages=messages, resume=True)
+    second.client = CountingClient()
+    second.cache = None
+    second.templates = None
+    second.process_files()
+    assert len(second.client.calls) == 2
+    assert "protected void hook()" in second.client.calls[0]
+    assert (tmp_path / "Service.java").read_text().count("Generated.") == 4
+
+
+PRIORITY_SOURCES = {
+    "A.java": "public class A {\n    public void api() {}\n"
+              + "".join(f"    private void helper{index}() {{}}\n" for index in range(5)) + "}\n",
+    "B.java": "public class B {\n    public void important() {}\n}\n",
+}
+
+
+def test_token_budget_is_spent_on_the_public_api_of_every_file_first(tmp_path, monkeypatch):
+    from src.config import config
+    from src.java_doc_ai import JavaDocAI
+
+    monkeypatch.setitem(config["processing"], "order", "priority")
+    for name, source in PRIORITY_SOURCES.items():
+        (tmp_path / name).write_text(source)
+    ai = JavaDocAI(tmp_path, messages=load_messages("en", CONFIG_PATH), token_budget=350)
+    ai.client = CountingClient()
+    ai.cache = None
+    ai.templates = None
+    ai.max_concurrent_tasks = 1
+    ai.process_files()
+
+    calls = ai.client.calls
+    assert len(calls) == 7
+    assert not any("helper" in call for call in calls[:4])
+    assert any(call.endswith("public void important()") for call in calls[:4])
+    assert (tmp_path / "B.java").read_text().count("Generated.") == 2
+    assert (tmp_path / "A.java").read_text().count("Generated.") == 5
+
+
+def test_token_budget_counts_the_prompts_of_streams_closed_early(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+    from src.metrics import metrics
+
+    (tmp_path / "Service.java").write_text("class Service {\n    void a() {}\n    void b() {}\n}\n")
+    ai = JavaDocAI(tmp_path, messages=load_messages("en", CONFIG_PATH), token_budget=50)
+    ai.client = ChattyClient()
+    ai.cache = None
+    ai.templates = None
+    metrics.reset()
+    ai.process_files()
+
+    # The estimated prompt of the first answer alone spends the budget
+    assert len(ai.client.calls) == 1
+    assert metrics.counters["prompt_tokens_total"] > 50
+    assert metrics.counters["deferred_members_total"] == 2
+    assert metrics.to_json()["histograms"]["generation_seconds"]["count"] == 1
+
+
+def test_run_stopped_by_its_deadline_keeps_the_manifest(tmp_path):
+    from src.java_doc_ai import JavaDocAI
+    from src.manifest import Manifest
+
+    done = tmp_path / "Done.java"
+    done.write_text("class Done {\n    void a() {}\n}\n")
+    messages = load_messages("en", CONFIG_PATH)
+    first = JavaDocAI(tmp_path, messages=messages, incremental=True)
+    first.client = FakeClient()
+    first.cache = None
+    first.process_files()
+
+    second = JavaDocAI(tmp_path, messages=messages, incremental=True, deadline=1e-9)
+    second.client = FakeClient()
+    second.process_files()
+    assert second.budget.reason == "deadline"
+    assert Manifest(second.manifest.path, tmp_path).is_unchanged(done)
@@ -0,0 +1,55 @@
+from src.journal import Journal
+
+def test_journal_replays_entries_and_ignores_torn_line(tmp_path):
+    path = tmp_path / ".javadocai" / "journal.jsonl"
+    source = tmp_path / "A.java"
+    source.write_bytes(b"class A {}\n")
+
+    journal = Journal(path, tmp_path)
+    journal.record_member(source, "abc", "/** A. */")
+    journal.record_file(source, source.read_bytes())
+    journal.close()
+    with path.open("a", encoding="utf-8") as file:
+        file.write('{"type": "member", "path": "A.java", "mem')
+
+    resumed = Journal(path, tmp_path, resume=True)
+    assert resumed.javadoc(source, "abc") == "/** A. */"
+    assert resumed.is_completed(source)
+    resumed.record_member(source, "def", "/** B. */")
+    resumed.close()
+    assert Journal(path, tmp_path, resume=True).javadoc(source, "def") == "/** B. */"
+
+    source.write_bytes(b"class A { int x; }\n")
+    assert not resumed.is_completed(source)
+    assert not resumed.is_completed(source, source.read_bytes())
+
+def test_journal_rejects_entries_with_mismatched_hash(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"type": "member", "path": "A.java", "member": "abc", "hash": "0", "javadoc": "/** A. */"}\n')
+    assert Journal(path, tmp_path, resume=True).javadoc(tmp_path / "A.java", "abc") is None
+
+def test_journal_keeps_failures_until_the_member_succeeds(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = Journal(path, tmp_path)
+    journal.record_failure(tmp_path / "A.java", "abc", "malformed")
+    journal.record_failure(tmp_path / "B.java", "def", "request_failed")
+    journal.record_member(tmp_path / "B.java", "def", "/** B. */")
+    journal.close()
+
+    resumed = Journal(path, tmp_path, resume=True)
+    assert resumed.failed_files() == ["A.java"]
+    assert resumed.failed_members(tmp_path / "A.java") == {"abc": "malformed"}
+
+def test_read_only_journal_leaves_the_file_untouched(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"type": "failure", "path": "A.java", "member": "abc", "reason": "malformed"}\n')
+
+    journal = Journal(path, tmp_path, read_only=True)
+    journal.record_member(tmp_path / "A.java", "abc", "/** A. */")
+    journal.close()
+    assert Journal(path, tmp_path, resume=True).failed_files() == ["A.java"]
+
+    resumed = Journal(path, tmp_path, resume=True, read_only=True)
+    assert resumed.failed_members(tmp_path / "A.java") == {"abc": "malformed"}
+    resumed.record_failure(tmp_path / "B.java", "def", "malformed")
+    assert "B.java" not in path.read_text()
@@ -13,6 +13,8 @@ def test_log_file_creation(tmp_path):
     
     # Test logging
     logger.info("Test log message")
+    # The file sink is written from a background thread
+    logger.complete()
     
     # Check if log file exists
     log_file = Path("logs/java_doc_ai.log")
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import pytest
+from src.manifest import Manifest, hash_member, git_changed_files
+
+@pytest.fixture
+def java_file(tmp_path):
+    path = tmp_path / "A.java"
+    path.write_text("class A {}\n")
+    return path
+
+def test_new_file_is_not_unchanged(tmp_path, java_file):
+    manifest = Manifest(tmp_path / "aux.json", tmp_path)
+    assert not manifest.is_unchanged(java_file)
+
+def test_recorded_file_is_unchanged_after_reload(tmp_path, java_file):
+    manifest = Manifest(tmp_path / "aux.json", tmp_path)
+    manifest.stage_members(java_file, [hash_member("class", "class A")])
+    manifest.record(java_file, java_file.read_bytes())
+    manifest.save()
+
+    reloaded = Manifest(tmp_path / "aux.json", tmp_path)
+    assert reloaded.is_unchanged(java_file)
+    assert reloaded.member_hashes(java_file) == {hash_member("class", "class A")}
+
+def test_touched_file_falls_back_to_content_hash(tmp_path, java_file):
+    manifest = Manifest(tmp_path / "aux.json", tmp_path)
+    manifest.record(java_file, java_file.read_bytes())
+    stat = java_file.stat()
+    os.utime(java_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+    assert not manifest.is_unchanged(java_file)
+    assert manifest.is_unchanged(java_file, java_file.read_bytes())
+    java_file.write_text("class A { int x; }\n")
+    assert not manifest.is_unchanged(java_file, java_file.read_bytes())
+
+def test_save_preserves_other_sections_and_prunes(tmp_path, java_file):
+    aux = tmp_path / "aux.json"
+    aux.write_text('{"class_relationships": {"A": []}, "manifest": {"Gone.java": {}}}')
+    manifest = Manifest(aux, tmp_path)
+    manifest.is_unchanged(java_file)
+    manifest.record(java_file, java_file.read_bytes())
+    manifest.save(prune=True)
+
+    reloaded = Manifest(aux, tmp_path)
+    assert reloaded.data["class_relationships"] == {"A": []}
+    assert set(reloaded.files) == {"A.java"}
+
+def test_git_changed_files(tmp_path, java_file):
+    def git(*args):
+        subprocess.run(["git", "-C", str(tmp_path), *args], check=True, capture_output=True)
+
+    git("init", "-q")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "--allow-empty", "-m", "init")
+    git("add", "A.java")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "add")
+    assert git_changed_files(tmp_path, "HEAD~1") == {java_file}
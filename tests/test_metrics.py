@@ -0,0 +1,50 @@
+import json
+
+from src.metrics import Histogram, Metrics
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    histogram = Histogram(buckets=(1, 2, 4))
+    for value in (0.5, 1.5, 1.5, 3, 10):
+        histogram.observe(value)
+    assert histogram.count == 5
+    assert histogram.sum == 16.5
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.quantile(0.5) == 1.75
+    assert histogram.quantile(1.0) == 4
+    assert Histogram().quantile(0.5) is None
+
+def test_record_chat_splits_latency_and_counts_tokens():
+    metrics = Metrics()
+    metrics.record_chat({
+        "message": {"content": "/** A. */"},
+        "prompt_eval_count": 120,
+        "eval_count": 30,
+        "total_duration": 800_000_000,
+        "load_duration": 100_000_000,
+        "prompt_eval_duration": 200_000_000,
+        "eval_duration": 500_000_000,
+    }, elapsed=1.0)
+    assert metrics.counters["prompt_tokens_total"] == 120
+    assert metrics.counters["generated_tokens_total"] == 30
+    assert abs(metrics.histograms["server_queue_seconds"].sum - 0.2) < 1e-9
+    assert metrics.histograms["generation_seconds"].sum == 0.5
+
+def test_export_prometheus_and_json(tmp_path):
+    metrics = Metrics()
+    metrics.inc("prompts_total", 3)
+    with metrics.timer("parse_seconds"):
+        pass
+
+    metrics.export(tmp_path / "metrics.prom")
+    text = (tmp_path / "metrics.prom").read_text()
+    assert "# TYPE javadocai_prompts_total counter\njavadocai_prompts_total 3\n" in text
+    assert 'javadocai_parse_seconds_bucket{le="+Inf"} 1' in text
+    assert "javadocai_parse_seconds_count 1" in text
+
+    metrics.export(tmp_path / "metrics.json")
+    data = json.loads((tmp_path / "metrics.json").read_text())
+    assert data["counters"]["prompts_total"] == 3
+    assert data["histograms"]["parse_seconds"]["count"] == 1
+
+    table = metrics.summary_table()
+    assert "prompts_total" in table and "parse_seconds" in table
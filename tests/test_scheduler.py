@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from src.members import Member
+from src.scheduler import (
+    PRIVATE, PROTECTED, PUBLIC, PlannedFile, RunBudget, is_test_source, member_tier, request_passes
+)
+
+def member(kind, signature, class_signature):
+    return Member(kind, None, signature, 0, 0, 0, False, class_signature)
+
+def test_member_tiers_follow_visibility_and_declaring_type():
+    public_class = "@Entity(name = \"x\") public class Service"
+    assert member_tier(member("class", public_class, public_class)) == PUBLIC
+    assert member_tier(member("method", "public void run()", public_class)) == PUBLIC
+    assert member_tier(member("method", "protected void hook(Map<String, Integer> values)", public_class)) == PROTECTED
+    assert member_tier(member("method", "void helper()", public_class)) == PRIVATE
+    # A public method of a package-private class is not public API
+    assert member_tier(member("method", "public void run()", "class Internal")) == PRIVATE
+    # Interface members are implicitly public
+    assert member_tier(member("method", "String name()", "public interface Named")) == PUBLIC
+    assert member_tier(member("method", "private String helper()", "public interface Named")) == PRIVATE
+
+def test_request_passes_follow_tiers_across_files_tests_last():
+    repo = Path("/home/ci/tests/repo")
+    assert is_test_source(repo / "src/test/java/demo/Service.java", repo)
+    assert is_test_source(repo / "src/main/java/demo/ServiceTest.java", repo)
+    assert not is_test_source(repo / "src/main/java/demo/Testing.java", repo)
+
+    public_class = "public class Service"
+    helper = member("method", "private void helper()", public_class)
+    hook = member("method", "protected void hook()", public_class)
+    run = member("method", "public void run()", public_class)
+    internal = PlannedFile(repo / "src/main/Internal.java", "", [helper, hook, run], repo)
+    api = PlannedFile(repo / "src/main/Api.java", "", [run], repo)
+    test = PlannedFile(repo / "src/test/ServiceTest.java", "", [run, helper], repo)
+    failed = PlannedFile(repo / "src/main/Broken.java", "", None, repo)
+    assert failed.failed and not failed.remaining
+
+    assert request_passes([test, internal, api, failed]) == [
+        [(internal, [run]), (api, [run])],
+        [(internal, [hook])],
+        [(internal, [helper])],
+        [(test, [run])],
+        [(test, [helper])],
+    ]
+    assert not internal.settle([(run, "/** Run. */")])
+    assert not internal.settle(None)
+    assert internal.settle([])
+    assert internal.failed and internal.insertions == [(run, "/** Run. */")]
+
+def test_budget_is_exhausted_by_tokens_or_deadline():
+    unlimited = RunBudget()
+    unlimited.charge({"prompt_eval_count": 10 ** 9})
+    assert not unlimited.limited and not unlimited.exhausted()
+
+    budget = RunBudget(max_tokens=100)
+    budget.charge({"prompt_eval_count": 60, "eval_count": 30})
+    assert not budget.exhausted()
+    budget.charge({"prompt_eval_count": 10})
+    assert budget.exhausted() and budget.reason == "token budget"
+    budget.start()
+    assert not budget.exhausted()
+
+    deadline = RunBudget(deadline_minutes=1)
+    deadline.started -= 61
+    assert deadline.exhausted() and deadline.reason == "deadline"
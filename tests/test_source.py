@@ -0,0 +1,63 @@
+from src.members import Member
+from src.source import (
+    read_source, write_source, encode_source, detect_newline, format_javadoc, splice_javadocs, repair_javadoc
+)
+
+def member_at(source: bytes, text: bytes) -> Member:
+    start = source.index(text)
+    line = source.count(b"\n", 0, start)
+    return Member("method", None, text.decode(), start, start + len(text), line, False, "")
+
+def test_format_javadoc_normalizes_indentation():
+    comment = "/**\n* Adds.\n\n   * @return sum\n      */"
+    assert format_javadoc(comment, "    ", "\n") == "    /**\n     * Adds.\n     *\n     * @return sum\n     */"
+
+def test_splice_indents_like_member_and_keeps_crlf():
+    code = "class A {\r\n    @Override\r\n    void a() {}\r\n\r\n    void b() {}\r\n}"
+    source = encode_source(code)
+    insertions = [
+        (member_at(source, b"void b()"), "/** B. */"),
+        (member_at(source, b"@Override"), "/**\n * A.\n */"),
+    ]
+    updated = splice_javadocs(code, insertions)
+    assert updated == (
+        "class A {\r\n    /**\r\n     * A.\r\n     */\r\n    @Override\r\n    void a() {}\r\n"
+        "\r\n    /** B. */\r\n    void b() {}\r\n}"
+    )
+
+def test_splice_breaks_line_for_inline_member():
+    code = "class A { void a() {} }\n"
+    source = encode_source(code)
+    updated = splice_javadocs(code, [(member_at(source, b"void a()"), "/** A. */")])
+    assert updated == "class A {\n    /** A. */\n    void a() {} }\n"
+
+def test_splice_indents_inline_enum_constants_below_their_line():
+    code = "class A {\n\tenum Role { ADMIN, GUEST }\n}\n"
+    source = encode_source(code)
+    updated = splice_javadocs(code, [
+        (member_at(source, b"ADMIN"), "/** Admin. */"), (member_at(source, b"GUEST"), "/** Guest. */")
+    ])
+    assert updated == "class A {\n\tenum Role {\n\t\t/** Admin. */\n\t\tADMIN,\n\t\t/** Guest. */\n\t\tGUEST }\n}\n"
+
+def test_detect_newline():
+    assert detect_newline(b"a\r\nb\n") == b"\r\n"
+    assert detect_newline(b"a\nb\r\n") == b"\n"
+    assert detect_newline(b"a") == b"\n"
+
+def test_non_utf8_bytes_round_trip(tmp_path):
+    path = tmp_path / "Latin.java"
+    original = "// Ol\xe1\r\nclass Latin {\r\n    void a() {}\r\n}\r\n".encode("latin-1")
+    path.write_bytes(original)
+
+    code = read_source(path)
+    updated = splice_javadocs(code, [(member_at(encode_source(code), b"void a()"), "/** A. */")])
+    write_source(path, updated)
+
+    assert path.read_bytes() == original.replace(b"    void a()", b"    /** A. */\r\n    void a()")
+
+def test_repair_javadoc_extracts_first_block_from_chatty_answer():
+    answer = "Sure, here it is:\n```java\n    /**\n     * Adds.\n     */\n```\nAnything else? */"
+    assert repair_javadoc(answer) == "/**\n * Adds.\n */"
+    assert repair_javadoc("/** One. */ */") == "/** One. */"
+    assert repair_javadoc("/**\n * Cut off by the token limit") is None
+    assert repair_javadoc("/**/") is None
@@ -0,0 +1,24 @@
+from src.streaming import StreamedAnswer
+
+def chunk(content, done=False, **stats):
+    return {"message": {"content": content}, "done": done, **stats}
+
+def test_answer_is_complete_once_the_javadoc_closes_across_chunks():
+    answer = StreamedAnswer()
+    pieces = ["Sure! /", "*", "* Adds the values. *", "/", "\nThis method adds"]
+    complete = [answer.add(chunk(piece)) for piece in pieces[:4]]
+    assert complete == [False, False, False, True]
+    assert answer.stopped_early
+    response = answer.response()
+    assert response["message"]["content"] == "Sure! /** Adds the values. */"
+    assert response["eval_count"] == 4
+    assert response["prompt_eval_count"] == 0
+    assert response["eval_duration"] >= 0
+
+def test_empty_comment_does_not_close_and_final_chunk_keeps_statistics():
+    answer = StreamedAnswer()
+    assert not answer.add(chunk("/**/ no javadoc"))
+    assert answer.add(chunk("", done=True, eval_count=7, prompt_eval_count=3))
+    assert not answer.stopped_early
+    assert answer.response()["eval_count"] == 7
+    assert answer.response()["message"]["content"] == "/**/ no javadoc"
@@ -0,0 +1,136 @@
+import json
+import pytest
+from pathlib import Path
+from src.manifest import Manifest
+from src.symbols import SymbolIndex, extract_symbols, type_name
+
+PARSER_LIBRARY = Path("build/java-languages.so")
+
+pytestmark = pytest.mark.skipif(
+    not PARSER_LIBRARY.exists(), reason="Java parser not built, run build_parsers.py"
+)
+
+BASE = """package demo;
+
+public abstract class Base<T> implements java.io.Closeable {
+    @Inject protected final Repository<T> repository = new Repository<>(), backup;
+}
+"""
+
+SERVICE = """package demo;
+
+public class Service extends Base<String> implements Runnable {
+    private int count;
+
+    enum State implements Named { ON, OFF; private String label; }
+
+    record Point(int x, int y) {}
+
+    public void run() { int local = 0; }
+}
+"""
+
+
+@pytest.fixture
+def parser():
+    from src.java_doc_ai import JavaDocAI
+    return JavaDocAI.initialize_parser()
+
+
+def test_type_name_strips_packages_and_generics():
+    assert type_name("java.util.List<String>") == "List"
+
+
+def test_extract_symbols_records_types_supertypes_and_fields(parser):
+    symbols = extract_symbols(parser, BASE)
+    assert (symbols["package"], symbols["imports"]) == ("demo", [])
+    base, = symbols["types"]
+    assert (base["qualified"], base["supertypes"]) == ("demo.Base", ["java.io.Closeable"])
+    assert base["fields"] == ["protected final Repository<T> repository, backup"]
+
+    service, state, point = extract_symbols(parser, SERVICE)["types"]
+    assert service["signature"] == "public class Service extends Base<String> implements Runnable"
+    assert service["supertypes"] == ["Base", "Runnable"]
+    assert service["fields"] == ["private int count"]
+    assert (state["kind"], state["supertypes"], state["fields"]) == ("enum", ["Named"], ["private String label"])
+    assert state["qualified"] == "demo.Service.State"
+    assert (point["kind"], point["fields"]) == ("record", ["int x", "int y"])
+
+
+def test_index_resolves_ancestors_and_reuses_cached_files(parser, tmp_path):
+    (tmp_path / "Base.java").write_text(BASE)
+    (tmp_path / "Service.java").write_text(SERVICE)
+    files = sorted(tmp_path.glob("*.java"))
+    auxiliary = tmp_path / "aux.json"
+
+    index = SymbolIndex(auxiliary, tmp_path)
+    assert index.build(parser, files) == 2
+    service = index.lookup(tmp_path / "Service.java", "public class Service extends Base<String> implements Runnable")
+    assert [parent["name"] for parent in index.ancestors(service)] == ["Base"]
+    index.save()
+
+    reloaded = SymbolIndex(auxiliary, tmp_path)
+    assert reloaded.build(parser, files) == 0
+    assert reloaded.get("demo.Base")["fields"] == index.get("demo.Base")["fields"]
+
+
+def test_manifest_and_index_share_the_auxiliary_file(parser, tmp_path):
+    (tmp_path / "Base.java").write_text(BASE)
+    auxiliary = tmp_path / "aux.json"
+    manifest = Manifest(auxiliary, tmp_path)
+    index = SymbolIndex(auxiliary, tmp_path)
+    index.build(parser, [tmp_path / "Base.java"])
+    index.save()
+    manifest.save()
+
+    data = json.loads(auxiliary.read_text())
+    assert "Base.java" in data["class_relationships"]["files"]
+    assert data["manifest"] == {}
+
+
+def test_overridden_matches_parameter_types_or_override_annotation(parser, tmp_path):
+    (tmp_path / "Types.java").write_text(
+        "interface Store<T> {\n    void put(T item);\n    void put(T item, int count);\n    void get(long id);\n}\n"
+        "class Files implements Store<String> {\n"
+        "    @Override public void put(String item) {}\n"
+        "    public void put(String item, int count) {}\n"
+        "    public void get(long id) {}\n"
+        "    public void get(int id) {}\n}\n"
+    )
+    index = SymbolIndex(tmp_path / "aux.json", tmp_path)
+    index.build(parser, [tmp_path / "Types.java"])
+    files = index.get("Files")
+    overridden = {
+        method["key"]: index.overridden(files, method) for method in files["methods"]
+    }
+    assert overridden["put(String)"][1]["key"] == "put(T)"
+    assert overridden["put(String,int)"] is None
+    assert overridden["get(long)"][1]["key"] == "get(long)"
+    assert overridden["get(int)"] is None
+
+
+def test_index_keeps_same_named_types_apart_and_resolves_through_imports(parser, tmp_path):
+    for package, field in (("a", "secretA"), ("b", "secretB")):
+        (tmp_path / package).mkdir()
+        (tmp_path / package / "Builder.java").write_text(
+            f"package {package};\n\nclass Builder {{\n    private String {field};\n}}\n"
+        )
+    (tmp_path / "b" / "Child.java").write_text("package b;\n\nclass Child extends Builder {}\n")
+    (tmp_path / "c").mkdir()
+    (tmp_path / "c" / "Other.java").write_text(
+        "package c;\n\nimport a.Builder;\nimport b.*;\n\nclass Other extends Builder {}\n"
+        "class Star extends Child {}\nclass Qualified extends b.Builder {}\n"
+    )
+    index = SymbolIndex(tmp_path / "aux.json", tmp_path)
+    index.build(parser, sorted(tmp_path.rglob("*.java")))
+
+    assert index.lookup(tmp_path / "a" / "Builder.java", "class Builder")["fields"] == ["private String secretA"]
+    assert index.lookup(tmp_path / "b" / "Builder.java", "class Builder")["fields"] == ["private String secretB"]
+
+    def parents(path, signature):
+        return [parent["qualified"] for parent in index.ancestors(index.lookup(path, signature))]
+
+    assert parents(tmp_path / "b" / "Child.java", "class Child extends Builder") == ["b.Builder"]
+    assert parents(tmp_path / "c" / "Other.java", "class Other extends Builder") == ["a.Builder"]
+    assert parents(tmp_path / "c" / "Other.java", "class Star extends Child") == ["b.Child", "b.Builder"]
+    assert parents(tmp_path / "c" / "Other.java", "class Qualified extends b.Builder") == ["b.Builder"]
@@ -0,0 +1,53 @@
+import pytest
+from src.config import CONFIG_PATH
+from src.members import Member
+from src.templates import TemplateEngine, TEMPLATE_RULES, words
+from src.utils import load_messages
+
+
+@pytest.fixture
+def engine():
+    return TemplateEngine(load_messages("en", CONFIG_PATH)["templates"], list(TEMPLATE_RULES))
+
+
+def render(engine, kind, name, signature, body=""):
+    declaration = signature + body
+    return engine.render(Member(kind, name, signature, 0, len(declaration), 0, False, "class User"), declaration)
+
+
+def test_words_splits_identifiers():
+    assert words("firstName") == "first name"
+    assert words("HTTPStatus") == "http status"
+    assert words("IN_PROGRESS") == "in progress"
+
+
+def test_accessors_are_templated(engine):
+    assert render(engine, "method", "getFirstName", "public String getFirstName()", " { return this.firstName; }") == (
+        "/**\n * Returns the first name.\n *\n * @return the first name\n */"
+    )
+    assert "Returns whether it is active." in render(engine, "method", "isActive", "boolean isActive()", " { return active; }")
+    assert render(engine, "method", "setId", "public void setId(final long id)", " {\n    this.id = id;\n}") == (
+        "/**\n * Sets the id.\n *\n * @param id the id\n */"
+    )
+
+
+def test_members_with_logic_go_to_the_model(engine):
+    assert render(engine, "method", "getTotal", "int getTotal()", " { return a + b; }") is None
+    assert render(engine, "method", "setName", "void setName(String name)", " { this.name = name.trim(); }") is None
+    assert render(engine, "method", "getName", "String getName()", ' { return "x"; }') is None
+    assert render(engine, "constructor", "User", "User(String name)", " { validate(name); }") is None
+
+
+def test_constructors_and_enum_constants(engine):
+    assert render(engine, "constructor", "User", "public User(String name, Map<String, Integer> roles)",
+                  " { super(name); this.roles = roles; }") == (
+        "/**\n * Creates a new User instance.\n *\n * @param name the name\n * @param roles the roles\n */"
+    )
+    assert render(engine, "enum_constant", "IN_PROGRESS", 'IN_PROGRESS("p")') == "/** The in progress value. */"
+
+
+def test_patterns_select_the_rules():
+    messages = load_messages("pt", CONFIG_PATH)["templates"]
+    engine = TemplateEngine(messages, ["setter"])
+    assert render(engine, "method", "getId", "long getId()", " { return id; }") is None
+    assert "Define o valor de id." in render(engine, "method", "setId", "void setId(long id)", " { this.id = id; }")
@@ -0,0 +1,88 @@
+import os
+import stat
+import subprocess
+
+import pytest
+
+from src.writers import AtomicWriter, BackgroundWriter, OutputWriter, PatchWriter
+
+ORIGINAL = "class A {\r\n    void a() {}\r\n}"
+UPDATED = "class A {\r\n    /** A. */\r\n    void a() {}\r\n}"
+
+def test_atomic_writer_replaces_file_and_keeps_mode(tmp_path):
+    path = tmp_path / "A.java"
+    path.write_bytes(ORIGINAL.encode())
+    os.chmod(path, 0o640)
+    written = []
+
+    writer = AtomicWriter()
+    assert writer.write(path, ORIGINAL, UPDATED, lambda: written.append(path))
+
+    assert path.read_bytes() == UPDATED.encode()
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    assert written == [path]
+    assert writer.bytes_written == len(UPDATED.encode())
+    assert list(tmp_path.iterdir()) == [path]
+
+def test_writer_skips_unchanged_content(tmp_path):
+    path = tmp_path / "A.java"
+    path.write_bytes(ORIGINAL.encode())
+    mtime = path.stat().st_mtime_ns
+
+    writer = AtomicWriter()
+    assert not writer.write(path, ORIGINAL, ORIGINAL)
+    assert path.stat().st_mtime_ns == mtime
+    assert writer.bytes_written == 0
+
+def test_patch_writer_leaves_tree_untouched(tmp_path):
+    path = tmp_path / "src" / "A.java"
+    path.parent.mkdir()
+    path.write_bytes(ORIGINAL.encode())
+    patch = tmp_path / ".javadocai" / "javadoc.patch"
+
+    writer = PatchWriter(patch, tmp_path)
+    assert writer.write(path, ORIGINAL, UPDATED)
+
+    assert path.read_bytes() == ORIGINAL.encode()
+    content = patch.read_bytes().decode()
+    assert "--- a/src/A.java" in content
+    assert "+    /** A. */\r\n" in content
+    assert "\\ No newline at end of file" in content
+
+    if subprocess.run(["git", "--version"], capture_output=True).returncode != 0:
+        pytest.skip("git not available")
+    subprocess.run(["git", "apply", str(patch)], cwd=tmp_path, check=True)
+    assert path.read_bytes() == UPDATED.encode()
+
+def test_background_writer_flushes_on_close(tmp_path):
+    paths = [tmp_path / f"A{i}.java" for i in range(20)]
+    for path in paths:
+        path.write_bytes(ORIGINAL.encode())
+
+    writer = BackgroundWriter(AtomicWriter(), max_pending=2)
+    for path in paths:
+        assert writer.write(path, ORIGINAL, UPDATED)
+    writer.close()
+
+    assert all(path.read_bytes() == UPDATED.encode() for path in paths)
+    assert writer.bytes_written == 20 * len(UPDATED.encode())
+
+def test_writers_must_implement_store():
+    with pytest.raises(TypeError):
+        OutputWriter()
+
+def test_patch_writer_keeps_form_feeds_and_line_separators_inside_lines(tmp_path):
+    original = "class A {\n    // page\x0cbreak here\n    void a() {}\n}\n"
+    updated = original.replace("    void a()", "    /** A. */\n    void a()")
+    path = tmp_path / "A.java"
+    path.write_bytes(original.encode())
+    patch = tmp_path / "javadoc.patch"
+
+    PatchWriter(patch, tmp_path).write(path, original, updated)
+
+    content = patch.read_bytes().decode()
+    assert " // page\x0cbreak here\n" in content
+    if subprocess.run(["git", "--version"], capture_output=True).returncode != 0:
+        pytest.skip("git not available")
+    subprocess.run(["git", "apply", str(patch)], cwd=tmp_path, check=True)
+    assert path.read_bytes() == updated.encode()